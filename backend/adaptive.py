@@ -1,30 +1,51 @@
+import numpy as np
+from sqlalchemy import select
 from .models import TopicPerformance
 from .extensions import db
+from .db_utils import increment_row
 
 
-def record_performance(user_id, question):
-    """Record each attempt and whether it was correct to update TopicPerformance."""
+# ------------------------------------------------------------------------------
+# Function: record_performance
+# Purpose: Count one answered question towards the user's TopicPerformance row.
+# Inputs:
+#   - user_id: who answered
+#   - question: the answered QuizQuestion (topic, is_correct)
+#   - sign: 1 to count the answer, -1 to take a counted answer back
+# Process:
+#   - One atomic upsert (db_utils.increment_row): INSERT (attempts=1, correct=0|1), or on the
+#     (user_id, topic) conflict add to the stored counters in the database
+#     (ON CONFLICT DO UPDATE / ON DUPLICATE KEY UPDATE), so concurrent answers
+#     never lose an increment
+#   - No commit: the write joins the caller's transaction
+# ------------------------------------------------------------------------------
+def record_performance(user_id, question, sign=1):
     topic = getattr(question, 'topic', None)
     if not topic:
         return
-    perf = TopicPerformance.query.filter_by(user_id=user_id, topic=topic).first()
-    if not perf:
-        perf = TopicPerformance(user_id=user_id, topic=topic, attempts=0, correct=0)
-        db.session.add(perf)
-    perf.attempts += 1
-    if getattr(question, 'is_correct', False):
-        perf.correct += 1
-    db.session.commit()
+    correct = sign if getattr(question, 'is_correct', False) else 0
+    increment_row(TopicPerformance, {'user_id': user_id, 'topic': topic}, {'attempts': sign, 'correct': correct})
 
 
 def get_poor_topics(user_id, threshold=0.7):
-    """Return a list of topics where the user's accuracy is below the threshold."""
-    perfs = TopicPerformance.query.filter_by(user_id=user_id).all()
-    return [p.topic for p in perfs if p.attempts > 0 and (p.correct / p.attempts) < threshold]
+    """Return a list of topics where the user's accuracy is below the threshold (filtered in SQL)."""
+    return db.session.execute(
+        select(TopicPerformance.topic).where(
+            TopicPerformance.user_id == user_id,
+            TopicPerformance.attempts > 0,
+            TopicPerformance.correct < TopicPerformance.attempts * threshold,
+        )
+    ).scalars().all()
 
 
-def order_questions(questions, poor_topics):
-    """Reorder questions so those from poor_topics appear first."""
+def order_questions(questions, poor_topics=(), mastery=None):
+    """Reorder questions: by expected learning gain when a TopicMastery is given
+    (highest first, ties keep their order), else poor_topics first."""
+    if mastery is not None:
+        gains = mastery.gains([getattr(q, 'topic', None) for q in questions])
+        order = np.argsort(-gains, kind='stable')
+        return [questions[i] for i in order]
+    poor_topics = set(poor_topics)
     poor = [q for q in questions if getattr(q, 'topic', None) in poor_topics]
     rest = [q for q in questions if getattr(q, 'topic', None) not in poor_topics]
-    return poor + rest 
\ No newline at end of file
+    return poor + rest
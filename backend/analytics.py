@@ -0,0 +1,163 @@
+# backend/analytics.py
+# Daily answer rollups behind the /analytics dashboard API.
+# Each answer adds to the user's DailyStats row for its day and, when the
+# question has a topic, to the DailyTopicStats row for (day, topic), with the
+# same atomic upsert as record_performance (db_utils.increment_row). The
+# dashboard therefore reads O(days x topics) rollup rows however long the
+# answer history is.
+# - Multiple-choice answers are counted as answered and graded at once;
+#   free-response answers are counted when submitted and again (graded /
+#   correct only) when their verdict is stored
+# - A re-answered question replaces its earlier answer: retract_answer takes
+#   the earlier counts back before the new answer is recorded
+# - Rollups are an activity log: deleting a quiz session does not remove its
+#   past answers from them (`flask rebuild-analytics` recomputes from history)
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from .extensions import db
+from .models import DailyStats, DailyTopicStats, QuizQuestion, QuizSession
+from .adaptive import record_performance
+from .db_utils import increment_row
+
+# Default and largest dashboard window, in days
+ANALYTICS_DAYS = 30
+MAX_ANALYTICS_DAYS = 365
+
+_COUNTERS = ('answers', 'graded', 'correct', 'answer_seconds')
+
+
+def answer_seconds(question):
+    """Seconds from the question's creation to its answer (0 when either is unknown)."""
+    if question.answered_at is None or question.created_at is None:
+        return 0.0
+    return max(0.0, (question.answered_at - question.created_at).total_seconds())
+
+
+def _add(user_id, question, counts):
+    day = (question.answered_at or datetime.utcnow()).date()
+    increment_row(DailyStats, {'user_id': user_id, 'day': day}, counts)
+    if question.topic:
+        increment_row(DailyTopicStats, {'user_id': user_id, 'day': day, 'topic': question.topic}, counts)
+
+
+# ------------------------------------------------------------------------------
+# Function: record_answer
+# Purpose: Count a submitted answer towards the user's daily rollups.
+# Inputs:
+#   - user_id: who answered
+#   - question: the answered QuizQuestion (answered_at, created_at, topic;
+#     is_correct for multiple-choice)
+#   - sign: 1 to count the answer, -1 to take it back (see retract_answer)
+# Process:
+#   - answers + 1 and answer_seconds + (answered_at - created_at)
+#   - Multiple-choice answers are graded now: graded + 1, correct + is_correct
+#   - No commit: the writes join the caller's transaction
+# ------------------------------------------------------------------------------
+def record_answer(user_id, question, sign=1):
+    graded = bool(question.options) and question.is_correct is not None
+    _add(user_id, question, {'answers': sign, 'answer_seconds': sign * answer_seconds(question),
+                             'graded': sign if graded else 0,
+                             'correct': sign if graded and question.is_correct else 0})
+
+
+def record_verdict(user_id, question, sign=1):
+    """Count a stored free-response verdict (graded + 1, correct + is_correct); no commit."""
+    if question.options or question.is_correct is None:
+        return
+    _add(user_id, question, {'graded': sign, 'correct': sign if question.is_correct else 0})
+
+
+# ------------------------------------------------------------------------------
+# Function: retract_answer
+# Purpose: Take back what an answered question added to the counters, before
+#          a new answer to it is recorded, so re-answering never counts twice.
+# Inputs:
+#   - user_id: who answered
+#   - question: the QuizQuestion, still holding its earlier answer and verdict
+# Process:
+#   - Subtract the submission from the rollups (on its original day) and, for
+#     multiple-choice, from TopicPerformance
+#   - A stored free-response verdict was counted too (unless the answer was
+#     skipped): subtract it from TopicPerformance and the rollups
+#   - No-op for a question that was never answered; no commit
+# ------------------------------------------------------------------------------
+def retract_answer(user_id, question):
+    if question.user_answer is None:
+        return
+    if question.options or (question.user_answer and question.eval_status):
+        record_performance(user_id, question, sign=-1)
+    if question.user_answer and question.eval_status:
+        record_verdict(user_id, question, sign=-1)
+    record_answer(user_id, question, sign=-1)
+
+
+def _row(r, **extra):
+    return dict(extra, answers=r.answers, graded=r.graded, correct=r.correct,
+                accuracy=round(r.correct / r.graded, 4) if r.graded else None,
+                avg_answer_seconds=round(r.answer_seconds / r.answers, 1) if r.answers else None)
+
+
+# ------------------------------------------------------------------------------
+# Function: get_analytics
+# Purpose: Dashboard data for the last `days` days from the rollup tables.
+# Inputs:
+#   - user_id: whose rollups
+#   - days: window length (capped at MAX_ANALYTICS_DAYS)
+# Outputs:
+#   - dict with 'since', per-day totals ('days'), per-day per-topic rows
+#     ('topics') and per-topic totals over the window ('topic_totals')
+# ------------------------------------------------------------------------------
+def get_analytics(user_id, days=ANALYTICS_DAYS, today=None):
+    days = max(1, min(int(days), MAX_ANALYTICS_DAYS))
+    since = (today or datetime.utcnow().date()) - timedelta(days=days - 1)
+    daily = db.session.execute(
+        select(DailyStats).where(DailyStats.user_id == user_id, DailyStats.day >= since)
+        .order_by(DailyStats.day)
+    ).scalars().all()
+    topical = db.session.execute(
+        select(DailyTopicStats).where(DailyTopicStats.user_id == user_id, DailyTopicStats.day >= since)
+        .order_by(DailyTopicStats.day, DailyTopicStats.topic)
+    ).scalars().all()
+    totals = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+    for r in topical:
+        for name in _COUNTERS:
+            totals[r.topic][name] += getattr(r, name)
+    return {
+        'since': since.isoformat(),
+        'days': [_row(r, day=r.day.isoformat()) for r in daily],
+        'topics': [_row(r, day=r.day.isoformat(), topic=r.topic) for r in topical],
+        'topic_totals': [_row(DailyStats(**counts), topic=topic) for topic, counts in sorted(totals.items())],
+    }
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from quiz_questions (one streamed pass); commits."""
+    daily = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+    topical = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+    rows = db.session.execute(
+        select(QuizSession.user_id, QuizQuestion)
+        .join(QuizSession, QuizSession.id == QuizQuestion.session_id)
+        .where(QuizQuestion.answered_at.is_not(None))
+        .execution_options(yield_per=1000)
+    )
+    for user_id, q in rows:
+        graded = q.is_correct is not None and (bool(q.options) or q.eval_status is not None)
+        counts = {'answers': 1, 'answer_seconds': answer_seconds(q), 'graded': 1 if graded else 0,
+                  'correct': 1 if graded and q.is_correct else 0}
+        day = q.answered_at.date()
+        targets = [daily[(user_id, day)]] + ([topical[(user_id, day, q.topic)]] if q.topic else [])
+        for target in targets:
+            for name, value in counts.items():
+                target[name] += value
+    db.session.execute(delete(DailyTopicStats))
+    db.session.execute(delete(DailyStats))
+    if daily:
+        db.session.execute(DailyStats.__table__.insert(), [
+            dict(counts, user_id=u, day=d) for (u, d), counts in daily.items()])
+    if topical:
+        db.session.execute(DailyTopicStats.__table__.insert(), [
+            dict(counts, user_id=u, day=d, topic=t) for (u, d, t), counts in topical.items()])
+    db.session.commit()
+    return len(daily), len(topical)
@@ -19,15 +19,34 @@ from .extensions import db, migrate, login_manager  # Initialize DB, migrations,
 from flask_admin import Admin  # Admin UI for managing models
 from flask_admin.contrib.sqla import ModelView  # SQLAlchemy views for admin
 from flask_login import login_user, logout_user, current_user, login_required  # User session management
-from .models import User, ApiKey, QuizSession, QuizQuestion, ChatMessage  # ORM models
+from .models import User, ApiKey, QuizSession, QuizQuestion, ChatMessage, GenerationJob  # ORM models
 from .parser_pptx_json import pptx_to_json  # PPTX parsing utility
-from .parser_pdf_text import pdf_to_text  # PDF parsing utility
-from .parser_docx_text import docx_to_text  # DOCX parsing utility
-from .parser_xlsx_text import xlsx_to_text  # XLSX parsing utility
-import google.genai as genai  # Google GenAI SDK for Gemini
+from .parse_cache import ParseCache, DEFAULT_MAX_BYTES  # Content-addressed parsed-text cache
+from .llm_clients import registry as llm_client_registry  # Pooled GenAI clients
+from .llm import (configure as configure_llm, http_registry as llm_http_registry, resolve_api_key,
+                  DEFAULT_MODEL)  # LLM backend layer
 import random
 import hashlib
-from .adaptive import record_performance, get_poor_topics, order_questions
+import click  # Options for the flask CLI commands
+from .stats import get_session_stats  # Aggregated per-session scoreboard
+from .schema import check_schema, init_schema  # Startup schema setup / readiness
+from .persistence import create_quiz_session  # Single-transaction session + bulk question insert
+from .topics import tag_questions  # Topic labels for generated questions
+from .dedup import forget_session  # Near-duplicate question index
+from .review import (record_review, review_questions, due_count, forget_session_cards,
+                     REVIEW_SIZE)  # Spaced repetition
+from .adaptive import record_performance  # Per-topic answer counters
+from .mastery import invalidate_mastery, MASTERY_CACHE_TTL  # Cached per-topic mastery estimates
+from .analytics import record_answer, retract_answer, get_analytics, rebuild_rollups, ANALYTICS_DAYS  # Daily answer rollups
+from .grading import (grade_free_response, explain_answer_async, GRADING_MAX_WORKERS, GRADING_BATCH_SIZE,
+                      GRADING_BATCH_TOKENS)  # Free-response grading
+from .generation import generate_questions, generate_hint, GENERATION_MAX_WORKERS  # Quiz generation
+from .chunking import DEFAULT_CHUNK_TOKENS  # Token-aware content chunking
+from .uploads import PARSE_WORKERS, PARSE_TIMEOUT, MAX_UPLOAD_BYTES  # Upload parse pool limits
+from .quiz_cache import quiz_cache_stats, QUIZ_CACHE_TTL, QUIZ_CACHE_MAX_ENTRIES  # Generated-quiz cache
+from .quiz_parser import ParsedQuestion, parse_quiz, strip_number  # Quiz output parser
+from .jobs import (enqueue_generation_job, spool_uploads, dispatch_inprocess, job_status,
+                   run_worker, start_worker_pool)  # Background quiz generation queue
 import json as _json
 
 # --------------------------------
@@ -51,11 +70,62 @@ app.jinja_env.globals.update(zip=zip)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')  # Session and CSRF protection
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///quizpro.db')  # Connection string
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable event notifications to conserve resources
+# Max concurrent model calls when grading free-response answers on the results page
+app.config['GRADING_MAX_WORKERS'] = int(os.getenv('GRADING_MAX_WORKERS', GRADING_MAX_WORKERS))
+# Batch grading: answers per grading prompt (1 disables batching) and prompt token budget
+app.config['GRADING_BATCH_SIZE'] = int(os.getenv('GRADING_BATCH_SIZE', GRADING_BATCH_SIZE))
+app.config['GRADING_BATCH_TOKENS'] = int(os.getenv('GRADING_BATCH_TOKENS', GRADING_BATCH_TOKENS))
+# Chat page submits answers via AJAX (/answer_question) and shows each explanation when ready
+app.config['INSTANT_FEEDBACK'] = os.getenv('INSTANT_FEEDBACK', '0') == '1'
+# Quiz generation runs as queued jobs: 'inprocess' drains the queue on a thread pool in
+# this process; 'worker' leaves it to `flask --app backend.app worker` processes
+app.config['GENERATION_QUEUE'] = os.getenv('GENERATION_QUEUE', 'inprocess')
+# Uploaded files wait here until their generation job has parsed them
+app.config['JOB_UPLOAD_DIR'] = os.getenv('JOB_UPLOAD_DIR', _os.path.join(app.instance_path, 'job_uploads'))
+# Upload parsing: pool processes (0 parses in the job's own thread), seconds and bytes per file
+app.config['UPLOAD_PARSE_WORKERS'] = int(os.getenv('UPLOAD_PARSE_WORKERS', PARSE_WORKERS))
+app.config['UPLOAD_PARSE_TIMEOUT'] = float(os.getenv('UPLOAD_PARSE_TIMEOUT', PARSE_TIMEOUT))
+app.config['UPLOAD_MAX_BYTES'] = int(os.getenv('UPLOAD_MAX_BYTES', MAX_UPLOAD_BYTES))
+# Source text per generation prompt; larger uploads are split and generated chunk by chunk
+app.config['CHUNK_TOKENS'] = int(os.getenv('CHUNK_TOKENS', DEFAULT_CHUNK_TOKENS))
+# Concurrent model calls when one quiz is generated from several chunks
+app.config['GENERATION_MAX_WORKERS'] = int(os.getenv('GENERATION_MAX_WORKERS', GENERATION_MAX_WORKERS))
+# Stream quiz generation and open /chat once the first question is saved
+app.config['STREAM_GENERATION'] = os.getenv('STREAM_GENERATION', '1') == '1'
+
+# Long-lived GenAI clients: HTTP pool size per client and idle eviction (seconds)
+app.config['LLM_POOL_SIZE'] = int(os.getenv('LLM_POOL_SIZE', 10))
+app.config['LLM_CLIENT_IDLE_TIMEOUT'] = float(os.getenv('LLM_CLIENT_IDLE_TIMEOUT', 300))
+for _registry in (llm_client_registry, llm_http_registry):
+    _registry.configure(pool_size=app.config['LLM_POOL_SIZE'],
+                        idle_timeout=app.config['LLM_CLIENT_IDLE_TIMEOUT'])
+# LLM_PROVIDER=stub routes every model call to the offline stub (local load tests/benchmarks)
+app.config['LLM_PROVIDER'] = os.getenv('LLM_PROVIDER', '')
+app.config['STUB_LLM_LATENCY'] = float(os.getenv('STUB_LLM_LATENCY', 0))
+configure_llm(force_provider=app.config['LLM_PROVIDER'], stub_latency=app.config['STUB_LLM_LATENCY'])
+
+# Parsed upload text cache: in-process LRU in front of a size-bounded store under instance/
+app.config['PARSE_CACHE_DIR'] = os.getenv('PARSE_CACHE_DIR', _os.path.join(app.instance_path, 'parse_cache'))
+app.config['PARSE_CACHE_MAX_BYTES'] = int(os.getenv('PARSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+parse_cache = ParseCache(app.config['PARSE_CACHE_DIR'], max_bytes=app.config['PARSE_CACHE_MAX_BYTES'])
+
+# Generated-quiz cache: identical requests (content, type, count, model) reuse a quiz.
+# QUIZ_CACHE_TTL=0 disables it; QUIZ_CACHE_RESHUFFLE=1 reshuffles MC options per user
+app.config['QUIZ_CACHE_TTL'] = int(os.getenv('QUIZ_CACHE_TTL', QUIZ_CACHE_TTL))
+app.config['QUIZ_CACHE_MAX_ENTRIES'] = int(os.getenv('QUIZ_CACHE_MAX_ENTRIES', QUIZ_CACHE_MAX_ENTRIES))
+app.config['QUIZ_CACHE_RESHUFFLE'] = os.getenv('QUIZ_CACHE_RESHUFFLE', '1') == '1'
+# Spaced-repetition review: cards per /review session
+app.config['REVIEW_SIZE'] = int(os.getenv('REVIEW_SIZE', REVIEW_SIZE))
+# Seconds a user's cached topic mastery may be reused by generation workers
+# (answers in this process invalidate it at once); 0 recomputes every time
+app.config['MASTERY_CACHE_TTL'] = int(os.getenv('MASTERY_CACHE_TTL', MASTERY_CACHE_TTL))
+# Comma-separated emails allowed to see /admin/cache_stats
+app.config['ADMIN_EMAILS'] = {e.strip().lower() for e in os.getenv('ADMIN_EMAILS', '').split(',') if e.strip()}
 
 # Initialize extensions with the app context
 CORS(app)            # Allow frontend JS to call these endpoints
 db.init_app(app)     # Bind SQLAlchemy
-migrate.init_app(app, db)  # Bind Alembic migrations
+migrate.init_app(app, db, directory=_os.path.join(_root, 'migrations'))  # Bind Alembic migrations
 login_manager.init_app(app)  # Set up Flask-Login
 login_manager.login_view = 'login'  # Redirect unauthorized to login page
 
@@ -71,12 +141,63 @@ def utility_processor():
     return dict(gravatar_url=gravatar_url)
 
 # --------------------------------
-# Ensure database tables exist before handling any request (development/demo)
+# Database schema: one-time startup check (no schema work per request)
 # --------------------------------
-@app.before_request
-def initialize_database():
-    # Create all tables defined by SQLAlchemy models (idempotent)
-    db.create_all()
+# AUTO_INIT_DB=1 creates missing tables at startup (development/demo); in
+# production set AUTO_INIT_DB=0 and run `flask --app backend.app init-db`
+app.config['AUTO_INIT_DB'] = os.getenv('AUTO_INIT_DB', '1') == '1'
+with app.app_context():
+    app.config['SCHEMA_STATUS'] = check_schema(auto_init=app.config['AUTO_INIT_DB'])
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create tables and stamp a fresh database, or migrate an existing (or unversioned) one."""
+    init_schema()
+    app.config['SCHEMA_STATUS'] = check_schema()
+    print(f"[INFO] Database ready: {app.config['SCHEMA_STATUS']['ready']}")
+
+
+@app.cli.command('worker')
+@click.option('--processes', default=2, show_default=True, help='Worker processes to run.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds between polls of an empty queue.')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def worker_command(processes, poll_interval, burst):
+    """Process queued quiz generation jobs (use with GENERATION_QUEUE=worker)."""
+    print(f"[INFO] Starting {processes} generation worker(s)")
+    if processes <= 1:
+        run_worker(app, poll_interval=poll_interval, burst=burst, cache=parse_cache)
+    else:
+        start_worker_pool(processes, poll_interval=poll_interval, burst=burst)
+
+
+@app.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    """Recompute the daily analytics rollups from the stored answer history."""
+    days, topics = rebuild_rollups()
+    print(f"[INFO] Rebuilt {days} daily and {topics} daily-topic rollup rows")
+
+
+@app.route('/healthz')
+def healthz():
+    """Readiness probe: reports the schema status recorded at startup."""
+    status = app.config['SCHEMA_STATUS']
+    return jsonify(status), (200 if status['ready'] else 503)
+
+@app.route('/admin/cache_stats')
+@login_required
+def cache_stats():
+    """Hit rates of the generated-quiz cache and the parsed-upload cache (admins only)."""
+    if current_user.email.lower() not in app.config['ADMIN_EMAILS']:
+        abort(403)
+    return jsonify({'quiz_cache': quiz_cache_stats(), 'parse_cache': parse_cache.stats()})
+
+@app.route('/analytics')
+@login_required
+def analytics():
+    """Daily and per-topic accuracy, answer counts and time-to-answer (?days=, default 30)."""
+    days = request.args.get('days', ANALYTICS_DAYS, type=int)
+    return jsonify(get_analytics(current_user.id, days))
 
 # --------------------------------
 # Flask-Login User Loader
@@ -89,16 +210,20 @@ def load_user(user_id):
 # --------------------------------
 # Helper: Retrieve Stored API Key
 # --------------------------------
-def get_user_api_key(model_name="gemini"):
+def get_user_api_key(model_name=DEFAULT_MODEL):
     """
-    Fetch the current_user's API key for the specified LLM model.
-    Flashes an error and returns None if not found.
+    Resolve the current_user's API key for the specified LLM model (their saved
+    key, else the server's). Flashes an error and returns None if there is none.
     """
-    record = ApiKey.query.filter_by(user_id=current_user.id, model=model_name).first()
-    if not record:
+    key = resolve_api_key(app.config, current_user.id, model_name)
+    if not key:
         flash(f"No API key saved for '{model_name}'. Please add one under Setup.", "error")
-        return None
-    return record.key
+    return key
+
+
+def session_model(quiz):
+    """LLM backend for every model call made for a quiz session."""
+    return (quiz.model_name if quiz is not None else None) or DEFAULT_MODEL
 
 # --------------------------------
 # Authentication Routes
@@ -195,238 +320,90 @@ def setup():
     - GET  -> render setup template with existing API key
     - POST -> handle PPTX upload or pasted text, build prompt, generate questions via LLM
     """
-    # Build session history for sidebar
-    user_sessions = QuizSession.query.filter_by(user_id=current_user.id) \
-        .order_by(QuizSession.created_at.desc()).all()
-    sessions_stats = []
-    for idx, s in enumerate(user_sessions, start=1):
-        qs = QuizQuestion.query.filter_by(session_id=s.id).all()
-        total = len(qs)
-        correct = sum(1 for q in qs if q.user_answer == q.correct_answer)
-        # include title if set, else fallback to Session #{idx}
-        sessions_stats.append({
-            'id': s.id,
-            'title': s.title or f"Session {idx}",
-            'created_at': s.created_at,
-            'status': s.status,
-            'total': total,
-            'correct': correct
-        })
+    # Build session history for sidebar (first page only; older sessions live on /sessions)
+    sessions_page = get_session_stats(current_user.id)
+    sessions_stats = sessions_page['items']
+    for s in sessions_stats:
+        # include title if set, else fallback to Session #{position}
+        s['title'] = s['title'] or f"Session {s['position']}"
     # Default selectors for GET
     selected_model = 'gemini'
     question_type = 'multiple_choice'
     num_questions = 20
 
     if request.method == 'POST':
-        # Read selected LLM model
+        # Read selected LLM model (the worker resolves the server-side API key)
         selected_model = request.form.get('modelSelect', 'gemini')
-        # Get API key from server config
-        if selected_model == 'gemini':
-            api_key = app.config['GEMINI_API_KEY']
-        elif selected_model == 'openai':
-            api_key = app.config['OPENAI_API_KEY']
-        elif selected_model == 'deepseek':
-            api_key = app.config['DEEPSEEK_API_KEY']
-        else:
-            api_key = None
         # Quiz options
         question_type = request.form.get('questionType', 'multiple_choice')
         try:
             num_questions = int(request.form.get('numQuestions', 20))
         except (TypeError, ValueError):
             num_questions = 20
-        # Retrieve multiple file uploads and pasted text
-        content_files = request.files.getlist('contentFiles') or []
+        # Retrieve up to 5 uploaded files and pasted text; parsing happens in the job
+        content_files = [f for f in (request.files.getlist('contentFiles') or [])[:5] if f and f.filename]
         pasted_text = (request.form.get('pastedText') or '').strip()
-        content_parts = []
-        import re
-        # Process up to 5 uploaded files
-        for content_file in content_files[:5]:
-            if content_file and content_file.filename:
-                filename = content_file.filename.lower()
-                if filename.endswith('.pptx'):
-                    slides_data = pptx_to_json(content_file)
-                    filtered_slides = []
-                    for slide in slides_data.get('slides', [])[1:]:
-                        lines = [line for line in slide.get('text', []) if len(line.split()) > 3 or re.search(r"\b\d{4}\b", line)]
-                        if lines:
-                            filtered_slides.append(' '.join(lines))
-                    if filtered_slides:
-                        content_parts.append('\n\n'.join(filtered_slides))
-                elif filename.endswith('.pdf'):
-                    content_parts.append(pdf_to_text(content_file))
-                elif filename.endswith('.docx'):
-                    content_parts.append(docx_to_text(content_file))
-                elif filename.endswith('.xlsx'):
-                    content_parts.append(xlsx_to_text(content_file))
-                else:
-                    content_file.seek(0)
-                    content_parts.append(content_file.read().decode('utf-8', errors='ignore'))
-        # Include pasted text
-        if pasted_text:
-            content_parts.append(pasted_text)
         # Ensure there is some content
-        if not content_parts:
+        if not content_files and not pasted_text:
             flash("Please upload a file or paste some text.", "error")
             return render_template('setup.html', sessions=sessions_stats,
                                    selected_model=selected_model,
                                    question_type=question_type,
                                    num_questions=num_questions)
-        content_str = '\n\n'.join(content_parts)
-        # Prompt LLM: ask for a title, then the questions
-        # Build dynamic prompt based on question type and count
-        if question_type == 'multiple_choice':
-            prompt = (
-                "Give your quiz a concise, professional title on the first line starting with 'Title: '. "
-                f"Then list exactly {num_questions} multiple-choice questions from this content: {content_str}. "
-                "For each question, use this exact format with one '\n' line per item:\n"
-                "1. Question text\n"
-                "A) Option A\nB) Option B\nC) Option C\nD) Option D\n"
-                "Hint: Provide a brief, helpful hint for solving the question\n"
-                "Answer: X<|Q|>\n"
-                "Include <|Q|> after each question and no extra text."
-            )
-        else:
-            # Ask free-response questions with hints
-            prompt = (
-                "Give your quiz a concise, professional title on the first line prefixed with 'Title: '. "
-                f"Then list exactly {num_questions} free-response questions based solely on the following content: {content_str}. "
-                "For each question, use this exact format with line breaks as shown:\n"
-                "1. Question text\n"
-                "Hint: Provide a brief, helpful hint for solving the question\n"
-                "Answer: Complete answer text<|Q|>\n"
-                "Include '<|Q|>' after each question and no additional text before, between, or after."
-            )
-        # Generate questions and parse to structured dicts
-        questions = generate_questions(api_key, selected_model, prompt)
-        print("[DEBUG] raw quiz string:", questions)
-        # Attempt to extract a title line if AI provided one in the format "Title: ..."
-        title = None
-        lines = questions.splitlines()
-        if lines and lines[0].lower().startswith('title:'):
-            title = lines[0].split(':', 1)[1].strip()
-            # remove title from questions body
-            questions_body = '\n'.join(lines[1:])
-        else:
-            questions_body = questions
-        if not questions_body:
-            flash("Error generating questions. Please check the API configuration.", "error")
-            return render_template('setup.html', sessions=sessions_stats,
-                                   selected_model=selected_model,
-                                   question_type=question_type,
-                                   num_questions=num_questions)
-        raw_items = questions_body.split('<|Q|>')
-        parsed_qs = []
-        # Debug: show parsed question count
-        print(f"[DEBUG] parsed_qs length after parsing: {len(parsed_qs)}, expected: {num_questions}")
-        for item in raw_items:
-            lines = [l.strip() for l in item.splitlines() if l.strip()]
-            if not lines:
-                continue
-            question_text = re.sub(r'^\d+\.\s*', '', lines[0])
-            if question_type == 'multiple_choice':
-                options = {}
-                correct = None
-                hint = None
-                # Parse options, hint, and answer
-                for line in lines[1:]:
-                    # Option lines A)-D)
-                    m = re.match(r'^([A-D])[\)\.:]\s*(.*)', line)
-                    if m:
-                        options[m.group(1)] = m.group(2).strip()
-                        continue
-                    # Hint line
-                    m_hint = re.match(r'^Hint[:\s]*(.*)', line, re.IGNORECASE)
-                    if m_hint:
-                        hint = m_hint.group(1).strip()
-                        continue
-                    # Answer line
-                    m2 = re.search(r'Answer[:\s]*([A-D])', line, re.IGNORECASE)
-                    if m2:
-                        correct = m2.group(1)
-                if correct and len(options) == 4:
-                    parsed_qs.append({'prompt': question_text, 'options': options, 'answer': correct, 'hint': hint})
-                else:
-                    # fallback: no valid MC options
-                    parsed_qs.append({'prompt': question_text, 'options': {}, 'answer': '', 'hint': hint})
-            else:
-                answer = ''
-                hint = None
-                # Extract hint if provided
-                for line in lines[1:]:
-                    m_hint = re.match(r'^Hint[:\s]*(.*)', line, re.IGNORECASE)
-                    if m_hint:
-                        hint = m_hint.group(1).strip()
-                        continue
-                    m2 = re.match(r'^Answer[:\s]*(.*)', line, re.IGNORECASE)
-                    if m2:
-                        answer = m2.group(1).strip()
-                        break
-                parsed_qs.append({'prompt': question_text, 'options': {}, 'answer': answer, 'hint': hint})
-        # validate parsed question count
-        if len(parsed_qs) == 0:
-            flash("No valid questions parsed. Please try again.", "error")
-            return render_template('setup.html', sessions=sessions_stats,
-                                   selected_model=selected_model,
-                                   question_type=question_type,
-                                   num_questions=num_questions,
-                                   pastedText=pasted_text)
-        elif len(parsed_qs) != num_questions:
-            flash(f"Parsed {len(parsed_qs)} questions but requested {num_questions}. Proceeding with {len(parsed_qs)}.", "warning")
-        # Shuffle MC options so initial sessions have varied order
-        if question_type == 'multiple_choice':
-            import random
-            for qst in parsed_qs:
-                items = list(qst['options'].items())
-                random.shuffle(items)
-                opt_map = {}
-                ans_map = None
-                for i, (old_letter, text) in enumerate(items):
-                    letter = chr(ord('A') + i)
-                    opt_map[letter] = text
-                    if old_letter == qst['answer']:
-                        ans_map = letter
-                qst['options'] = opt_map
-                qst['answer'] = ans_map
-        # Reorder questions based on user performance (poor topics first)
-        poor_topics = get_poor_topics(current_user.id)
-        parsed_qs = order_questions(parsed_qs, poor_topics)
-        # Persist a new quiz session and its questions
-        new_session = QuizSession(
-            user_id=current_user.id,
-            session_type='quiz',
-            question_type=question_type,
-            num_questions=num_questions
+        # Queue the generation job; the setup page polls /jobs/<id> and opens the quiz
+        job = enqueue_generation_job(
+            current_user.id, selected_model, question_type, num_questions,
+            content=pasted_text,
+            uploads=spool_uploads(content_files, app.config['JOB_UPLOAD_DIR'])
         )
-        # Save extracted title if present
-        if title:
-            new_session.title = title
-        db.session.add(new_session)
-        db.session.commit()
-        # Save each question to the database
-        for idx, q in enumerate(parsed_qs):
-            qq = QuizQuestion(
-                session_id=new_session.id,
-                question_index=idx,
-                prompt=q['prompt'],
-                options=q['options'],
-                correct_answer=q['answer'],
-                hint=q.get('hint')
-            )
-            db.session.add(qq)
-        db.session.commit()
-        # Track this quiz in user session for navigation
-        session.pop('quiz_session_id', None)
-        session.pop('current_question_index', None)
-        session['quiz_session_id'] = new_session.id
-        session['current_question_index'] = 0
-        return redirect(url_for('chat'))
-
-    # GET: render setup with default selectors
+        if app.config['GENERATION_QUEUE'] == 'inprocess':
+            dispatch_inprocess(app, cache=parse_cache)
+        return redirect(url_for('setup', job=job.id))
+
+    # GET: render setup with default selectors (and the progress of a queued job)
     return render_template('setup.html', sessions=sessions_stats,
+                           sessions_has_more=sessions_page['has_next'],
                            selected_model=selected_model,
                            question_type=question_type,
-                           num_questions=num_questions)
+                           num_questions=num_questions,
+                           job_id=request.args.get('job', type=int),
+                           review_due=due_count(current_user.id, limit=app.config['REVIEW_SIZE']))
+
+
+# --------------------------------
+# Generation Job Routes: status polling and opening the generated quiz
+# --------------------------------
+def _get_user_job(job_id):
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        abort(404)
+    return job
+
+
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def job_status_view(job_id):
+    """Polled by the setup page: job state and whether the quiz can be opened."""
+    status = job_status(_get_user_job(job_id))
+    status['open_url'] = url_for('open_job', job_id=job_id) if status['ready'] else None
+    return jsonify(status)
+
+
+@app.route('/jobs/<int:job_id>/open', methods=['GET'])
+@login_required
+def open_job(job_id):
+    """Make the job's quiz the active session and start it."""
+    job = _get_user_job(job_id)
+    if not job_status(job)['ready']:
+        if job.status == 'failed':
+            flash(job.error or "Error generating questions. Please try again.", "error")
+            return redirect(url_for('setup'))
+        return redirect(url_for('setup', job=job.id))
+    session.pop('quiz_session_id', None)
+    session.pop('current_question_index', None)
+    session['quiz_session_id'] = job.session_id
+    session['current_question_index'] = 0
+    return redirect(url_for('chat'))
 
 
 # --------------------------------
@@ -441,42 +418,63 @@ def chat():
     """
     # Fetch current quiz session
     session_id = session.get('quiz_session_id')
-    # Load session object to get title
-    session_obj = QuizSession.query.get(session_id)
-    quiz_title = session_obj.title or f"Quiz Session {session_obj.id}"
     if not session_id:
         flash('No active quiz. Please start a quiz.', 'info')
         return redirect(url_for('setup'))
-    # Load questions from DB
-    qs = QuizQuestion.query.filter_by(session_id=session_id).order_by(QuizQuestion.question_index).all()
-    if not qs:
-        flash('No questions found for this quiz.', 'info')
+    # Load session object to get title
+    session_obj = QuizSession.query.get(session_id)
+    if not session_obj:
+        flash('No active quiz. Please start a quiz.', 'info')
         return redirect(url_for('setup'))
+    quiz_title = session_obj.title or f"Quiz Session {session_obj.id}"
+    # Questions may still be streaming in from the model
+    generating = session_obj.status == 'generating'
+    # Total comes from the session row (kept equal to the saved question count)
+    total_questions = session_obj.num_questions
     idx = session.get('current_question_index', 0)
-    # Ensure idx is within bounds
-    if idx >= len(qs):
+    # Load only the current question via the (session_id, question_index) index
+    q = QuizQuestion.query.filter_by(session_id=session_id, question_index=idx).first()
+    if q is None:
+        if generating and request.method == 'GET':
+            # Next question not generated yet: show a waiting page that refreshes itself
+            return render_template('chat.html', question=None, index=idx+1,
+                                   total=total_questions, title=quiz_title, waiting=True)
+        if idx == 0 and not generating:
+            flash('No questions found for this quiz.', 'info')
+            return redirect(url_for('setup'))
+        # Past the last question
         return redirect(url_for('results'))
 
     if request.method == 'POST':
         # Record user answer in DB
         answer = request.form.get('answer', '').strip()
-        q = qs[idx]
+        # a re-answer replaces the earlier answer in the counters
+        retract_answer(current_user.id, q)
         q.user_answer = answer
+        q.eval_status = None  # a new answer invalidates any stored verdict
         from datetime import datetime
         q.answered_at = datetime.utcnow()
+        # MC answers are graded now; free-response once the verdict is stored
+        q.is_correct = (answer == q.correct_answer) if q.options else None
+        # MC answers count towards topic performance and reschedule the question's
+        # review card now; free-response once graded
+        if q.options:
+            record_performance(current_user.id, q)
+        record_review(current_user.id, q)
+        record_answer(current_user.id, q)
         db.session.commit()
+        invalidate_mastery(current_user.id)
         idx += 1
         session['current_question_index'] = idx
 
-        if idx < len(qs):
+        if idx < total_questions or generating:
             return redirect(url_for('chat'))
         return redirect(url_for('results'))
 
     # Render next question
-    current = qs[idx]
-    total_questions = len(qs)
-    return render_template('chat.html', question=current, index=idx+1,
-                           total=total_questions, title=quiz_title)
+    return render_template('chat.html', question=q, index=idx+1,
+                           total=total_questions, title=quiz_title,
+                           instant_feedback=app.config['INSTANT_FEEDBACK'])
 
 
 # --------------------------------
@@ -503,18 +501,17 @@ def results():
     wrong_count = sum(1 for q in qs if q.user_answer != q.correct_answer)
     percent_wrong = int((wrong_count / total_answered) * 100) if total_answered else 0
     incorrect = wrong_count > 0
-    # Evaluate free-response answers via AI
-    # Fetch user's API key
-    gemini_record = ApiKey.query.filter_by(user_id=current_user.id, model='gemini').first()
-    api_key = gemini_record.key if gemini_record else None
-    evaluations = []
-    for q in qs:
-        if not q.options:
-            # free-response: evaluate
-            ev = evaluate_answer(api_key, 'gemini', q.prompt, q.user_answer or '', q.correct_answer)
-        else:
-            ev = None
-        evaluations.append(ev)
+    # Evaluate free-response answers via AI in batched prompts; verdicts are stored on
+    # each question, so only ungraded answers reach the model and refreshes are served from the DB
+    model_name = session_model(session_obj)
+    api_key = None
+    if any(not q.options and not q.eval_status for q in qs):
+        # Key for the backend the quiz was generated with
+        api_key = resolve_api_key(app.config, current_user.id, model_name)
+    evaluations = grade_free_response(qs, api_key, model_name,
+                                      max_workers=app.config['GRADING_MAX_WORKERS'],
+                                      batch_size=app.config['GRADING_BATCH_SIZE'],
+                                      batch_tokens=app.config['GRADING_BATCH_TOKENS'])
     return render_template('results.html',
                            title=title,
                            questions=qs,
@@ -547,25 +544,16 @@ def retry_incorrect():
         return redirect(url_for('results'))
     # Create new quiz session preserving type and count based on wrong questions
     orig = QuizSession.query.get(session_id)
-    new_session = QuizSession(
-        user_id=current_user.id,
+    # Persist only wrong questions to new session (copies: no near-duplicate check)
+    new_session = create_quiz_session(
+        current_user.id,
+        [ParsedQuestion(q.prompt, q.options, q.correct_answer, q.hint, q.topic, q.repeat_of_id or q.id)
+         for q in wrong_qs],
+        dedup=False,
         session_type='quiz',
         question_type=orig.question_type,
-        num_questions=len(wrong_qs)
+        model_name=orig.model_name
     )
-    db.session.add(new_session)
-    db.session.commit()
-    # Persist only wrong questions to new session
-    for idx, q in enumerate(wrong_qs):
-        new_q = QuizQuestion(
-            session_id=new_session.id,
-            question_index=idx,
-            prompt=q.prompt,
-            options=q.options,
-            correct_answer=q.correct_answer
-        )
-        db.session.add(new_q)
-    db.session.commit()
     # Reset session tracking
     session.pop('quiz_session_id', None)
     session.pop('current_question_index', None)
@@ -589,17 +577,8 @@ def retry_same():
     orig = QuizSession.query.get(session_id)
     # Load all questions from original session
     all_qs = QuizQuestion.query.filter_by(session_id=session_id).order_by(QuizQuestion.question_index).all()
-    # Create new session copying type/count/title
-    new_session = QuizSession(
-        user_id=current_user.id,
-        session_type=orig.session_type,
-        question_type=orig.question_type,
-        num_questions=orig.num_questions,
-        title=orig.title
-    )
-    db.session.add(new_session)
-    db.session.commit()
     # Clone and (if MC) shuffle options
+    cloned = []
     for q in all_qs:
         if q.options:
             items = list(q.options.items())
@@ -616,15 +595,39 @@ def retry_same():
         else:
             new_opts = {}
             new_correct = q.correct_answer
-        new_q = QuizQuestion(
-            session_id=new_session.id,
-            question_index=q.question_index,
-            prompt=q.prompt,
-            options=new_opts,
-            correct_answer=new_correct
-        )
-        db.session.add(new_q)
-    db.session.commit()
+        cloned.append(ParsedQuestion(q.prompt, new_opts, new_correct, q.hint, q.topic, q.repeat_of_id or q.id))
+    # Create new session copying type/count/title (copies: no near-duplicate check)
+    new_session = create_quiz_session(
+        current_user.id, cloned, dedup=False,
+        session_type=orig.session_type,
+        question_type=orig.question_type,
+        title=orig.title,
+        model_name=orig.model_name
+    )
+    session['quiz_session_id'] = new_session.id
+    session['current_question_index'] = 0
+    return redirect(url_for('chat'))
+
+
+# --------------------------------
+# Review Route: a session of the user's due spaced-repetition cards
+# --------------------------------
+@app.route('/review', methods=['POST'])
+@login_required
+def review():
+    """
+    Create a quiz session from the most overdue review cards (see review.py).
+    """
+    questions = review_questions(current_user.id, limit=app.config['REVIEW_SIZE'])
+    if not questions:
+        flash('No questions are due for review.', 'info')
+        return redirect(url_for('setup'))
+    new_session = create_quiz_session(
+        current_user.id, questions, dedup=False,
+        session_type='quiz',
+        question_type='multiple_choice' if any(q.options for q in questions) else 'free_response',
+        title='Review'
+    )
     session['quiz_session_id'] = new_session.id
     session['current_question_index'] = 0
     return redirect(url_for('chat'))
@@ -638,93 +641,16 @@ def retry_same():
 def upload_pptx():
     """
     Accept a PowerPoint file upload, parse it into JSON slide data,
-    and return the slide texts in a JSON response.
+    and return the slide texts in a JSON response (?notes=1 adds speaker notes).
     """
     file = request.files.get('file')
     if not file:
         return jsonify({'error': 'No file provided'}), 400
-    data   = pptx_to_json(file)
+    data   = pptx_to_json(file, include_notes=request.args.get('notes') == '1')
     slides = data.get('slides', [])
     return jsonify({'slides': slides}), 200
 
 
-# --------------------------------
-# Helper: generate_questions via AI model
-# --------------------------------
-def generate_questions(api_key, model_name, prompt):
-    """
-    Use Google GenAI client to send the prompt text and return its generated response.
-    """
-    if not api_key:
-        return ""
-    # Initialize the GenAI client with API key
-    client = genai.Client(api_key=api_key)
-    # Call the GenAI model, handling overloads or API errors gracefully
-    try:
-        response = client.models.generate_content(
-            model=f"{model_name}-2.0-flash",
-            contents=[{"text": prompt}],
-            config={"temperature": 0.2, "max_output_tokens": 2048}
-        )
-    except Exception as e:
-        # Handle API errors (e.g., model overload) and other exceptions
-        print(f"[ERROR] GenAI API call failed: {e}")
-        return ""
-    # Extract the generated text from the first candidate's content parts
-    text = ""
-    if response and getattr(response, 'candidates', None):
-        content = response.candidates[0].content
-        # Combine all text parts into a single string
-        text = "".join(part.text or "" for part in (content.parts or []))
-    return text
-
-
-# --------------------------------
-# Helper: evaluate free-response answers via AI model
-# --------------------------------
-def evaluate_answer(api_key, model_name, question_text, user_ans, correct_ans):
-    """
-    Use AI to judge a free-response answer against the correct answer.
-    Returns a dict with 'status' (Correct/Partially Correct/Incorrect) and 'explanation'.
-    """
-    if not api_key:
-        return {'status': 'Error', 'explanation': 'No API key.'}
-    client = genai.Client(api_key=api_key)
-    # Build evaluation prompt
-    eval_prompt = (
-        f"Here is a quiz question: \"{question_text}\". "
-        f"The correct answer is: \"{correct_ans}\". "
-        f"The student's answer is: \"{user_ans}\". "
-        "Assess if the student's answer demonstrates understanding of the topic. "
-        "Respond in the exact format:\nStatus: <Correct|Partially Correct|Incorrect>\nExplanation: <brief reasoning>."
-    )
-    try:
-        response = client.models.generate_content(
-            model=f"{model_name}-2.0-flash",
-            contents=[{"text": eval_prompt}],
-            config={"temperature": 0.0, "max_output_tokens": 256}
-        )
-    except Exception as e:
-        print(f"[ERROR] Evaluation API call failed: {e}")
-        return {'status': 'Error', 'explanation': 'Evaluation call failed.'}
-    # Extract text
-    raw = ""
-    if response and getattr(response, 'candidates', None):
-        parts = response.candidates[0].content.parts or []
-        raw = "".join(part.text or "" for part in parts)
-    # Parse Status and Explanation
-    status = ''
-    explanation = ''
-    for line in raw.splitlines():
-        if line.lower().startswith('status:'):
-            status = line.split(':',1)[1].strip()
-        elif line.lower().startswith('explanation:'):
-            explanation = line.split(':',1)[1].strip()
-    if not status:
-        status = 'Error'
-    return {'status': status, 'explanation': explanation}
-
-
 # --------------------------------
 # Adaptive Follow-up Route: generate new questions on incorrect topics
 # --------------------------------
@@ -734,13 +660,15 @@ def adaptive_followup():
     """
     Generate new follow-up quiz on topics user got wrong, using AI and DB.
     """
-    api_key = get_user_api_key()
-    if not api_key:
-        return redirect(url_for('setup'))
     session_id = session.get('quiz_session_id')
     if not session_id:
         flash('No active quiz session. Please start a quiz.', 'info')
         return redirect(url_for('setup'))
+    orig_session = QuizSession.query.get(session_id)
+    model_name = session_model(orig_session)
+    api_key = get_user_api_key(model_name)
+    if not api_key:
+        return redirect(url_for('setup'))
     # Load incorrect questions from DB
     wrong_qs = QuizQuestion.query.filter_by(session_id=session_id)\
                .filter(QuizQuestion.user_answer != QuizQuestion.correct_answer).all()
@@ -748,63 +676,33 @@ def adaptive_followup():
         flash('No incorrect questions to generate follow-ups.', 'info')
         return redirect(url_for('results'))
     # Retrieve original quiz count for adaptive follow-up length
-    orig_session = QuizSession.query.get(session_id)
     orig_count = orig_session.num_questions if orig_session else len(wrong_qs)
     # Build AI prompt list
-    import re
-    payload_prompts = "\n".join([f"{i+1}. {re.sub(r'^\d+\.\s*', '', q.prompt)}" for i, q in enumerate(wrong_qs)])
+    payload_prompts = "\n".join([f"{i+1}. {strip_number(q.prompt)}" for i, q in enumerate(wrong_qs)])
     prompt_text = (
         f"Here are the questions you answered incorrectly:\n{payload_prompts}\n"
         f"Please generate {orig_count} new multiple-choice questions on these same topics, phrased differently. "
-        "Provide four options labeled A, B, C, D, then 'Answer: X' for the correct option. "
+        "Provide four options labeled A, B, C, D, then 'Topic: ' with the concept tested in 1-4 words, "
+        "then 'Answer: X' for the correct option. "
         "Separate each question with <|Q|> and start immediately without any extra text."
     )
-    raw = generate_questions(api_key, 'gemini', prompt_text)
+    raw = generate_questions(api_key, model_name, prompt_text)
     if not raw:
         flash('Error generating follow-up questions. Please try again.', 'error')
         return redirect(url_for('results'))
-    # Parse AI output
-    items = raw.split('<|Q|>')
-    followups = []
-    for item in items:
-        lines = [l.strip() for l in item.splitlines() if l.strip()]
-        if not lines:
-            continue
-        question_text = re.sub(r'^\d+\.\s*', '', lines[0])
-        options = {}
-        correct = None
-        for line in lines[1:]:
-            m = re.match(r'^([A-D])[\)\.\:]\s*(.*)', line)
-            if m:
-                options[m.group(1)] = m.group(2).strip()
-                continue
-            m2 = re.search(r'Answer[:\s]*([A-D])', line, re.IGNORECASE)
-            if m2:
-                correct = m2.group(1)
-        if correct and len(options) == 4:
-            followups.append({'prompt': question_text, 'options': options, 'answer': correct})
+    # Parse AI output, keeping only complete MC questions
+    _, parsed = parse_quiz(raw, 'multiple_choice', with_title=False)
+    followups = tag_questions([q for q in parsed if q.options], payload_prompts)
     if not followups:
         flash('No follow-up questions generated. Please try again.', 'error')
         return redirect(url_for('results'))
     # Create new quiz session for follow-ups
-    new_session = QuizSession(
-        user_id=current_user.id,
+    new_session = create_quiz_session(
+        current_user.id, followups,
         session_type='quiz',
         question_type='multiple_choice',
-        num_questions=len(followups)
+        model_name=model_name
     )
-    db.session.add(new_session)
-    db.session.commit()
-    for idx, f in enumerate(followups):
-        qq = QuizQuestion(
-            session_id=new_session.id,
-            question_index=idx,
-            prompt=f['prompt'],
-            options=f['options'],
-            correct_answer=f['answer']
-        )
-        db.session.add(qq)
-    db.session.commit()
     session.pop('quiz_session_id', None)
     session.pop('current_question_index', None)
     session['quiz_session_id'] = new_session.id
@@ -818,15 +716,20 @@ def adaptive_followup():
 @app.route('/sessions/<int:session_id>/delete', methods=['POST'])
 @login_required
 def delete_session(session_id):
-    """Delete a quiz session and its associated questions and messages."""
+    """Delete a quiz session and its associated questions and messages (unlinking its generation job)."""
     s = QuizSession.query.get_or_404(session_id)
     if s.user_id != current_user.id:
         abort(403)
     # delete related records
+    forget_session(session_id)
+    forget_session_cards(session_id)
     QuizQuestion.query.filter_by(session_id=session_id).delete()
     ChatMessage.query.filter_by(session_id=session_id).delete()
+    # the generation job that built the session stays as history, unlinked
+    GenerationJob.query.filter_by(session_id=session_id).update({'session_id': None})
     db.session.delete(s)
     db.session.commit()
+    invalidate_mastery(current_user.id)
     flash('Quiz session deleted.', 'success')
     return redirect(url_for('setup'))
 
@@ -856,23 +759,13 @@ def rename_session(session_id):
 @app.route('/sessions')
 @login_required
 def sessions_list():
-    """Show all quiz/chat sessions for the current user."""
-    user_sessions = QuizSession.query.filter_by(user_id=current_user.id) \
-        .order_by(QuizSession.created_at.desc()).all()
-    stats = []
-    for s in user_sessions:
-        qs = QuizQuestion.query.filter_by(session_id=s.id).all()
-        total = len(qs)
-        correct = sum(1 for q in qs if q.user_answer == q.correct_answer)
-        stats.append({
-            'id': s.id,
-            'title': s.title or f"Session {s.id}",
-            'created_at': s.created_at,
-            'status': s.status,
-            'total': total,
-            'correct': correct
-        })
-    return render_template('sessions.html', sessions=stats)
+    """Show the current user's quiz/chat sessions, one page at a time (?page=N)."""
+    page = request.args.get('page', 1, type=int)
+    stats_page = get_session_stats(current_user.id, page=page)
+    stats = stats_page['items']
+    for s in stats:
+        s['title'] = s['title'] or f"Session {s['id']}"
+    return render_template('sessions.html', sessions=stats, pagination=stats_page)
 
 @app.route('/sessions/<int:session_id>/resume')
 @login_required
@@ -903,35 +796,73 @@ if __name__ == '__main__':
     # Start Flask in debug mode
     app.run(debug=True)
 
+def _get_user_question(question_id):
+    """One of the current user's questions, or None (missing, or in another user's session)."""
+    return (QuizQuestion.query.join(QuizSession, QuizSession.id == QuizQuestion.session_id)
+            .filter(QuizQuestion.id == question_id, QuizSession.user_id == current_user.id).first())
+
+
 @app.route('/answer_question', methods=['POST'])
 @login_required
 def answer_question():
-    """Handle AJAX answer submission, record correctness, return explanation."""
+    """
+    Handle AJAX answer submission: commit the answer and return at once.
+    MC correctness is known locally; the explanation (and the free-response
+    verdict) is produced by a background worker and fetched via /answer_status.
+    """
     data = request.get_json() or {}
     qid = data.get('question_id')
     ans = data.get('answer', '').strip()
-    q = QuizQuestion.query.get(qid)
+    q = _get_user_question(qid)
     if not q:
         return jsonify(error="Question not found"), 404
+    # a re-answer replaces the earlier answer in the counters
+    retract_answer(current_user.id, q)
     q.user_answer = ans
     from datetime import datetime
     q.answered_at = datetime.utcnow()
-    q.is_correct = (ans == q.correct_answer)
-    api_key = get_user_api_key()
-    eval_res = evaluate_answer(api_key, 'gemini', q.prompt, ans, q.correct_answer)
-    # store only the explanation text, not the full dict
-    explanation_text = eval_res.get('explanation') if isinstance(eval_res, dict) else str(eval_res)
-    q.explanation = explanation_text
+    # free-response correctness is set by the background verdict
+    q.is_correct = (ans == q.correct_answer) if q.options else None
+    # cleared until the background worker stores the new verdict
+    q.explanation = None
+    q.eval_status = None
+    if q.options:
+        record_performance(current_user.id, q)
+    record_review(current_user.id, q)
+    record_answer(current_user.id, q)
     db.session.commit()
-    record_performance(current_user.id, q)
+    invalidate_mastery(current_user.id)
+    model_name = session_model(q.session)
+    api_key = get_user_api_key(model_name)
+    explain_answer_async(app, q.id, current_user.id, api_key, model_name)
     # advance to the next question index in session
     current_idx = session.get('current_question_index', 0)
     session['current_question_index'] = current_idx + 1
-    # include status if available
-    response_payload = {'explanation': explanation_text, 'is_correct': q.is_correct}
-    if isinstance(eval_res, dict) and 'status' in eval_res:
-        response_payload['status'] = eval_res['status']
-    return jsonify(response_payload)
+    return jsonify({
+        'question_id': q.id,
+        'explanation': None,
+        'status': 'pending',
+        # free-response correctness comes with the model's verdict
+        'is_correct': q.is_correct,
+        'poll_url': url_for('answer_status', question_id=q.id),
+    })
+
+
+@app.route('/answer_status/<int:question_id>', methods=['GET'])
+@login_required
+def answer_status(question_id):
+    """Polling endpoint: the stored explanation/verdict for one of the user's answered questions."""
+    q = _get_user_question(question_id)
+    if not q:
+        return jsonify(error="Question not found"), 404
+    ready = q.explanation is not None
+    return jsonify({
+        'question_id': q.id,
+        'ready': ready,
+        'explanation': q.explanation,
+        'status': (q.eval_status or 'Error') if ready else 'pending',
+        'is_correct': q.is_correct if (q.options or q.eval_status) else None,
+    })
 
 @app.route('/get_hint', methods=['POST'])
 @login_required
@@ -939,25 +870,15 @@ def get_hint():
     """Return a stored hint or generate a new one via LLM and cache it."""
     data = request.get_json() or {}
     qid = data.get('question_id')
-    q = QuizQuestion.query.get(qid)
+    q = _get_user_question(qid)
     if not q:
         return jsonify(error="Question not found"), 404
     if q.hint:
         return jsonify(hint=q.hint), 200
-    # Generate hint on demand using AI
-    api_key = get_user_api_key()
-    hint_prompt = f"Provide a concise hint to help answer the following question: '{q.prompt}'"
-    client = genai.Client(api_key=api_key)
-    try:
-        resp = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[{"text": hint_prompt}],
-            config={"temperature": 0.2, "max_output_tokens": 128}
-        )
-        parts = resp.candidates[0].content.parts or [] if resp and resp.candidates else []
-        hint_text = "".join(part.text or "" for part in parts).strip()
-    except Exception:
-        hint_text = "Hint unavailable."
+    # Generate hint on demand with the quiz's backend
+    model_name = session_model(q.session)
+    api_key = get_user_api_key(model_name)
+    hint_text = generate_hint(api_key, model_name, q.prompt)
     # Cache and return
     q.hint = hint_text
     db.session.commit()
@@ -0,0 +1,118 @@
+# backend/chunking.py
+# Token-aware splitting of source material for quiz generation.
+# The upload parsers join slides/pages/paragraphs with blank lines, so content
+# is split on those boundaries first, then on lines and sentences, and only as
+# a last resort mid-text. Chunks are packed greedily up to a token budget so a
+# large document becomes several prompts instead of one oversized prompt.
+
+import re
+
+# Default prompt budget for the source text of one generation call
+DEFAULT_CHUNK_TOKENS = 6000
+# Questions requested per model call (about what fits in 2048 output tokens)
+QUESTIONS_PER_CALL = 15
+# Source text worth reading per requested question; upload parsing stops past it
+SOURCE_TOKENS_PER_QUESTION = 1500
+# Smallest slice of source text worth a generation call of its own
+MIN_CALL_TOKENS = 500
+
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_LINE_RE = re.compile(r'\n')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def source_char_budget(num_questions):
+    """Characters of each upload to parse for a quiz of num_questions."""
+    return max(DEFAULT_CHUNK_TOKENS, num_questions * SOURCE_TOKENS_PER_QUESTION) * 4
+
+
+def _pieces(text, max_tokens):
+    """Split text into boundary-aligned pieces that each fit max_tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    for splitter in (_PARAGRAPH_RE, _LINE_RE, _SENTENCE_RE):
+        parts = [p.strip() for p in splitter.split(text) if p.strip()]
+        if len(parts) > 1:
+            pieces = []
+            for part in parts:
+                pieces.extend(_pieces(part, max_tokens))
+            return pieces
+    # One unbroken run of text: cut it at the character budget
+    size = max_tokens * 4
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+# ------------------------------------------------------------------------------
+# Function: split_content
+# Purpose: Split source material into chunks of at most max_tokens.
+# Inputs:
+#   - text: joined upload/pasted content
+#   - max_tokens: token budget per chunk (estimate_tokens)
+# Process:
+#   - Break on paragraph (slide/page) boundaries, then lines, then sentences
+#   - Greedily pack consecutive pieces into chunks, keeping document order
+# Outputs:
+#   - List of chunk strings (empty list for blank input)
+# ------------------------------------------------------------------------------
+def split_content(text, max_tokens=DEFAULT_CHUNK_TOKENS):
+    text = (text or '').strip()
+    if not text:
+        return []
+    chunks = []
+    current, used = [], 0
+    for piece in _pieces(text, max_tokens):
+        cost = estimate_tokens(piece)
+        if current and used + cost > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current, used = [], 0
+        current.append(piece)
+        used += cost
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+# ------------------------------------------------------------------------------
+# Function: plan_generation_calls
+# Purpose: Spread a question count over chunks in proportion to their size.
+# Inputs:
+#   - chunks: output of split_content
+#   - num_questions: questions wanted in total
+#   - per_call: upper bound of questions requested from one model call
+#   - min_tokens: smallest chunk slice given a call of its own
+# Process:
+#   - Largest-remainder allocation by chunk token count (chunks may get 0 when
+#     there are more chunks than questions)
+#   - An allocation above per_call is spread over distinct slices of its chunk
+#     (split_content with a smaller budget), never over repeated calls on the
+#     same text: parallel calls on one text return overlapping questions
+#   - A chunk too small to slice (min_tokens) gets one call for its whole share
+# Outputs:
+#   - List of (chunk, count) calls in document order, each chunk text once
+# ------------------------------------------------------------------------------
+def plan_generation_calls(chunks, num_questions, per_call=QUESTIONS_PER_CALL, min_tokens=MIN_CALL_TOKENS):
+    if not chunks or num_questions <= 0:
+        return []
+    weights = [estimate_tokens(c) for c in chunks]
+    total = sum(weights)
+    shares = [num_questions * w / total for w in weights]
+    counts = [int(s) for s in shares]
+    by_remainder = sorted(range(len(chunks)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:num_questions - sum(counts)]:
+        counts[i] += 1
+    calls = []
+    for chunk, count in zip(chunks, counts):
+        if count <= 0:
+            continue
+        budget = -(-estimate_tokens(chunk) * per_call // count)
+        parts = split_content(chunk, budget) if count > per_call and budget >= min_tokens else [chunk]
+        if len(parts) > 1:
+            calls.extend(plan_generation_calls(parts, count, per_call, min_tokens))
+        else:
+            calls.append((chunk, count))
+    return calls
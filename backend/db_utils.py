@@ -0,0 +1,30 @@
+# backend/db_utils.py
+# Dialect-aware write helpers shared by the counter tables (TopicPerformance,
+# DailyStats, DailyTopicStats).
+# Counters are bumped with one atomic upsert, so concurrent answers never lose
+# an increment: ON CONFLICT DO UPDATE on PostgreSQL / SQLite, ON DUPLICATE KEY
+# UPDATE on MySQL / MariaDB.
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from .extensions import db
+
+
+def upsert_insert(dialect_name, model):
+    """Dialect-specific INSERT construct that supports an upsert clause."""
+    if dialect_name == 'postgresql':
+        return postgresql.insert(model)
+    if dialect_name in ('mysql', 'mariadb'):
+        return mysql.insert(model)
+    return sqlite.insert(model)
+
+
+def increment_row(model, keys, counts):
+    """Upsert one counter row: insert keys + counts, or add counts to the stored row (no commit)."""
+    dialect = db.session.get_bind().dialect.name
+    stmt = upsert_insert(dialect, model).values(**keys, **counts)
+    increments = {name: getattr(model, name) + value for name, value in counts.items()}
+    if dialect in ('mysql', 'mariadb'):
+        stmt = stmt.on_duplicate_key_update(**increments)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=increments)
+    db.session.execute(stmt)
@@ -0,0 +1,225 @@
+# backend/dedup.py
+# Near-duplicate question detection with MinHash / LSH.
+# Regenerations, adaptive follow-ups and chunked generation often produce the
+# same question in different words. A prompt is reduced to its set of content
+# words (shingles); the LSH band keys of its MinHash signature are indexed per
+# user in question_lsh_buckets. A new question is only compared with the
+# questions sharing at least one band key (an indexed lookup), so a check does
+# not grow with the user's whole question history; candidates are then
+# verified on their exact word sets.
+# - Near-duplicates within the same quiz session are dropped
+# - Near-duplicates of questions the user already answered are kept but
+#   flagged with QuizQuestion.repeat_of_id
+
+import re
+import random
+import hashlib
+import zlib
+from itertools import chain
+import numpy as np
+from sqlalchemy import select, update, delete, and_, or_
+from .extensions import db
+from .models import QuizQuestion, QuestionBucket
+
+# 48 hash functions in 16 bands of 3 rows: pairs at the 0.65 threshold share a
+# band with probability > 0.99, pairs at 0.3 about a third of the time
+NUM_PERM = 48
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Jaccard similarity of the prompts' content words at which two questions
+# count as the same question
+DUPLICATE_SIMILARITY = 0.65
+# Batch pairs whose signatures agree on fewer than DUPLICATE_SIMILARITY -
+# ESTIMATE_SLACK of their hashes (an estimate of their Jaccard similarity, std
+# <= 0.073 with 48 hashes) are not verified on their word sets
+ESTIMATE_SLACK = 0.25
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+# Fixed coefficients: band keys are stored, so they must not change between runs
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_A = np.array([a for a, _ in _PERMS], dtype=np.uint64)[:, None]
+_B = np.array([b for _, b in _PERMS], dtype=np.uint64)[:, None]
+_P = np.uint64(_PRIME)
+_LOW32 = np.uint64(0xFFFFFFFF)
+# Bytes hashed into a band key: little-endian band number and the band's rows
+_BAND_RECORD = np.dtype([('band', '<u2'), ('rows', '<u8', (ROWS,))])
+
+_NUMBER_RE = re.compile(r'^\s*\d+\s*[.)]\s*')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+STOPWORDS = frozenset("""
+a an the of in on at to for by with from into about as and or but not no is are was were be been being
+do does did which what who whom whose when where why how this that these those it its their there
+following best most correct true statement describe explain
+""".split())
+
+
+def _stem(word):
+    """Crude plural folding so 'cells' and 'cell' match."""
+    if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def content_words(text):
+    """Lowercased words of a prompt (or label) without question number, punctuation or stopwords."""
+    text = _NUMBER_RE.sub('', text or '').lower()
+    return [_stem(w) for w in _NON_ALNUM_RE.sub(' ', text).split() if w not in STOPWORDS]
+
+
+def shingles(prompt):
+    """Set of hashed (crc32, stable across runs) content words of the prompt."""
+    words = content_words(prompt) or ['']
+    return {zlib.crc32(w.encode('utf-8')) for w in words}
+
+
+def _mod_prime(x):
+    """x mod 2**61 - 1 for uint64 x (2**61 = 1 mod p, so fold the high bits back in)."""
+    x = (x & _P) + (x >> np.uint64(61))
+    return np.where(x >= _P, x - _P, x)
+
+
+def _permuted(h):
+    """(a * h + b) mod _PRIME for every permutation (rows) and shingle h < 2**32 (columns),
+    exact in uint64: a is split into 32-bit halves so no product overflows."""
+    lo = _mod_prime((_A & _LOW32) * h)
+    hi = (_A >> np.uint64(32)) * h
+    hi = _mod_prime(((hi << np.uint64(32)) & _P) + (hi >> np.uint64(29)))
+    return _mod_prime(lo + hi + _B)
+
+
+def signatures(word_sets):
+    """MinHash signatures of several shingle sets at once: array of shape (len(word_sets), NUM_PERM)."""
+    sizes = [len(w) for w in word_sets]
+    hashes = np.fromiter((h for w in word_sets for h in w), dtype=np.uint64, count=sum(sizes))
+    starts = np.cumsum([0] + sizes[:-1])
+    return np.minimum.reduceat(_permuted(hashes[None, :]), starts, axis=1).T
+
+
+def minhash(words):
+    """MinHash signature (tuple of NUM_PERM ints) of a shingle set."""
+    return tuple(int(v) for v in signatures([words])[0])
+
+
+def jaccard(words_a, words_b):
+    """Exact Jaccard similarity of two shingle sets."""
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def _signed_keys(word_sets):
+    """(signatures, band keys of each set) of one or more shingle sets."""
+    sigs = signatures(word_sets)
+    records = np.empty((len(word_sets), BANDS), dtype=_BAND_RECORD)
+    records['band'] = np.arange(BANDS)
+    records['rows'] = sigs.reshape(len(word_sets), BANDS, ROWS)
+    raw, size = memoryview(records.tobytes()), _BAND_RECORD.itemsize
+    keys = [int.from_bytes(hashlib.blake2b(raw[i:i + size], digest_size=8).digest(), 'little', signed=True)
+            for i in range(0, len(raw), size)]
+    return sigs, [keys[n * BANDS:(n + 1) * BANDS] for n in range(len(word_sets))]
+
+
+def band_keys_batch(word_sets):
+    """Signed 64-bit LSH bucket keys (one per band) for each of several shingle sets."""
+    return _signed_keys(word_sets)[1] if word_sets else []
+
+
+def band_keys(words):
+    """One signed 64-bit LSH bucket key per band of the shingle set's signature."""
+    return band_keys_batch([words])[0]
+
+
+def _batch_duplicate(n, words, sigs, keys, buckets, threshold):
+    """Whether batch question n near-duplicates one already kept from the batch (buckets: key -> kept)."""
+    found = [buckets[k] for k in keys[n] if k in buckets]
+    if not found:
+        return False
+    candidates = np.unique(np.fromiter(chain.from_iterable(found), dtype=np.intp))
+    close = candidates[(sigs[candidates] == sigs[n]).mean(axis=1) >= threshold - ESTIMATE_SLACK]
+    return any(jaccard(words[n], words[m]) >= threshold for m in close.tolist())
+
+
+# ------------------------------------------------------------------------------
+# Function: check_questions
+# Purpose: Drop near-duplicate questions and find repeats of answered ones.
+# Inputs:
+#   - user_id: owner of the session (the index is per user)
+#   - session_id: session the questions are being added to
+#   - questions: ParsedQuestion records about to be inserted
+#   - threshold: word Jaccard similarity at which prompts are the same question
+# Process:
+#   - Compute the band keys of all prompts together (NumPy signatures)
+#   - One indexed query fetches the user's earlier questions sharing a band key
+#     that can matter: those of this session, and answered ones
+#   - Candidates are verified on their exact word sets: a match in the same
+#     session (or earlier in this batch) drops the question; a match with an
+#     answered question from another session sets repeat_of
+#   - Within the batch, candidates are first compared on their signatures
+#     (vectorized) so only likely matches reach the exact check
+# Outputs:
+#   - List of (question, band_keys, repeat_of_id) for the questions to keep
+# ------------------------------------------------------------------------------
+def check_questions(user_id, session_id, questions, threshold=DUPLICATE_SIMILARITY):
+    words = [shingles(q.prompt) for q in questions]
+    sigs, keys = _signed_keys(words)
+    wanted = {k for ks in keys for k in ks}
+    candidates = {}
+    rows = db.session.execute(
+        select(QuestionBucket.bucket, QuizQuestion.id, QuizQuestion.session_id,
+               QuizQuestion.prompt, QuizQuestion.user_answer)
+        .join(QuizQuestion, and_(QuizQuestion.session_id == QuestionBucket.session_id,
+                                 QuizQuestion.question_index == QuestionBucket.question_index))
+        .where(QuestionBucket.user_id == user_id, QuestionBucket.bucket.in_(wanted),
+               or_(QuizQuestion.session_id == session_id, QuizQuestion.user_answer.is_not(None)))
+    ).all()
+    for row in rows:
+        candidates.setdefault(row.bucket, []).append(row)
+
+    seen_words = {}
+    buckets = {}
+    kept = []
+    for n, q in enumerate(questions):
+        duplicate, repeat_of = False, None
+        checked = set()
+        for key in keys[n]:
+            for row in candidates.get(key, ()):
+                if row.id in checked:
+                    continue
+                checked.add(row.id)
+                if row.id not in seen_words:
+                    seen_words[row.id] = shingles(row.prompt)
+                if jaccard(words[n], seen_words[row.id]) < threshold:
+                    continue
+                if row.session_id == session_id:
+                    duplicate = True
+                    break
+                if row.user_answer is not None and (repeat_of is None or row.id < repeat_of):
+                    repeat_of = row.id
+            if duplicate:
+                break
+        if duplicate or _batch_duplicate(n, words, sigs, keys, buckets, threshold):
+            continue
+        for key in keys[n]:
+            buckets.setdefault(key, []).append(n)
+        kept.append((q, keys[n], repeat_of))
+    return kept
+
+
+def index_rows(user_id, session_id, start_index, keys):
+    """Bucket rows for the band keys of questions start_index.. of a session."""
+    return [
+        {'user_id': user_id, 'bucket': key, 'session_id': session_id, 'question_index': start_index + offset}
+        for offset, question_keys in enumerate(keys)
+        for key in question_keys
+    ]
+
+
+def forget_session(session_id):
+    """Remove a session's questions from the index before the session is deleted (no commit)."""
+    # ids fetched first: MySQL cannot UPDATE a table filtered by a subquery on itself
+    ids = db.session.execute(select(QuizQuestion.id).where(QuizQuestion.session_id == session_id)).scalars().all()
+    if ids:
+        db.session.execute(
+            update(QuizQuestion).where(QuizQuestion.repeat_of_id.in_(ids)).values(repeat_of_id=None)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.execute(delete(QuestionBucket).where(QuestionBucket.session_id == session_id))
@@ -0,0 +1,264 @@
+# backend/generation.py
+# Quiz generation helpers for QuizPro.
+# - Builds the generation prompt for a question type/count
+# - Calls the selected LLM backend (blocking or streaming)
+# - Splits the '<|Q|>'-delimited output incrementally; blocks are parsed by
+#   quiz_parser into ParsedQuestion records
+# - Fills a QuizSession in the background while the user starts answering
+# - Large sources: one call per content chunk in parallel, merged and de-duplicated
+
+import re
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .extensions import db
+from .llm import get_provider, LLMError  # Pluggable LLM backends
+from .models import QuizSession
+from .persistence import insert_questions
+from .topics import tag_questions
+from .quiz_parser import (QUESTION_DELIMITER, parse_question_item, parse_quiz,  # Quiz output parser
+                          split_title)
+
+# Parallel model calls when one quiz is generated from several content chunks
+GENERATION_MAX_WORKERS = 4
+
+_KEY_RE = re.compile(r'[^a-z0-9]+')
+
+
+# ------------------------------------------------------------------------------
+# Function: build_quiz_prompt
+# Purpose: Build the LLM prompt asking for a title plus N questions of a type.
+# Inputs:
+#   - content_str: source material the questions must be based on
+#   - question_type: 'multiple_choice' or 'free_response'
+#   - num_questions: number of questions to request
+# Outputs:
+#   - The prompt string
+# ------------------------------------------------------------------------------
+def build_quiz_prompt(content_str, question_type, num_questions):
+    if question_type == 'multiple_choice':
+        return (
+            "Give your quiz a concise, professional title on the first line starting with 'Title: '. "
+            f"Then list exactly {num_questions} multiple-choice questions from this content: {content_str}. "
+            "For each question, use this exact format with one '\n' line per item:\n"
+            "1. Question text\n"
+            "A) Option A\nB) Option B\nC) Option C\nD) Option D\n"
+            "Topic: The concept the question tests, in 1-4 words\n"
+            "Hint: Provide a brief, helpful hint for solving the question\n"
+            "Answer: X<|Q|>\n"
+            "Include <|Q|> after each question and no extra text."
+        )
+    # Ask free-response questions with hints
+    return (
+        "Give your quiz a concise, professional title on the first line prefixed with 'Title: '. "
+        f"Then list exactly {num_questions} free-response questions based solely on the following content: {content_str}. "
+        "For each question, use this exact format with line breaks as shown:\n"
+        "1. Question text\n"
+        "Topic: The concept the question tests, in 1-4 words\n"
+        "Hint: Provide a brief, helpful hint for solving the question\n"
+        "Answer: Complete answer text<|Q|>\n"
+        "Include '<|Q|>' after each question and no additional text before, between, or after."
+    )
+
+
+# --------------------------------
+# Helper: generate_questions via AI model
+# --------------------------------
+def generate_questions(api_key, model_name, prompt):
+    """
+    Send the prompt to the selected LLM backend and return its generated response.
+    """
+    provider = get_provider(model_name, api_key)
+    if provider is None:
+        return ""
+    # Call the model, handling overloads or API errors gracefully
+    try:
+        return provider.generate(prompt, temperature=0.2, max_output_tokens=2048)
+    except LLMError as e:
+        # Handle API errors (e.g., model overload) and other exceptions
+        print(f"[ERROR] LLM API call failed: {e}")
+        return ""
+
+
+# --------------------------------
+# Helper: stream generated text via AI model
+# --------------------------------
+def generate_questions_stream(api_key, model_name, prompt):
+    """
+    Streaming variant of generate_questions: yield text fragments as the model
+    produces them. Errors end the stream early (already-yielded text stands).
+    """
+    provider = get_provider(model_name, api_key)
+    if provider is None:
+        return
+    try:
+        yield from provider.stream(prompt, temperature=0.2, max_output_tokens=2048)
+    except LLMError as e:
+        print(f"[ERROR] LLM streaming call failed: {e}")
+
+
+# --------------------------------
+# Helper: generate a hint for one question
+# --------------------------------
+def generate_hint(api_key, model_name, question_text):
+    """Ask the LLM for a short hint; returns 'Hint unavailable.' on any failure."""
+    provider = get_provider(model_name, api_key)
+    if provider is None:
+        return "Hint unavailable."
+    hint_prompt = f"Provide a concise hint to help answer the following question: '{question_text}'"
+    try:
+        hint_text = provider.generate(hint_prompt, temperature=0.2, max_output_tokens=128).strip()
+    except LLMError:
+        return "Hint unavailable."
+    return hint_text or "Hint unavailable."
+
+
+# ------------------------------------------------------------------------------
+# Function: iter_quiz_items
+# Purpose: Incrementally split streamed text on the question delimiter.
+# Inputs:
+#   - chunks: iterable of text fragments (delimiters may straddle fragments)
+# Outputs:
+#   - Yields each raw question block as soon as its delimiter arrives; the
+#     trailing block (no delimiter) is yielded when the stream ends
+# ------------------------------------------------------------------------------
+def iter_quiz_items(chunks, delimiter=QUESTION_DELIMITER):
+    buffer = ''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        pos = buffer.find(delimiter)
+        while pos >= 0:
+            item, buffer = buffer[:pos], buffer[pos + len(delimiter):]
+            if item.strip():
+                yield item
+            pos = buffer.find(delimiter)
+    if buffer.strip():
+        yield buffer
+
+
+def question_key(question):
+    """Normalized prompt used to spot the same question generated from two chunks."""
+    return _KEY_RE.sub(' ', question.prompt.lower()).strip()
+
+
+# ------------------------------------------------------------------------------
+# Function: generate_chunked_quiz
+# Purpose: Map-reduce generation over content chunks (see chunking.py).
+# Inputs:
+#   - api_key / model_name / question_type: generation parameters
+#   - calls: [(chunk, count)] from plan_generation_calls
+#   - num_questions: cap on the questions yielded in total
+#   - max_workers: concurrent model calls
+# Process:
+#   - Run one blocking generation call per planned chunk on a thread pool
+#   - As each call completes, parse it, give untagged questions a keyword
+#     topic from their chunk and drop questions whose normalized prompt was
+#     already yielded
+#   - Stop (cancelling calls not yet started) once num_questions are yielded
+# Outputs:
+#   - Yields (title, [ParsedQuestion]) per completed call, in completion order
+# ------------------------------------------------------------------------------
+def generate_chunked_quiz(api_key, model_name, calls, question_type, num_questions,
+                          max_workers=GENERATION_MAX_WORKERS):
+    if not calls:
+        return
+    seen = set()
+    produced = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls))),
+                              thread_name_prefix='quiz-chunk')
+    try:
+        futures = {
+            pool.submit(generate_questions, api_key, model_name,
+                        build_quiz_prompt(chunk, question_type, count)): chunk
+            for chunk, count in calls
+        }
+        for future in as_completed(futures):
+            title, questions = parse_quiz(future.result(), question_type)
+            tag_questions(questions, futures[future])
+            fresh = []
+            for question in questions:
+                key = question_key(question)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                fresh.append(question)
+                if produced + len(fresh) >= num_questions:
+                    break
+            produced += len(fresh)
+            yield title, fresh
+            if produced >= num_questions:
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shuffle_options(question):
+    """Shuffle a ParsedQuestion's MC options in place, relabelling A-D and the answer."""
+    items = list(question.options.items())
+    random.shuffle(items)
+    opt_map = {}
+    ans_map = None
+    for i, (old_letter, text) in enumerate(items):
+        letter = chr(ord('A') + i)
+        opt_map[letter] = text
+        if old_letter == question.answer:
+            ans_map = letter
+    question.options = opt_map
+    question.answer = ans_map
+    return question
+
+
+# ------------------------------------------------------------------------------
+# Function: stream_quiz_into_session
+# Purpose: Background worker that streams a quiz from the model and saves each
+#          question as soon as it parses, so /chat can serve question 1 early.
+# Inputs:
+#   - app: Flask app (a fresh app context is pushed for this thread)
+#   - session_id: QuizSession created by setup() with status 'generating'
+#   - api_key / model_name / prompt: generation parameters
+#   - question_type: 'multiple_choice' or 'free_response'
+#   - first_ready: threading.Event set once the first question is committed
+#     (or when generation ends, so the waiting request never hangs)
+# Process:
+#   - Split the stream on '<|Q|>' with iter_quiz_items, take the title from the
+#     first block, parse/shuffle each question and commit it immediately
+#   - On completion set num_questions to the saved count and status to
+#     'in_progress' ('failed' if nothing parsed)
+# ------------------------------------------------------------------------------
+def stream_quiz_into_session(app, session_id, api_key, model_name, prompt, question_type, first_ready):
+    with app.app_context():
+        saved = 0
+        try:
+            quiz = db.session.get(QuizSession, session_id)
+            chunks = generate_questions_stream(api_key, model_name, prompt)
+            for n, item in enumerate(iter_quiz_items(chunks)):
+                if n == 0:
+                    title, item = split_title(item)
+                    if title:
+                        quiz.title = title
+                parsed = parse_question_item(item, question_type)
+                if not parsed:
+                    continue
+                # the prompt embeds the source text, so it serves for keyword topics
+                tag_questions([parsed], prompt)
+                if question_type == 'multiple_choice':
+                    shuffle_options(parsed)
+                # near-duplicates of questions already saved are dropped
+                if not insert_questions(quiz.user_id, session_id, [parsed], start_index=saved):
+                    continue
+                db.session.commit()
+                saved += 1
+                if saved == 1:
+                    first_ready.set()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Streaming generation failed for session {session_id}: {e}")
+        finally:
+            quiz = db.session.get(QuizSession, session_id)
+            if quiz is not None:
+                quiz.status = 'in_progress' if saved else 'failed'
+                quiz.num_questions = saved
+                db.session.commit()
+            db.session.remove()
+            first_ready.set()
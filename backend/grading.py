@@ -0,0 +1,290 @@
+# backend/grading.py
+# Free-response grading helpers for QuizPro.
+# - evaluate_answer: ask the LLM to judge a single answer
+# - evaluate_answers_batch: judge many answers with one structured prompt
+# - grade_free_response: grade a session's answers in token-budgeted batches
+#   (per-item fallback) and persist verdicts
+# - explain_answer_async: grade/explain one submitted answer in the background
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from .extensions import db
+from .llm import get_provider, LLMError  # Pluggable LLM backends
+from .models import QuizQuestion
+from .adaptive import record_performance
+from .review import record_review
+from .mastery import invalidate_mastery
+from .analytics import record_verdict
+from .chunking import estimate_tokens
+
+# Upper bound on concurrent model calls made while grading one results page
+GRADING_MAX_WORKERS = 8
+# Batch grading: at most this many answers per prompt...
+GRADING_BATCH_SIZE = 20
+# ...and roughly this many prompt tokens of question/answer text per prompt
+GRADING_BATCH_TOKENS = 3000
+# Output tokens reserved per graded item in a batch response
+_TOKENS_PER_VERDICT = 96
+
+_STATUSES = {'correct': 'Correct', 'partially correct': 'Partially Correct', 'incorrect': 'Incorrect'}
+# 'ID: 12' / 'Status: Correct' / 'Explanation: ...', tolerating markdown such as '**ID:** 12'
+_VERDICT_LINE_RE = re.compile(r'^[\W_]*(id|status|explanation)[*_\s]*:[*_\s]*(.*)$', re.IGNORECASE)
+
+
+# --------------------------------
+# Helper: evaluate free-response answers via AI model
+# --------------------------------
+def evaluate_answer(api_key, model_name, question_text, user_ans, correct_ans):
+    """
+    Use AI to judge a free-response answer against the correct answer.
+    Returns a dict with 'status' (Correct/Partially Correct/Incorrect) and 'explanation'.
+    """
+    provider = get_provider(model_name, api_key)
+    if provider is None:
+        return {'status': 'Error', 'explanation': 'No API key.'}
+    # Build evaluation prompt
+    eval_prompt = (
+        f"Here is a quiz question: \"{question_text}\". "
+        f"The correct answer is: \"{correct_ans}\". "
+        f"The student's answer is: \"{user_ans}\". "
+        "Assess if the student's answer demonstrates understanding of the topic. "
+        "Respond in the exact format:\nStatus: <Correct|Partially Correct|Incorrect>\nExplanation: <brief reasoning>."
+    )
+    try:
+        raw = provider.generate(eval_prompt, temperature=0.0, max_output_tokens=256)
+    except LLMError as e:
+        print(f"[ERROR] Evaluation API call failed: {e}")
+        return {'status': 'Error', 'explanation': 'Evaluation call failed.'}
+    # Parse Status and Explanation
+    status = ''
+    explanation = ''
+    for line in raw.splitlines():
+        if line.lower().startswith('status:'):
+            status = line.split(':',1)[1].strip()
+        elif line.lower().startswith('explanation:'):
+            explanation = line.split(':',1)[1].strip()
+    if not status:
+        status = 'Error'
+    return {'status': status, 'explanation': explanation}
+
+
+def build_batch_prompt(items):
+    """Build one grading prompt for (item_id, question, reference, student answer) tuples."""
+    blocks = [
+        f"Item {item_id}:\nQuestion: \"{question}\"\n"
+        f"Correct answer: \"{reference}\"\nStudent answer: \"{answer}\""
+        for item_id, question, answer, reference in items
+    ]
+    return (
+        "Grade each student answer below against its correct answer. "
+        "Assess if the student's answer demonstrates understanding of the topic.\n"
+        "Respond with one block per item, in the exact format:\n"
+        "ID: <item id>\nStatus: <Correct|Partially Correct|Incorrect>\nExplanation: <brief reasoning>\n"
+        "Return a block for every item and no other text.\n\n"
+        + "\n\n".join(blocks)
+    )
+
+
+def parse_batch_verdicts(raw):
+    """
+    Parse a batch grading response into {item_id (str): {'status', 'explanation'}}.
+    Blocks without an ID or a recognised status are dropped, so their items can be
+    retried individually.
+    """
+    verdicts = {}
+    current = None
+    for line in raw.splitlines():
+        m = _VERDICT_LINE_RE.match(line.strip())
+        if not m:
+            continue
+        key, value = m.group(1).lower(), m.group(2).strip().strip('*').strip()
+        if key == 'id':
+            current = {'id': value, 'status': None, 'explanation': ''}
+            verdicts[value] = current
+        elif current is not None and key == 'status':
+            current['status'] = _STATUSES.get(value.rstrip('.').lower())
+        elif current is not None and key == 'explanation':
+            current['explanation'] = value
+    return {item_id: {'status': v['status'], 'explanation': v['explanation']}
+            for item_id, v in verdicts.items() if v['status']}
+
+
+def chunk_grading_jobs(jobs, max_items=GRADING_BATCH_SIZE, max_tokens=GRADING_BATCH_TOKENS):
+    """Split grading jobs into batches bounded by item count and estimated prompt tokens."""
+    chunks = []
+    current, used = [], 0
+    for job in jobs:
+        cost = estimate_tokens(''.join(str(part) for part in job))
+        if current and (len(current) >= max_items or used + cost > max_tokens):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(job)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# ------------------------------------------------------------------------------
+# Function: evaluate_answers_batch
+# Purpose: Judge several free-response answers with a single model call.
+# Inputs:
+#   - api_key / model_name: credentials and backend, as for evaluate_answer
+#   - items: list of (item_id, question, student answer, reference answer)
+# Outputs:
+#   - {item_id: {'status', 'explanation'}} for every item the response graded;
+#     items missing from the result (unparseable output, failed call) are left
+#     for the caller to retry individually
+# ------------------------------------------------------------------------------
+def evaluate_answers_batch(api_key, model_name, items):
+    provider = get_provider(model_name, api_key)
+    if provider is None or not items:
+        return {}
+    prompt = build_batch_prompt(items)
+    try:
+        raw = provider.generate(prompt, temperature=0.0,
+                                max_output_tokens=_TOKENS_PER_VERDICT * len(items) + 64)
+    except LLMError as e:
+        print(f"[ERROR] Batch evaluation API call failed: {e}")
+        return {}
+    parsed = parse_batch_verdicts(raw)
+    verdicts = {}
+    for item in items:
+        verdict = parsed.get(str(item[0]))
+        if verdict:
+            verdicts[item[0]] = verdict
+    if len(verdicts) < len(items):
+        print(f"[DEBUG] Batch grading returned {len(verdicts)}/{len(items)} verdicts; retrying the rest per item")
+    return verdicts
+
+
+# ------------------------------------------------------------------------------
+# Function: grade_free_response
+# Purpose: Grade every not-yet-graded free-response question of a session and
+#          store the verdicts on the QuizQuestion rows.
+# Inputs:
+#   - questions: QuizQuestion objects (MC questions and graded ones are skipped)
+#   - api_key / model_name: credentials and model family for the grading calls
+#   - max_workers: size of the bounded thread pool used for model calls
+#   - batch_size / batch_tokens: per-prompt limits for batch grading;
+#     batch_size <= 1 grades every answer with its own evaluate_answer call
+# Process:
+#   - Collect plain (id, prompt, answer, reference) tuples so worker threads
+#     never touch the SQLAlchemy session
+#   - Pack them into token-budgeted batches graded by evaluate_answers_batch,
+#     running the batches concurrently through a ThreadPoolExecutor
+#   - Answers a batch did not grade fall back to per-item evaluate_answer calls
+#   - Write status/explanation/is_correct back in the request thread and commit
+#     once; 'Error' verdicts are returned but not saved, so they are retried
+#   - Verdicts of answered questions count towards topic performance, review
+#     cards and the daily rollups; skipped questions only get their verdict
+# Outputs:
+#   - A list aligned with `questions`: {'status', 'explanation'} for free-response
+#     questions, None for multiple-choice ones
+# ------------------------------------------------------------------------------
+def grade_free_response(questions, api_key, model_name='gemini', max_workers=GRADING_MAX_WORKERS,
+                        batch_size=GRADING_BATCH_SIZE, batch_tokens=GRADING_BATCH_TOKENS):
+    pending = [q for q in questions if not q.options and not q.eval_status]
+    verdicts = {}
+    if pending:
+        jobs = [(q.id, q.prompt, q.user_answer or '', q.correct_answer) for q in pending]
+        workers = max(1, min(max_workers, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            if batch_size > 1 and len(jobs) > 1:
+                chunks = chunk_grading_jobs(jobs, max_items=batch_size, max_tokens=batch_tokens)
+                for batch in pool.map(lambda chunk: evaluate_answers_batch(api_key, model_name, chunk), chunks):
+                    verdicts.update(batch)
+            remaining = [job for job in jobs if job[0] not in verdicts]
+            results = pool.map(
+                lambda job: evaluate_answer(api_key, model_name, job[1], job[2], job[3]),
+                remaining
+            )
+            for job, result in zip(remaining, results):
+                verdicts[job[0]] = result
+        for q in pending:
+            result = verdicts[q.id]
+            if result.get('status') == 'Error':
+                continue
+            q.eval_status = result['status']
+            q.explanation = result.get('explanation')
+            q.is_correct = result['status'].lower() == 'correct'
+            if q.user_answer:
+                record_performance(q.session.user_id, q)
+                record_review(q.session.user_id, q)
+                record_verdict(q.session.user_id, q)
+        db.session.commit()
+        for user_id in {q.session.user_id for q in pending}:
+            invalidate_mastery(user_id)
+
+    evaluations = []
+    for q in questions:
+        if q.options:
+            evaluations.append(None)
+        elif q.id in verdicts and verdicts[q.id].get('status') == 'Error':
+            evaluations.append(verdicts[q.id])
+        else:
+            evaluations.append({'status': q.eval_status, 'explanation': q.explanation})
+    return evaluations
+
+
+# Background pool for per-answer explanations requested by answer_question()
+_feedback_pool = ThreadPoolExecutor(max_workers=GRADING_MAX_WORKERS, thread_name_prefix='answer-feedback')
+
+
+# ------------------------------------------------------------------------------
+# Function: explain_answer_async
+# Purpose: Grade and explain one submitted answer off the request thread.
+# Inputs:
+#   - app: Flask app (the worker pushes its own app context)
+#   - question_id: QuizQuestion whose user_answer was just committed
+#   - user_id: owner, for the topic counters, review card and rollups
+#   - api_key / model_name: credentials and backend for evaluate_answer
+# Process:
+#   - Call evaluate_answer, then store explanation and (non-Error) eval_status;
+#     free-response questions take is_correct from the verdict
+#   - The result is dropped if the answer changed while the model was running
+#   - A free-response verdict stored for the first time counts towards topic
+#     performance and the analytics rollups, committed together with it
+#     (skipped questions are not counted)
+# Outputs:
+#   - A Future; the client polls /answer_status/<id> for the stored explanation
+# ------------------------------------------------------------------------------
+def explain_answer_async(app, question_id, user_id, api_key, model_name='gemini'):
+    return _feedback_pool.submit(_explain_answer, app, question_id, user_id, api_key, model_name)
+
+
+def _explain_answer(app, question_id, user_id, api_key, model_name):
+    with app.app_context():
+        try:
+            q = db.session.get(QuizQuestion, question_id)
+            if q is None:
+                return
+            answer = q.user_answer
+            prompt, reference = q.prompt, q.correct_answer
+            # release the connection while waiting on the model
+            db.session.rollback()
+            result = evaluate_answer(api_key, model_name, prompt, answer or '', reference)
+            q = db.session.get(QuizQuestion, question_id)
+            if q is None or q.user_answer != answer:
+                return
+            status = result.get('status')
+            # a verdict stored meanwhile (e.g. by /results grading) was already counted
+            first_verdict = q.eval_status is None
+            q.explanation = result.get('explanation') or ''
+            q.eval_status = status if status and status != 'Error' else None
+            if q.eval_status and not q.options:
+                q.is_correct = q.eval_status.lower() == 'correct'
+            # a skipped question gets feedback but is not counted as answered
+            if q.user_answer:
+                record_review(user_id, q)
+            if q.user_answer and first_verdict and q.eval_status and not q.options:
+                # multiple-choice answers were counted when submitted
+                record_performance(user_id, q)
+                record_verdict(user_id, q)
+            db.session.commit()
+            invalidate_mastery(user_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Background answer feedback failed for question {question_id}: {e}")
+        finally:
+            db.session.remove()
@@ -0,0 +1,487 @@
+# backend/jobs.py
+# Background job queue for quiz generation.
+# /setup only validates the form, spools uploads to disk and enqueues a
+# GenerationJob row; upload parsing, the LLM call, question parsing and the DB
+# writes happen in a worker:
+# - `flask --app backend.app worker --processes N`: a pool of worker processes
+#   polling the generation_jobs table (production)
+# - in-process fallback: a small thread pool in the web process drains the
+#   queue right after each enqueue (development, single-process deployments)
+# Job states: queued -> running -> done | failed. The setup page polls
+# /jobs/<id> and opens the quiz once its first question is saved.
+# Sources larger than one prompt's budget are split into chunks and generated
+# with one model call per chunk (see chunking.py, generate_chunked_quiz).
+
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, update, case, or_, and_
+from werkzeug.utils import secure_filename
+from .extensions import db
+from .models import GenerationJob, QuizSession, QuizQuestion, QuestionBucket
+from .uploads import parse_uploads, PARSE_WORKERS, PARSE_TIMEOUT, MAX_UPLOAD_BYTES
+from .generation import (build_quiz_prompt, generate_questions, generate_chunked_quiz, shuffle_options,
+                         stream_quiz_into_session, GENERATION_MAX_WORKERS)
+from .quiz_parser import parse_quiz
+from .chunking import split_content, plan_generation_calls, source_char_budget, DEFAULT_CHUNK_TOKENS
+from .persistence import create_quiz_session, insert_questions
+from .quiz_cache import (quiz_cache_key, get_cached_quiz, store_session_quiz, QUIZ_CACHE_TTL,
+                         QUIZ_CACHE_MAX_ENTRIES)
+from .adaptive import order_questions
+from .mastery import get_mastery, MASTERY_CACHE_TTL
+from .topics import tag_questions, canonicalize_topics
+from .llm import resolve_api_key
+
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+# A 'running' job not finished after this many seconds is assumed lost (worker
+# died) and may be claimed again...
+JOB_STALE_AFTER = 600
+# ...up to this many attempts in total
+JOB_MAX_ATTEMPTS = 2
+# Threads draining the queue when no external worker pool is used
+JOB_INPROCESS_WORKERS = 2
+
+_NO_CONTENT = "Please upload a file or paste some text."
+_GENERATION_FAILED = "Error generating questions. Please check the API configuration."
+
+
+# --------------------------------
+# Enqueue
+# --------------------------------
+def spool_uploads(files, upload_dir):
+    """Save uploaded FileStorage objects under upload_dir; returns [{'path', 'filename'}]."""
+    os.makedirs(upload_dir, exist_ok=True)
+    spooled = []
+    for file in files:
+        if not file or not file.filename:
+            continue
+        path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{secure_filename(file.filename) or 'upload'}")
+        file.save(path)
+        spooled.append({'path': path, 'filename': file.filename})
+    return spooled
+
+
+def enqueue_generation_job(user_id, model_name, question_type, num_questions, content=None, uploads=None):
+    """Insert a queued GenerationJob and commit; returns the job."""
+    job = GenerationJob(user_id=user_id, model_name=model_name, question_type=question_type,
+                        num_questions=num_questions, content=content or None, uploads=uploads or [])
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+# ------------------------------------------------------------------------------
+# Function: claim_next_job
+# Purpose: Atomically move the oldest claimable job to 'running'.
+# Process:
+#   - Pick the lowest-id job that is queued (or running but stale)
+#   - Conditional UPDATE ... WHERE id = ? AND <still claimable>; a rowcount of 0
+#     means another worker won the race, so try the next candidate
+# Outputs:
+#   - The claimed job id, or None when the queue is empty
+# ------------------------------------------------------------------------------
+def claim_next_job(stale_after=JOB_STALE_AFTER):
+    now = datetime.utcnow()
+    claimable = or_(
+        GenerationJob.status == 'queued',
+        and_(GenerationJob.status == 'running', GenerationJob.started_at < now - timedelta(seconds=stale_after)),
+    )
+    while True:
+        job_id = db.session.execute(
+            select(GenerationJob.id).where(claimable).order_by(GenerationJob.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+        result = db.session.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, claimable)
+            .values(status='running', started_at=now, attempts=GenerationJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return job_id
+
+
+# --------------------------------
+# Run one job
+# --------------------------------
+def _job_content(app, job, cache):
+    """
+    Parse the job's spooled uploads in parallel (through the parse cache) and
+    append pasted text. Each upload is parsed only as far as the requested quiz
+    needs. Returns (content, upload error messages).
+    """
+    results = parse_uploads(job.uploads or [], cache=cache, max_chars=source_char_budget(job.num_questions),
+                            workers=app.config.get('UPLOAD_PARSE_WORKERS', PARSE_WORKERS),
+                            timeout=app.config.get('UPLOAD_PARSE_TIMEOUT', PARSE_TIMEOUT),
+                            max_bytes=app.config.get('UPLOAD_MAX_BYTES', MAX_UPLOAD_BYTES))
+    parts = [r['text'] for r in results if r['text']]
+    if job.content:
+        parts.append(job.content)
+    return '\n\n'.join(parts), [r['error'] for r in results if r['error']]
+
+
+def _remove_uploads(job):
+    for upload in job.uploads or []:
+        try:
+            os.remove(upload['path'])
+        except OSError:
+            pass
+
+
+def _finish(job, status, error=None):
+    job.status = status
+    job.error = error
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _start_session(job):
+    """Create the job's 'generating' QuizSession up front so it can open early."""
+    quiz = QuizSession(user_id=job.user_id, session_type='quiz', question_type=job.question_type,
+                       num_questions=job.num_questions, status='generating', model_name=job.model_name)
+    db.session.add(quiz)
+    db.session.flush()
+    job.session_id = quiz.id
+    db.session.commit()
+    return quiz
+
+
+# ------------------------------------------------------------------------------
+# Function: _run_chunked
+# Purpose: Generate a job's quiz with one model call per content chunk.
+# Process:
+#   - generate_chunked_quiz yields de-duplicated questions per finished call
+#   - STREAM_GENERATION: append each batch to a 'generating' session as it
+#     arrives (the quiz opens after the first batch), then rank the questions
+#     not yet reached by mastery once all batches are in (_rank_streamed)
+#   - Otherwise: collect everything, then shuffle/order/bulk-insert as the
+#     single-call path does
+# ------------------------------------------------------------------------------
+def _run_chunked(app, job, api_key, calls):
+    batches = generate_chunked_quiz(api_key, job.model_name, calls, job.question_type, job.num_questions,
+                                    max_workers=app.config.get('GENERATION_MAX_WORKERS', GENERATION_MAX_WORKERS))
+    if app.config.get('STREAM_GENERATION'):
+        quiz = _start_session(job)
+        session_id = quiz.id
+        saved = 0
+        try:
+            for title, questions in batches:
+                if title and not quiz.title:
+                    quiz.title = title
+                if job.question_type == 'multiple_choice':
+                    for qst in questions:
+                        shuffle_options(qst)
+                canonicalize_topics(job.user_id, questions)
+                saved += insert_questions(job.user_id, session_id, questions, start_index=saved)
+                db.session.commit()
+        except Exception as e:
+            # keep the batches already saved; the quiz just ends early
+            db.session.rollback()
+            print(f"[ERROR] Chunked generation failed for session {session_id}: {e}")
+        finally:
+            batches.close()
+        quiz = db.session.get(QuizSession, session_id)
+        quiz.status = 'in_progress' if saved else 'failed'
+        quiz.num_questions = saved
+        db.session.commit()
+        if saved:
+            _rank_streamed(app, job, session_id)
+            _finish(job, 'done')
+        else:
+            _finish(job, 'failed', _GENERATION_FAILED)
+        return
+
+    title, parsed_qs = None, []
+    for batch_title, questions in batches:
+        title = title or batch_title
+        parsed_qs.extend(questions)
+    if not parsed_qs:
+        _finish(job, 'failed', _GENERATION_FAILED)
+        return
+    if job.question_type == 'multiple_choice':
+        for qst in parsed_qs:
+            shuffle_options(qst)
+    parsed_qs = _adaptive_order(app, job, parsed_qs)
+    quiz = create_quiz_session(job.user_id, parsed_qs, session_type='quiz',
+                               question_type=job.question_type, title=title or None,
+                               model_name=job.model_name)
+    job.session_id = quiz.id
+    _finish(job, 'done')
+
+
+def _adaptive_order(app, job, parsed_qs):
+    """Map topics onto the user's vocabulary, then rank by expected learning gain."""
+    canonicalize_topics(job.user_id, parsed_qs)
+    mastery = get_mastery(job.user_id, ttl=app.config.get('MASTERY_CACHE_TTL', MASTERY_CACHE_TTL))
+    return order_questions(parsed_qs, mastery=mastery)
+
+
+# ------------------------------------------------------------------------------
+# Function: _rank_streamed
+# Purpose: Rank a streamed session by mastery once generation has finished.
+# Process:
+#   - The quiz opened while questions were still arriving, so everything up to
+#     the first unanswered question (possibly on screen) keeps its place
+#   - The remaining questions are ordered over the whole assembled list by
+#     _adaptive_order; their question_index (and the LSH bucket rows keyed by
+#     it) is renumbered in place
+# Outputs:
+#   - None; failures are logged and leave the arrival order
+# ------------------------------------------------------------------------------
+def _rank_streamed(app, job, session_id):
+    try:
+        rows = db.session.execute(
+            select(QuizQuestion).where(QuizQuestion.session_id == session_id).order_by(QuizQuestion.question_index)
+        ).scalars().all()
+        start = next((i for i, q in enumerate(rows) if q.user_answer is None), len(rows)) + 1
+        pending = rows[start:]
+        if len(pending) < 2:
+            return
+        slots = [q.question_index for q in pending]
+        moves = {}
+        for q, index in zip(_adaptive_order(app, job, pending), slots):
+            if q.question_index != index:
+                moves[q.question_index] = index
+                q.question_index = index
+        if moves:
+            db.session.execute(
+                update(QuestionBucket)
+                .where(QuestionBucket.session_id == session_id, QuestionBucket.question_index.in_(list(moves)))
+                .values(question_index=case(moves, value=QuestionBucket.question_index))
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"[ERROR] Ranking streamed session {session_id} failed: {e}")
+
+
+def _serve_cached(app, job, title, parsed_qs):
+    """Build the job's session from a cached quiz (options reshuffled per user if enabled)."""
+    if job.question_type == 'multiple_choice' and app.config.get('QUIZ_CACHE_RESHUFFLE', True):
+        for qst in parsed_qs:
+            shuffle_options(qst)
+    parsed_qs = _adaptive_order(app, job, parsed_qs)
+    quiz = create_quiz_session(job.user_id, parsed_qs, session_type='quiz',
+                               question_type=job.question_type, title=title or None,
+                               model_name=job.model_name)
+    job.session_id = quiz.id
+    _finish(job, 'done')
+
+
+def _cache_result(app, job, cache_key):
+    """Store a finished job's quiz in the generated-quiz cache (failures only logged)."""
+    try:
+        quiz = db.session.get(QuizSession, job.session_id)
+        if quiz is not None and quiz.status == 'in_progress':
+            store_session_quiz(cache_key, quiz.id, quiz.title,
+                               max_entries=app.config.get('QUIZ_CACHE_MAX_ENTRIES', QUIZ_CACHE_MAX_ENTRIES))
+    except Exception as e:
+        db.session.rollback()
+        print(f"[ERROR] Caching quiz of job {job.id} failed: {e}")
+
+
+# ------------------------------------------------------------------------------
+# Function: _generate
+# Purpose: Generate the job's quiz from its source text.
+# Process:
+#   - Content needing several calls (over CHUNK_TOKENS, or more questions than
+#     one call returns from text long enough to slice): _run_chunked
+#   - STREAM_GENERATION: stream_quiz_into_session saves each question as it
+#     parses; once the stream ends _rank_streamed orders the questions not
+#     yet reached by mastery
+#   - Otherwise: one call, then shuffle, rank by mastery and bulk-insert
+# ------------------------------------------------------------------------------
+def _generate(app, job, content_str):
+    api_key = resolve_api_key(app.config, job.user_id, job.model_name)
+    chunks = split_content(content_str, app.config.get('CHUNK_TOKENS', DEFAULT_CHUNK_TOKENS))
+    calls = plan_generation_calls(chunks, job.num_questions)
+    if len(calls) > 1:
+        # ask for ~10% extra so questions repeated across chunks can be dropped
+        calls = plan_generation_calls(chunks, job.num_questions + max(1, job.num_questions // 10))
+        _run_chunked(app, job, api_key, calls)
+        return
+    prompt = build_quiz_prompt(content_str, job.question_type, job.num_questions)
+
+    if app.config.get('STREAM_GENERATION'):
+        quiz = _start_session(job)
+        stream_quiz_into_session(app, quiz.id, api_key, job.model_name, prompt, job.question_type,
+                                 threading.Event())
+        db.session.expire_all()
+        if db.session.get(QuizSession, quiz.id).status == 'failed':
+            _finish(job, 'failed', _GENERATION_FAILED)
+        else:
+            _rank_streamed(app, job, quiz.id)
+            _finish(job, 'done')
+        return
+
+    raw = generate_questions(api_key, job.model_name, prompt)
+    title, parsed_qs = parse_quiz(raw, job.question_type)
+    tag_questions(parsed_qs, content_str)
+    if not parsed_qs:
+        _finish(job, 'failed', _GENERATION_FAILED if not raw.strip()
+                else "No valid questions parsed. Please try again.")
+        return
+    if job.question_type == 'multiple_choice':
+        for qst in parsed_qs:
+            shuffle_options(qst)
+    parsed_qs = _adaptive_order(app, job, parsed_qs)
+    quiz = create_quiz_session(job.user_id, parsed_qs, session_type='quiz',
+                               question_type=job.question_type, title=title or None,
+                               model_name=job.model_name)
+    job.session_id = quiz.id
+    _finish(job, 'done')
+
+
+# ------------------------------------------------------------------------------
+# Function: run_generation_job
+# Purpose: Execute a claimed GenerationJob end to end.
+# Inputs:
+#   - app: Flask app (for API keys and generation settings)
+#   - job_id: a job in state 'running' (see claim_next_job)
+#   - cache: optional ParseCache for upload text
+# Process:
+#   - Parse uploads + pasted text
+#   - Serve an identical earlier request from the generated-quiz cache
+#     (QUIZ_CACHE_TTL > 0); otherwise generate and cache the result
+#   - Content over CHUNK_TOKENS goes through _run_chunked, everything else is
+#     one prompt
+#   - STREAM_GENERATION: create a 'generating' QuizSession up front and stream
+#     questions into it, so the quiz can open after the first question; the
+#     questions not yet reached are ranked by mastery when the stream ends
+#   - Otherwise: one blocking call, parse, shuffle, order by weak topics and
+#     bulk-insert the session
+#   - Record 'done' (with session_id) or 'failed' (with error); spooled uploads
+#     are deleted either way
+# ------------------------------------------------------------------------------
+def run_generation_job(app, job_id, cache=None):
+    job = db.session.get(GenerationJob, job_id)
+    if job is None:
+        return
+    try:
+        if job.attempts > JOB_MAX_ATTEMPTS:
+            _finish(job, 'failed', "Generation did not finish. Please try again.")
+            return
+        if job.session_id is not None:
+            # re-claimed after a lost worker: abandon the half-filled session
+            stale = db.session.get(QuizSession, job.session_id)
+            if stale is not None and stale.status == 'generating':
+                stale.status = 'failed'
+            job.session_id = None
+            db.session.commit()
+        content_str, upload_errors = _job_content(app, job, cache)
+        if not content_str.strip():
+            _finish(job, 'failed', upload_errors[0] if upload_errors else _NO_CONTENT)
+            return
+        ttl = app.config.get('QUIZ_CACHE_TTL', QUIZ_CACHE_TTL)
+        cache_key = None
+        if ttl > 0:
+            cache_key = quiz_cache_key(content_str, job.question_type, job.num_questions, job.model_name)
+            cached = get_cached_quiz(cache_key, ttl=ttl)
+            job.cache_hit = cached is not None
+            if cached is not None:
+                _serve_cached(app, job, *cached)
+                return
+        _generate(app, job, content_str)
+        if cache_key is not None and job.status == 'done':
+            _cache_result(app, job, cache_key)
+    except Exception as e:
+        db.session.rollback()
+        print(f"[ERROR] Generation job {job_id} failed: {e}")
+        job = db.session.get(GenerationJob, job_id)
+        if job is not None:
+            _finish(job, 'failed', _GENERATION_FAILED)
+    finally:
+        job = db.session.get(GenerationJob, job_id)
+        if job is not None and job.status in ('done', 'failed'):
+            _remove_uploads(job)
+
+
+# --------------------------------
+# Status for /jobs/<id>
+# --------------------------------
+def job_status(job):
+    """JSON-ready status; 'ready' once the quiz has a playable first question."""
+    ready = False
+    if job.session_id is not None and job.status in ('running', 'done'):
+        ready = db.session.execute(
+            select(QuizQuestion.id).where(QuizQuestion.session_id == job.session_id,
+                                          QuizQuestion.question_index == 0)
+        ).first() is not None
+    return {
+        'id': job.id,
+        'status': job.status,
+        'ready': ready,
+        'session_id': job.session_id,
+        'error': job.error,
+    }
+
+
+# --------------------------------
+# Workers
+# --------------------------------
+def run_worker(app, poll_interval=1.0, burst=False, max_jobs=None, cache=None, stop_event=None):
+    """
+    Claim and run jobs until stopped. burst=True returns as soon as the queue is
+    empty; max_jobs caps the number of jobs processed. Returns the job count.
+    """
+    processed = 0
+    with app.app_context():
+        while stop_event is None or not stop_event.is_set():
+            try:
+                job_id = claim_next_job()
+            except Exception as e:
+                db.session.rollback()
+                print(f"[ERROR] Claiming a generation job failed: {e}")
+                job_id = None
+            if job_id is None:
+                db.session.remove()
+                if burst:
+                    break
+                time.sleep(poll_interval)
+                continue
+            run_generation_job(app, job_id, cache=cache)
+            db.session.remove()
+            processed += 1
+            if max_jobs is not None and processed >= max_jobs:
+                break
+    return processed
+
+
+def _worker_process(poll_interval, burst):
+    # Runs in a spawned process: import the app fresh (no inherited DB connections)
+    from .app import app, parse_cache
+    run_worker(app, poll_interval=poll_interval, burst=burst, cache=parse_cache)
+
+
+def start_worker_pool(processes, poll_interval=1.0, burst=False):
+    """Run `processes` worker processes and wait for them (the `flask worker` command)."""
+    ctx = multiprocessing.get_context('spawn')
+    workers = [ctx.Process(target=_worker_process, args=(poll_interval, burst), name=f"quiz-worker-{i}")
+               for i in range(processes)]
+    for proc in workers:
+        proc.start()
+    try:
+        for proc in workers:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.join()
+
+
+# In-process fallback: drain the queue on a small thread pool after each enqueue
+_inprocess_pool = ThreadPoolExecutor(max_workers=JOB_INPROCESS_WORKERS, thread_name_prefix='generation-job')
+
+
+def dispatch_inprocess(app, cache=None):
+    """Run one queued job on the in-process pool (no-op if another thread claims it first)."""
+    return _inprocess_pool.submit(run_worker, app, burst=True, max_jobs=1, cache=cache)
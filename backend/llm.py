@@ -0,0 +1,330 @@
+# backend/llm.py
+# Pluggable LLM backend layer for QuizPro.
+# Every model call (quiz generation, grading, hints) goes through an
+# LLMProvider so the backend chosen on the setup page is the one actually used:
+# - GeminiProvider:   Google GenAI SDK (pooled clients from llm_clients)
+# - OpenAIProvider:   OpenAI Chat Completions API over pooled httpx clients
+# - DeepSeekProvider: DeepSeek's OpenAI-compatible API
+# - StubProvider:     offline, deterministic, correctly formatted responses for
+#                     local load tests and benchmarks (no network, no API spend)
+# The backend picked for a quiz is stored on its QuizSession (model_name), and
+# every call for that quiz resolves its key with resolve_api_key.
+
+import re
+import json
+import time
+import hashlib
+import httpx
+from .llm_clients import ClientRegistry, get_genai_client
+from .models import ApiKey
+
+
+class LLMError(Exception):
+    """Raised by providers when a model call fails or returns an unusable response."""
+
+
+class LLMProvider:
+    """Base class: a text-in/text-out model backend."""
+    name = 'base'
+    # Whether an API key is needed to call this backend
+    requires_key = True
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+
+    def generate(self, prompt, temperature=0.2, max_output_tokens=2048):
+        """Return the full completion text for prompt."""
+        raise NotImplementedError
+
+    def stream(self, prompt, temperature=0.2, max_output_tokens=2048):
+        """Yield completion text fragments; defaults to one blocking call."""
+        text = self.generate(prompt, temperature=temperature, max_output_tokens=max_output_tokens)
+        if text:
+            yield text
+
+
+# --------------------------------
+# Google Gemini (GenAI SDK)
+# --------------------------------
+class GeminiProvider(LLMProvider):
+    name = 'gemini'
+    model = 'gemini-2.0-flash'
+
+    @staticmethod
+    def _text(response):
+        # Combine all text parts of the first candidate into a single string
+        if response and getattr(response, 'candidates', None):
+            content = response.candidates[0].content
+            return "".join(part.text or "" for part in ((content and content.parts) or []))
+        return ""
+
+    def generate(self, prompt, temperature=0.2, max_output_tokens=2048):
+        client = get_genai_client(self.api_key, self.name)
+        try:
+            response = client.models.generate_content(
+                model=self.model,
+                contents=[{"text": prompt}],
+                config={"temperature": temperature, "max_output_tokens": max_output_tokens}
+            )
+        except Exception as e:
+            raise LLMError(f"Gemini call failed: {e}") from e
+        return self._text(response)
+
+    def stream(self, prompt, temperature=0.2, max_output_tokens=2048):
+        client = get_genai_client(self.api_key, self.name)
+        try:
+            for chunk in client.models.generate_content_stream(
+                model=self.model,
+                contents=[{"text": prompt}],
+                config={"temperature": temperature, "max_output_tokens": max_output_tokens}
+            ):
+                text = self._text(chunk)
+                if text:
+                    yield text
+        except Exception as e:
+            raise LLMError(f"Gemini streaming call failed: {e}") from e
+
+
+# --------------------------------
+# OpenAI-compatible Chat Completions (OpenAI, DeepSeek)
+# --------------------------------
+def _build_http_client(api_key, base_url):
+    return httpx.Client(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {api_key}"},
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(max_connections=http_registry.pool_size,
+                            max_keepalive_connections=http_registry.pool_size),
+    )
+
+
+# Long-lived httpx clients for OpenAI-compatible backends, keyed by (api_key, base_url)
+http_registry = ClientRegistry(factory=_build_http_client)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    base_url = None
+    model = None
+
+    def _payload(self, prompt, temperature, max_output_tokens, stream):
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_output_tokens,
+            "stream": stream,
+        }
+
+    def generate(self, prompt, temperature=0.2, max_output_tokens=2048):
+        client = http_registry.get(self.api_key, self.base_url)
+        try:
+            resp = client.post('/chat/completions',
+                               json=self._payload(prompt, temperature, max_output_tokens, False))
+            resp.raise_for_status()
+            data = resp.json()
+            return data['choices'][0]['message'].get('content') or ""
+        except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+            raise LLMError(f"{self.name} call failed: {e}") from e
+
+    def stream(self, prompt, temperature=0.2, max_output_tokens=2048):
+        client = http_registry.get(self.api_key, self.base_url)
+        try:
+            with client.stream('POST', '/chat/completions',
+                               json=self._payload(prompt, temperature, max_output_tokens, True)) as resp:
+                resp.raise_for_status()
+                # Server-sent events: one 'data: {json}' line per delta, then 'data: [DONE]'
+                for line in resp.iter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    choices = json.loads(data).get('choices') or []
+                    text = (choices[0].get('delta') or {}).get('content') if choices else None
+                    if text:
+                        yield text
+        except (httpx.HTTPError, ValueError) as e:
+            raise LLMError(f"{self.name} streaming call failed: {e}") from e
+
+
+class OpenAIProvider(OpenAICompatibleProvider):
+    name = 'openai'
+    base_url = 'https://api.openai.com/v1'
+    model = 'gpt-4o-mini'
+
+
+class DeepSeekProvider(OpenAICompatibleProvider):
+    name = 'deepseek'
+    base_url = 'https://api.deepseek.com'
+    model = 'deepseek-chat'
+
+
+# --------------------------------
+# Offline deterministic stub
+# --------------------------------
+_COUNT_RE = re.compile(r'(?:exactly|generate)\s+(\d+)\s+(?:new\s+)?(multiple-choice|free-response)', re.IGNORECASE)
+_QUOTED_RE = re.compile(r'The correct answer is: "(.*?)"\. The student\'s answer is: "(.*?)"\.', re.DOTALL)
+# Items of a batch grading prompt (see grading.build_batch_prompt)
+_BATCH_ITEM_RE = re.compile(r'^Item (\S+):\nQuestion: ".*?"\nCorrect answer: "(.*?)"\nStudent answer: "(.*?)"$',
+                            re.DOTALL | re.MULTILINE)
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z\-]{3,}")
+# Source material embedded in generation prompts (keywords are drawn from it)
+_CONTENT_RE = re.compile(r'content: (.*?)\. For each question', re.DOTALL)
+# Question wordings, so items that reuse a keyword are not near-duplicates
+_STUB_MC_PROMPTS = (
+    "Which statement about {word} is true (item {i})?",
+    "What is the main purpose of {word} in the material (item {i})?",
+    "How does {word} relate to the other ideas covered (item {i})?",
+    "Which example best illustrates {word} (item {i})?",
+)
+_STUB_FR_PROMPTS = (
+    "Explain the role of {word} (item {i}).",
+    "Summarize what the material says about {word} (item {i}).",
+    "Give an example that shows {word} in practice (item {i}).",
+    "Compare {word} with a related idea from the material (item {i}).",
+)
+
+
+class StubProvider(LLMProvider):
+    """
+    Returns canned, correctly formatted responses derived deterministically from
+    the prompt, so generation, grading and hints can run without a network.
+    `latency` (seconds) simulates model round-trip time for load tests.
+    """
+    name = 'stub'
+    requires_key = False
+    latency = 0.0
+
+    def _keywords(self, prompt, n=8):
+        words = []
+        for w in _WORD_RE.findall(prompt):
+            w = w.lower()
+            if w not in words:
+                words.append(w)
+        return (words or ['topic'])[:max(n, 1)]
+
+    def _quiz(self, prompt, count, question_type, with_title):
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16)
+        content = _CONTENT_RE.search(prompt)
+        words = self._keywords(content.group(1) if content else prompt, n=16)
+        lines = ["Title: Practice Quiz"] if with_title else []
+        items = []
+        for i in range(count):
+            word = words[(seed + i) % len(words)]
+            # the next wording once every keyword has been used
+            wording = i // len(words)
+            if question_type == 'free-response':
+                items.append(
+                    f"{i + 1}. {_STUB_FR_PROMPTS[wording % len(_STUB_FR_PROMPTS)].format(word=word, i=i + 1)}\n"
+                    f"Topic: {word.capitalize()}\n"
+                    f"Hint: Think about how {word} is introduced.\n"
+                    f"Answer: {word} is a key idea of item {i + 1}"
+                )
+            else:
+                correct = 'ABCD'[(seed + i) % 4]
+                options = '\n'.join(
+                    f"{letter}) {'Correct' if letter == correct else 'Distractor'} statement {i + 1}{letter} about {word}"
+                    for letter in 'ABCD'
+                )
+                items.append(
+                    f"{i + 1}. {_STUB_MC_PROMPTS[wording % len(_STUB_MC_PROMPTS)].format(word=word, i=i + 1)}\n{options}\n"
+                    f"Topic: {word.capitalize()}\n"
+                    f"Hint: Look for the statement that mentions {word} correctly.\n"
+                    f"Answer: {correct}"
+                )
+        lines.append('<|Q|>\n'.join(items) + '<|Q|>')
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _grade(expected, given):
+        overlap = set(_WORD_RE.findall(expected.lower())) & set(_WORD_RE.findall(given.lower()))
+        if given.strip().lower() == expected.strip().lower() and given.strip():
+            return 'Correct'
+        if overlap:
+            return 'Partially Correct'
+        return 'Incorrect'
+
+    def generate(self, prompt, temperature=0.2, max_output_tokens=2048):
+        if self.latency:
+            time.sleep(self.latency)
+        m = _COUNT_RE.search(prompt)
+        if m:
+            with_title = 'Title:' in prompt
+            return self._quiz(prompt, int(m.group(1)), m.group(2).lower(), with_title)
+        if 'ID: <item id>' in prompt:
+            return '\n'.join(
+                f"ID: {item_id}\nStatus: {self._grade(expected, given)}\n"
+                "Explanation: Stub grading compared the answer with the reference."
+                for item_id, expected, given in _BATCH_ITEM_RE.findall(prompt)
+            )
+        if 'Status: <Correct' in prompt:
+            quoted = _QUOTED_RE.search(prompt)
+            expected, given = (quoted.group(1), quoted.group(2)) if quoted else ('', '')
+            status = self._grade(expected, given)
+            return f"Status: {status}\nExplanation: Stub grading compared the answer with the reference."
+        if 'hint' in prompt.lower():
+            return f"Focus on the key term '{self._keywords(prompt, n=3)[-1]}'."
+        return "Stub response."
+
+    def stream(self, prompt, temperature=0.2, max_output_tokens=2048):
+        text = self.generate(prompt, temperature=temperature, max_output_tokens=max_output_tokens)
+        # Emit small fragments so delimiter handling across chunks is exercised
+        for i in range(0, len(text), 64):
+            yield text[i:i + 64]
+
+
+# Backend name (as chosen on the setup page) -> provider class
+PROVIDERS = {
+    'gemini': GeminiProvider,
+    'openai': OpenAIProvider,
+    'deepseek': DeepSeekProvider,
+    'stub': StubProvider,
+}
+
+# Backend used when none was recorded (sessions created before model_name existed)
+DEFAULT_MODEL = 'gemini'
+
+# Backend name -> app.config key holding the server-side API key
+API_KEY_CONFIG = {'gemini': 'GEMINI_API_KEY', 'openai': 'OPENAI_API_KEY', 'deepseek': 'DEEPSEEK_API_KEY'}
+
+# When set (LLM_PROVIDER=stub), every call uses this backend regardless of selection
+_forced_provider = None
+
+
+def configure(force_provider=None, stub_latency=None):
+    """Apply app settings: an optional provider override and the stub's simulated latency."""
+    global _forced_provider
+    if force_provider and force_provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{force_provider}'")
+    _forced_provider = force_provider or None
+    if stub_latency is not None:
+        StubProvider.latency = stub_latency
+
+
+def get_provider(model_name, api_key=None):
+    """
+    Return a provider instance for the named backend, or None when that backend
+    needs an API key and none was given.
+    """
+    name = _forced_provider or model_name or 'gemini'
+    provider_cls = PROVIDERS.get(name)
+    if provider_cls is None:
+        raise ValueError(f"Unknown LLM provider '{name}'")
+    if provider_cls.requires_key and not api_key:
+        return None
+    return provider_cls(api_key)
+
+
+def resolve_api_key(config, user_id, model_name):
+    """
+    API key for a call to model_name made for user_id: the user's saved key for
+    that backend, else the server-side key from config (None when neither exists).
+    """
+    if config.get('LLM_PROVIDER') == 'stub':
+        # The offline stub backend needs no key
+        return 'stub'
+    model_name = model_name or DEFAULT_MODEL
+    record = ApiKey.query.filter_by(user_id=user_id, model=model_name).first()
+    if record and record.key:
+        return record.key
+    return config.get(API_KEY_CONFIG.get(model_name, ''), None) or None
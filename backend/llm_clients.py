@@ -0,0 +1,123 @@
+# backend/llm_clients.py
+# Registry of long-lived, thread-safe LLM clients (GenAI SDK and httpx).
+# Building genai.Client per call throws away pooled HTTP connections and TLS
+# sessions; instead clients are created once per (api_key, model), configured
+# with a bounded httpx connection pool, shared by all threads, and closed after
+# sitting idle for idle_timeout seconds.
+
+import time
+import threading
+from collections import OrderedDict
+import httpx
+import google.genai as genai  # Google GenAI SDK for Gemini
+from google.genai import types as genai_types
+
+# Defaults: 10 pooled connections per client, evict after 5 idle minutes
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_MAX_CLIENTS = 64
+
+
+def _close_client(client):
+    """Best-effort close of a cached client (the SDK's httpx client, or a plain httpx client)."""
+    api_client = getattr(client, '_api_client', None)
+    target = getattr(api_client, '_httpx_client', None) if api_client is not None else client
+    try:
+        close = getattr(target, 'close', None)
+        if close is not None:
+            close()
+    except Exception as e:
+        print(f"[ERROR] Closing LLM client failed: {e}")
+
+
+class ClientRegistry:
+    """Thread-safe cache of LLM clients keyed by (api_key, model) with idle eviction."""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 max_clients=DEFAULT_MAX_CLIENTS, factory=None):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.max_clients = max_clients
+        self._factory = factory or self._build_genai_client
+        self._clients = OrderedDict()  # (api_key, model) -> [client, last_used]
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def configure(self, pool_size=None, idle_timeout=None, max_clients=None):
+        """Update settings; existing clients keep their pools until evicted."""
+        with self._lock:
+            if pool_size is not None:
+                self.pool_size = pool_size
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+            if max_clients is not None:
+                self.max_clients = max_clients
+
+    def _build_genai_client(self, api_key, model):
+        limits = httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size,
+            keepalive_expiry=self.idle_timeout,
+        )
+        http_options = genai_types.HttpOptions(client_args={'limits': limits})
+        return genai.Client(api_key=api_key, http_options=http_options)
+
+    def get(self, api_key, model='gemini'):
+        """Return the shared client for (api_key, model), creating it on first use."""
+        now = time.monotonic()
+        key = (api_key, model)
+        stale = []
+        with self._lock:
+            # Sweep clients idle for longer than idle_timeout (oldest are first)
+            while self._clients:
+                old_key, (old_client, last_used) = next(iter(self._clients.items()))
+                if old_key == key or now - last_used <= self.idle_timeout:
+                    break
+                del self._clients[old_key]
+                stale.append(old_client)
+            entry = self._clients.get(key)
+            if entry is not None:
+                entry[1] = now
+                self._clients.move_to_end(key)
+                self.reused += 1
+                client = entry[0]
+            else:
+                client = self._factory(api_key, model)
+                self._clients[key] = [client, now]
+                self.created += 1
+                # Bound the registry; the least recently used client goes first
+                while len(self._clients) > self.max_clients:
+                    _, (old_client, _) = self._clients.popitem(last=False)
+                    stale.append(old_client)
+            self.evicted += len(stale)
+        for old_client in stale:
+            _close_client(old_client)
+        return client
+
+    def close_all(self):
+        """Close and forget every cached client (e.g. at shutdown or in tests)."""
+        with self._lock:
+            clients = [entry[0] for entry in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            _close_client(client)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'created': self.created,
+                'reused': self.reused,
+                'evicted': self.evicted,
+            }
+
+
+# Process-wide registry of GenAI clients (used by llm.GeminiProvider)
+registry = ClientRegistry()
+
+
+def get_genai_client(api_key, model='gemini'):
+    """Shortcut for registry.get(): the pooled GenAI client for this key/model."""
+    return registry.get(api_key, model)
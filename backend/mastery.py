@@ -0,0 +1,134 @@
+# backend/mastery.py
+# Per-topic mastery estimates over a user's whole answer history.
+# The history (is_correct, answered_at, topic of every graded answer) is read
+# with one query into NumPy arrays; each topic's mastery is a Beta posterior
+# whose evidence decays with age (half-life MASTERY_HALF_LIFE_DAYS), so recent
+# answers count more than old mistakes. All per-topic sums are vectorized
+# (np.unique + np.bincount).
+# - Questions are ranked by expected learning gain: 1 - posterior mean plus
+#   the posterior standard deviation (unknown topics are worth exploring)
+# - Results are cached per user in-process; answer paths call
+#   invalidate_mastery, and MASTERY_CACHE_TTL bounds staleness in processes
+#   that do not see the answer (generation workers)
+
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from sqlalchemy import select
+from .extensions import db
+from .models import QuizQuestion, QuizSession
+from .topics import topic_key
+
+# Evidence from an answer halves every 30 days
+MASTERY_HALF_LIFE_DAYS = 30.0
+# Beta(1, 1) prior: an unseen topic has mastery 0.5 with maximal uncertainty
+PRIOR_CORRECT = 1.0
+PRIOR_WRONG = 1.0
+MASTERY_CACHE_TTL = 300
+MASTERY_CACHE_ENTRIES = 1024
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class TopicMastery:
+    """Beta posterior per topic key: alpha/beta arrays aligned with keys."""
+
+    def __init__(self, keys, alpha, beta):
+        self.keys = list(keys)
+        self.alpha = alpha
+        self.beta = beta
+        self._index = {k: i for i, k in enumerate(self.keys)}
+        total = alpha + beta
+        self.mean = alpha / total
+        self.std = np.sqrt(alpha * beta / (total * total * (total + 1.0)))
+
+    def _prior_gain(self):
+        a, b = PRIOR_CORRECT, PRIOR_WRONG
+        return 1.0 - a / (a + b) + float(np.sqrt(a * b / ((a + b) ** 2 * (a + b + 1.0))))
+
+    def mastery(self, topic):
+        """Posterior mean for a topic label (the prior mean when unseen)."""
+        i = self._index.get(topic_key(topic))
+        if i is None:
+            return PRIOR_CORRECT / (PRIOR_CORRECT + PRIOR_WRONG)
+        return float(self.mean[i])
+
+    def gains(self, topics):
+        """Expected learning gain for each topic label (array)."""
+        gain = 1.0 - self.mean + self.std
+        prior = self._prior_gain()
+        return np.array([gain[self._index[k]] if k in self._index else prior
+                         for k in (topic_key(t) for t in topics)], dtype=float)
+
+    def poor_topics(self, threshold=0.7):
+        """Topic keys whose posterior mean is below threshold."""
+        return [k for k, m in zip(self.keys, self.mean) if m < threshold]
+
+
+# ------------------------------------------------------------------------------
+# Function: estimate_mastery
+# Purpose: Vectorized recency-weighted Beta posterior per topic.
+# Inputs:
+#   - topics: topic labels, one per graded answer
+#   - correct: booleans aligned with topics
+#   - answered_at: datetimes aligned with topics
+#   - now / half_life_days: decay reference point and half-life
+# Process:
+#   - weight = 0.5 ** (age_days / half_life_days)
+#   - alpha = prior + sum(weight * correct), beta = prior + sum(weight * wrong)
+#     per topic key with np.bincount over the np.unique inverse
+# Outputs:
+#   - TopicMastery
+# ------------------------------------------------------------------------------
+def estimate_mastery(topics, correct, answered_at, now=None, half_life_days=MASTERY_HALF_LIFE_DAYS):
+    if not len(topics):
+        return TopicMastery([], np.zeros(0), np.zeros(0))
+    now = np.datetime64(now or datetime.utcnow(), 's')
+    keys, inverse = np.unique(np.array([topic_key(t) for t in topics], dtype=object).astype(str),
+                              return_inverse=True)
+    ok = np.asarray(correct, dtype=float)
+    age_days = (now - np.asarray(answered_at, dtype='datetime64[s]')).astype(float) / 86400.0
+    weight = np.power(0.5, np.clip(age_days, 0, None) / half_life_days)
+    alpha = PRIOR_CORRECT + np.bincount(inverse, weights=weight * ok, minlength=len(keys))
+    beta = PRIOR_WRONG + np.bincount(inverse, weights=weight * (1.0 - ok), minlength=len(keys))
+    return TopicMastery(keys.tolist(), alpha, beta)
+
+
+def load_history(user_id):
+    """(topics, is_correct, answered_at) of the user's graded, topic-tagged answers (one query)."""
+    rows = db.session.execute(
+        select(QuizQuestion.topic, QuizQuestion.is_correct, QuizQuestion.answered_at)
+        .join(QuizSession, QuizSession.id == QuizQuestion.session_id)
+        .where(QuizSession.user_id == user_id, QuizQuestion.is_correct.is_not(None),
+               QuizQuestion.answered_at.is_not(None), QuizQuestion.topic.is_not(None))
+    ).all()
+    if not rows:
+        return [], [], []
+    topics, correct, answered_at = zip(*rows)
+    return topics, correct, answered_at
+
+
+def get_mastery(user_id, ttl=MASTERY_CACHE_TTL):
+    """The user's TopicMastery, from the per-user cache when fresh."""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(user_id)
+        if entry is not None and entry[0] > now:
+            _cache.move_to_end(user_id)
+            return entry[1]
+    result = estimate_mastery(*load_history(user_id))
+    with _cache_lock:
+        _cache[user_id] = (now + ttl, result)
+        _cache.move_to_end(user_id)
+        while len(_cache) > MASTERY_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+
+def invalidate_mastery(user_id):
+    """Drop a user's cached mastery (call when an answer is recorded or graded)."""
+    with _cache_lock:
+        _cache.pop(user_id, None)
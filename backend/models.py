@@ -62,6 +62,8 @@ class ApiKey(db.Model):
 # Columns:
 # - id: unique primary key
 # - user_id: links to User.id to attribute the session
+# - model_name: LLM backend chosen at setup; grading, explanations, hints and
+#   follow-ups for this quiz use it too (NULL: llm.DEFAULT_MODEL)
 # - created_at: timestamp when the quiz session started
 # Relationships:
 # - questions: list of QuizQuestion records in this session
@@ -75,10 +77,13 @@ class QuizSession(db.Model):
     num_questions = db.Column(db.Integer, nullable=False, default=20)
     title = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(20), nullable=False, default='in_progress')
+    model_name = db.Column(db.String(32), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     questions = db.relationship('QuizQuestion', backref='session', lazy=True)
     messages = db.relationship('ChatMessage', backref='session', lazy=True)
+    # Session history is always listed per user, newest first
+    __table_args__ = (db.Index('ix_quiz_sessions_user_created', 'user_id', 'created_at'),)
 
 # ------------------------------------------------------------------------------
 # QuizQuestion Model
@@ -89,7 +94,10 @@ class QuizSession(db.Model):
 # - index: numeric order of question within session
 # - prompt: text of the quiz question
 # - user_answer: the response submitted by the user
+# - eval_status: stored AI grading verdict for free-response answers
 # - created_at: timestamp when the question was generated/answered
+# - repeat_of_id: an earlier answered question of the same user this one
+#   near-duplicates, if any
 # ------------------------------------------------------------------------------
 class QuizQuestion(db.Model):
     __tablename__ = 'quiz_questions'
@@ -104,8 +112,96 @@ class QuizQuestion(db.Model):
     hint = db.Column(db.Text, nullable=True)
     explanation = db.Column(db.Text, nullable=True)
     is_correct = db.Column(db.Boolean, nullable=True)
+    # AI grading verdict ('Correct', 'Partially Correct', 'Incorrect'); NULL until graded
+    eval_status = db.Column(db.String(32), nullable=True)
     answered_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    repeat_of_id = db.Column(db.Integer, db.ForeignKey('quiz_questions.id', name='fk_quiz_questions_repeat_of_id'),
+                             nullable=True)
+    # Questions are always fetched per session in question order
+    __table_args__ = (db.Index('ix_quiz_questions_session_index', 'session_id', 'question_index'),)
+
+# ------------------------------------------------------------------------------
+# QuestionBucket Model
+# Per-user LSH index of question prompts for near-duplicate detection; one
+# row per question and MinHash band (see dedup.py).
+# Columns:
+# - user_id: owner of the question
+# - bucket: signed 64-bit hash of one band of the prompt's MinHash signature
+# - session_id / question_index: the indexed QuizQuestion
+# ------------------------------------------------------------------------------
+class QuestionBucket(db.Model):
+    __tablename__ = 'question_lsh_buckets'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('quiz_sessions.id'), nullable=False)
+    question_index = db.Column(db.Integer, nullable=False)
+    # Lookups are WHERE user_id = ? AND bucket IN (...); session_id for deletes
+    __table_args__ = (db.Index('ix_question_lsh_buckets_user_bucket', 'user_id', 'bucket'),
+                      db.Index('ix_question_lsh_buckets_session', 'session_id'))
+
+# ------------------------------------------------------------------------------
+# ReviewCard Model
+# Spaced-repetition (SM-2) state of one question for one user; see review.py.
+# Columns:
+# - question_id: the card's question (the first of its near-duplicate repeats)
+# - last_question_id: the QuizQuestion row whose answer was applied last
+# - ease / interval (days) / repetitions / lapses: SM-2 state
+# - due_at: when the card is next due; reviewed_at: last update
+# ------------------------------------------------------------------------------
+class ReviewCard(db.Model):
+    __tablename__ = 'review_cards'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_questions.id'), nullable=False)
+    last_question_id = db.Column(db.Integer, db.ForeignKey('quiz_questions.id'), nullable=True)
+    ease = db.Column(db.Float, nullable=False, default=2.5)
+    interval = db.Column(db.Float, nullable=False, default=0)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)
+    lapses = db.Column(db.Integer, nullable=False, default=0)
+    due_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    reviewed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # One card per (user, question); review sessions read the due queue per user
+    __table_args__ = (db.Index('uq_review_cards_user_question', 'user_id', 'question_id', unique=True),
+                      db.Index('ix_review_cards_user_due', 'user_id', 'due_at'))
+
+# ------------------------------------------------------------------------------
+# DailyStats / DailyTopicStats Models
+# Per-user (and per-user, per-topic) daily answer rollups behind /analytics;
+# updated by an upsert as each answer lands (see analytics.py), never by
+# rescanning quiz_questions.
+# Columns:
+# - day: UTC date of answered_at
+# - answers: answers submitted; answer_seconds: sum of answered_at - created_at
+# - graded / correct: answers with a verdict, and how many were correct
+# ------------------------------------------------------------------------------
+class DailyStats(db.Model):
+    __tablename__ = 'daily_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    answers = db.Column(db.Integer, nullable=False, default=0)
+    graded = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    answer_seconds = db.Column(db.Float, nullable=False, default=0)
+    # One row per (user, day); dashboard reads are range scans of it
+    __table_args__ = (db.Index('uq_daily_stats_user_day', 'user_id', 'day', unique=True),)
+
+
+class DailyTopicStats(db.Model):
+    __tablename__ = 'daily_topic_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    topic = db.Column(db.String(255), nullable=False)
+    answers = db.Column(db.Integer, nullable=False, default=0)
+    graded = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    answer_seconds = db.Column(db.Float, nullable=False, default=0)
+    # One row per (user, day, topic)
+    __table_args__ = (db.Index('uq_daily_topic_stats_user_day_topic', 'user_id', 'day', 'topic', unique=True),)
 
 # ----------------------------------------------------------------------------
 # ChatMessage Model: free-form chat logs for sessions
@@ -127,3 +223,61 @@ class TopicPerformance(db.Model):
     attempts = db.Column(db.Integer, default=0)
     correct = db.Column(db.Integer, default=0)
     # Tracks how many times a user has attempted and answered correctly for a topic
+    # One row per (user, topic); also serves per-user lookups
+    __table_args__ = (db.Index('uq_topic_performance_user_topic', 'user_id', 'topic', unique=True),)
+
+# ------------------------------------------------------------------------------
+# GenerationJob Model
+# A queued quiz-generation request, processed outside the web request by the
+# `flask worker` process pool (or the in-process fallback).
+# Columns:
+# - status: 'queued' -> 'running' -> 'done' | 'failed'
+# - model_name / question_type / num_questions: generation options from setup
+# - content: pasted text; uploads: [{'path', 'filename'}] spooled upload files
+# - session_id: the QuizSession being filled (set once generation starts)
+# - error: user-facing failure message
+# - attempts: times a worker has claimed the job
+# - cache_hit: whether the quiz came from the generated-quiz cache (NULL when
+#   the job ended before the cache was consulted)
+# ------------------------------------------------------------------------------
+class GenerationJob(db.Model):
+    __tablename__ = 'generation_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    model_name = db.Column(db.String(32), nullable=False, default='gemini')
+    question_type = db.Column(db.String(20), nullable=False, default='multiple_choice')
+    num_questions = db.Column(db.Integer, nullable=False, default=20)
+    content = db.Column(db.Text, nullable=True)
+    uploads = db.Column(db.JSON, nullable=False, default=list)
+    session_id = db.Column(db.Integer, db.ForeignKey('quiz_sessions.id'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    cache_hit = db.Column(db.Boolean, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Workers claim the oldest queued job: WHERE status = ? ORDER BY id
+    __table_args__ = (db.Index('ix_generation_jobs_status_id', 'status', 'id'),)
+
+# ------------------------------------------------------------------------------
+# CachedQuiz Model
+# A generated quiz kept for reuse by identical generation requests (same
+# normalized content, question type, count and model); see quiz_cache.py.
+# Columns:
+# - cache_key: SHA-256 of the normalized content plus generation parameters
+# - title / questions: the quiz as [{'prompt', 'options', 'answer', 'hint', 'topic'}]
+# - hits: times the entry has been served
+# - last_used_at: recency for LRU eviction; created_at: age for the TTL
+# ------------------------------------------------------------------------------
+class CachedQuiz(db.Model):
+    __tablename__ = 'cached_quizzes'
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), nullable=False, unique=True)
+    title = db.Column(db.String(255), nullable=True)
+    questions = db.Column(db.JSON, nullable=False)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Eviction deletes the least recently used entries first
+    __table_args__ = (db.Index('ix_cached_quizzes_last_used', 'last_used_at'),)
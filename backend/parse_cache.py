@@ -0,0 +1,145 @@
+# backend/parse_cache.py
+# Content-addressed cache for text extracted from uploaded files.
+# Keys are SHA-256 digests of the uploaded bytes plus the parser name/version,
+# so re-uploading the same deck skips parsing entirely and a parser upgrade
+# (version bump) naturally invalidates old entries.
+#
+# Two tiers:
+# - an in-process LRU (OrderedDict) for the hottest entries
+# - a size-bounded on-disk store under instance/ shared by all workers;
+#   least-recently-used files (by mtime, refreshed on every hit) are evicted
+#   once the store grows past max_bytes
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Defaults: 128 entries in memory, 256 MB on disk
+DEFAULT_MEMORY_ENTRIES = 128
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ParseCache:
+    """Two-tier (memory LRU + disk) cache of parsed upload text with hit/miss counters."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # computed lazily on first write
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(data, parser, version):
+        """Build the cache key for raw upload bytes parsed by `parser` at `version`."""
+        digest = hashlib.sha256()
+        digest.update(f"{parser}:{version}:".encode('utf-8'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key_for_stream(stream, parser, version, block_size=1 << 20):
+        """key_for() of a seekable binary stream, hashed in blocks and rewound."""
+        digest = hashlib.sha256()
+        digest.update(f"{parser}:{version}:".encode('utf-8'))
+        stream.seek(0)
+        for block in iter(lambda: stream.read(block_size), b''):
+            digest.update(block)
+        stream.seek(0)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def _remember(self, key, text):
+        # Insert/promote in the in-process LRU, dropping the oldest entry if full
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return cached text for key or None (counts a hit or a miss)."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)  # refresh recency for LRU eviction on disk
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, text)
+        return text
+
+    def set(self, key, text):
+        """Store text under key in memory and on disk, evicting old files if needed."""
+        with self._lock:
+            self._remember(key, text)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            existing = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)  # atomic, so readers never see partial files
+            with self._lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = self._scan_disk_bytes()
+                else:
+                    self._disk_bytes += os.path.getsize(path) - existing
+                if self._disk_bytes > self.max_bytes:
+                    self._evict_disk()
+        except OSError as e:
+            print(f"[ERROR] Parse cache write failed: {e}")
+
+    def _scan_disk_bytes(self):
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.txt'):
+                total += entry.stat().st_size
+        return total
+
+    def _evict_disk(self):
+        # Remove least-recently-used files until the store is back under budget
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith('.txt')]
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries:
+            if self._disk_bytes <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+            self.evictions += 1
+            self._memory.pop(entry.name[:-len('.txt')], None)
+
+    def stats(self):
+        """Return counters for monitoring: hits, disk_hits, misses, evictions, hit_rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'memory_entries': len(self._memory),
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            }
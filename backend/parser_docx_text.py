@@ -1,15 +1,20 @@
 import io
 from docx import Document
+from .upload_io import join_text
+
+# Bump when the extracted text changes so cached results are invalidated
+PARSER_VERSION = 1
 
 # ----------------------------------------------------------------------------
 # Function: docx_to_text
 # Purpose: Extract all text from a DOCX file-like object and return as a string
 # Inputs:
 #   - file: a FileStorage or file-like object representing the uploaded .docx
+#   - max_chars: truncate the text to this many characters (None = all)
 # Outputs:
 #   - A single string containing the concatenated text of all paragraphs
 # ----------------------------------------------------------------------------
-def docx_to_text(file):
+def docx_to_text(file, max_chars=None):
     # Read file bytes
     data = file.read()
     # Reset file pointer
@@ -19,8 +24,5 @@ def docx_to_text(file):
         pass
     # Load DOCX document from bytes
     doc = Document(io.BytesIO(data))
-    texts = []
-    for para in doc.paragraphs:
-        if para.text and para.text.strip():
-            texts.append(para.text.strip())
-    return "\n\n".join(texts) 
\ No newline at end of file
+    texts = (para.text.strip() for para in doc.paragraphs if para.text and para.text.strip())
+    return join_text(texts, max_chars) 
\ No newline at end of file
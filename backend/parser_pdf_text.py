@@ -1,27 +1,35 @@
-import io
 from PyPDF2 import PdfReader
+from .upload_io import open_upload, join_text
+
+# Bump when the extracted text changes so cached results are invalidated
+PARSER_VERSION = 1
+
+# ----------------------------------------------------------------------------
+# Function: iter_pdf_text
+# Purpose: Yield the text of each PDF page in order
+# Inputs:
+#   - file: a path, FileStorage or file-like object holding the PDF
+# Outputs:
+#   - Page texts (empty pages skipped); the PDF is read in place (memory-mapped
+#     when it is a file on disk), never copied into memory as a whole
+# ----------------------------------------------------------------------------
+def iter_pdf_text(file):
+    with open_upload(file, use_mmap=True) as stream:
+        reader = PdfReader(stream)
+        for page in reader.pages:
+            text = page.extract_text()
+            if text:
+                yield text
+
 
 # ----------------------------------------------------------------------------
 # Function: pdf_to_text
 # Purpose: Extract all text from a PDF file-like object and return as a string
 # Inputs:
 #   - file: a FileStorage/file-like object representing the uploaded PDF
+#   - max_chars: stop reading pages once this much text is gathered (None = all)
 # Outputs:
-#   - A single string containing the concatenated text of all pages
+#   - A single string containing the concatenated text of the pages
 # ----------------------------------------------------------------------------
-def pdf_to_text(file):
-    # Read file bytes
-    data = file.read()
-    # Reset file pointer
-    try:
-        file.seek(0)
-    except Exception:
-        pass
-    # Load PDF reader
-    reader = PdfReader(io.BytesIO(data))
-    texts = []
-    for page in reader.pages:
-        text = page.extract_text()
-        if text:
-            texts.append(text)
-    return "\n\n".join(texts) 
\ No newline at end of file
+def pdf_to_text(file, max_chars=None):
+    return join_text(iter_pdf_text(file), max_chars)
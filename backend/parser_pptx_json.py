@@ -1,56 +1,133 @@
 # backend/parser_pptx_json.py
 # Module to convert a .pptx file into a structured JSON format.
 # Uses Python's built-in zipfile and xml.etree for low-level PPTX parsing.
+# Slide XML is streamed with iterparse and only DrawingML text runs (a:t) are
+# read; runs are joined per paragraph (a:p) and parsed elements are cleared.
 
+import io
+import re
 import zipfile
+import posixpath
 import xml.etree.ElementTree as ET
 
+# Bump when the extracted text changes so cached results are invalidated
+PARSER_VERSION = 2
+
+# DrawingML / PresentationML / package relationship namespaces
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_A_T = _A + 't'
+_A_P = _A + 'p'
+_P_SP = _P + 'sp'
+_P_PH = _P + 'ph'
+# Elements cleared once parsed: paragraphs and the shapes holding them
+_CLEAR = {_A_P, _P_SP, _P + 'graphicFrame', _P + 'pic', _P + 'cxnSp'}
+# Notes-page placeholders that hold page furniture rather than the speaker's notes
+_NOTES_CHROME = {'sldImg', 'sldNum', 'hdr', 'ftr', 'dt'}
+_NOTES_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide'
+
+_SLIDE_RE = re.compile(r'^ppt/slides/slide(\d+)\.xml$')
+
+
+# ------------------------------------------------------------------------------
+# Function: iter_pptx_slides
+# Purpose: Yield the slides of a PPTX one at a time, in slide-number order.
+# Inputs:
+#   - pptx_file: a path, FileStorage or file-like object holding the .pptx
+#   - include_notes: also read each slide's speaker notes
+# Process:
+#   - Select 'ppt/slides/slideN.xml' entries and sort them by N (zip order
+#     would put slide10 before slide2)
+#   - Stream each slide's XML from the archive through parse_slide
+#   - Notes are found through the slide's relationships part
+# Outputs:
+#   - slide_json dicts: {'text': [...]} plus 'notes': [...] when requested
+# ------------------------------------------------------------------------------
+def iter_pptx_slides(pptx_file, include_notes=False):
+    with zipfile.ZipFile(getattr(pptx_file, 'stream', pptx_file), 'r') as pptx:
+        names = set(pptx.namelist())
+        slides = []
+        for name in names:
+            match = _SLIDE_RE.match(name)
+            if match:
+                slides.append((int(match.group(1)), name))
+        for _, name in sorted(slides):
+            with pptx.open(name) as fh:
+                slide_json = parse_slide(fh)
+            if include_notes:
+                notes = _notes_part(pptx, names, name)
+                slide_json["notes"] = []
+                if notes is not None:
+                    with pptx.open(notes) as fh:
+                        slide_json["notes"] = parse_slide(fh, notes_page=True)["text"]
+            yield slide_json
+
+
+def _notes_part(pptx, names, slide_name):
+    """Archive path of a slide's notes part (from its .rels), or None."""
+    folder, base = posixpath.split(slide_name)
+    rels = f"{folder}/_rels/{base}.rels"
+    if rels not in names:
+        return None
+    root = ET.fromstring(pptx.read(rels))
+    for rel in root.iter(_REL + 'Relationship'):
+        if rel.get('Type') == _NOTES_REL_TYPE:
+            target = posixpath.normpath(posixpath.join(folder, rel.get('Target', '')))
+            return target if target in names else None
+    return None
+
+
 # ------------------------------------------------------------------------------
 # Function: pptx_to_json
 # Purpose: Read the uploaded PPTX file, extract slide XML, and convert each slide to JSON.
 # Inputs:
 #   - pptx_file: a FileStorage or file-like object representing the uploaded .pptx
-# Process:
-#   - Open PPTX as a zip archive
-#   - Iterate through all files in the archive
-#   - Identify slide XML files by path: 'ppt/slides/slideN.xml'
-#   - Parse each slide XML and extract its text content
+#   - include_notes: add each slide's speaker notes under 'notes'
 # Outputs:
 #   - A dict with a 'slides' key containing a list of slide_json objects
 # ------------------------------------------------------------------------------
-def pptx_to_json(pptx_file):
-    pptx_json = {"slides": []}
-
-    # Open PPTX package as zip to access individual slide XML
-    with zipfile.ZipFile(pptx_file, 'r') as pptx:
-        for filename in pptx.namelist():
-            # Select slide XML files only (ignoring notes, media, etc.)
-            if filename.startswith('ppt/slides/slide') and filename.endswith('.xml'):
-                slide_data = pptx.read(filename)  # Binary XML data
-                slide_json = parse_slide(slide_data)
-                pptx_json["slides"].append(slide_json)
-    return pptx_json
+def pptx_to_json(pptx_file, include_notes=False):
+    return {"slides": list(iter_pptx_slides(pptx_file, include_notes=include_notes))}
+
 
 # ------------------------------------------------------------------------------
 # Function: parse_slide
-# Purpose: Extract all text elements from a slide's XML data.
+# Purpose: Extract the text paragraphs from a slide's (or notes page's) XML.
 # Inputs:
-#   - slide_data: raw XML bytes for one slide
+#   - slide_data: raw XML bytes or a binary stream for one slide
+#   - notes_page: skip the slide image, slide number, header, footer and date
+#     placeholders of a notes page
 # Process:
-#   - Parse XML into an ElementTree
-#   - Iterate through all elements; detect text tags by tag suffix 't'
-#   - Collect non-empty element text values
+#   - iterparse the XML; collect a:t runs and join them at each a:p end
+#   - Clear paragraphs and shapes once handled so memory stays flat on large
+#     slides (start events are only needed to see a notes shape's placeholder)
 # Outputs:
-#   - A dict with 'text': a list of strings for each text element
+#   - A dict with 'text': a list of non-empty paragraph strings
 # ------------------------------------------------------------------------------
-def parse_slide(slide_data):
+def parse_slide(slide_data, notes_page=False):
     slide_json = {"text": []}
-    root = ET.fromstring(slide_data)  # Parse XML from bytes
-
-    # Walk through every element in the slide XML
-    for element in root.iter():
-        # In the PPTX namespace, text tags end with '}t'
-        if 't' in element.tag and element.text:
-            slide_json["text"].append(element.text)
-
-    return slide_json
\ No newline at end of file
+    if isinstance(slide_data, (bytes, bytearray)):
+        slide_data = io.BytesIO(slide_data)
+    runs = []
+    placeholder = None
+    events = ('start', 'end') if notes_page else ('end',)
+    for event, element in ET.iterparse(slide_data, events=events):
+        tag = element.tag
+        if event == 'start':
+            if tag == _P_SP:
+                placeholder = None
+            elif tag == _P_PH:
+                placeholder = element.get('type')
+            continue
+        if tag == _A_T:
+            if element.text:
+                runs.append(element.text)
+        elif tag == _A_P:
+            line = ''.join(runs)
+            runs = []
+            if line.strip() and not (notes_page and placeholder in _NOTES_CHROME):
+                slide_json["text"].append(line)
+        if tag in _CLEAR:
+            element.clear()
+    return slide_json
@@ -1,29 +1,40 @@
-import io
 from openpyxl import load_workbook
+from .upload_io import open_upload, join_text
+
+# Bump when the extracted text changes so cached results are invalidated
+PARSER_VERSION = 1
+
+# ----------------------------------------------------------------------------
+# Function: iter_xlsx_text
+# Purpose: Yield one line of text per non-empty spreadsheet row
+# Inputs:
+#   - file: a path, FileStorage or file-like object holding the .xlsx
+# Outputs:
+#   - Row texts, sheet by sheet; the workbook is opened read-only so rows are
+#     streamed from the archive instead of loading every sheet
+# ----------------------------------------------------------------------------
+def iter_xlsx_text(file):
+    with open_upload(file) as stream:
+        wb = load_workbook(stream, read_only=True)
+        try:
+            for sheet in wb.worksheets:
+                for row in sheet.iter_rows(values_only=True):
+                    # Join non-empty cell values
+                    row_vals = [str(cell) for cell in row if cell is not None]
+                    if row_vals:
+                        yield ' '.join(row_vals)
+        finally:
+            wb.close()
+
 
 # ----------------------------------------------------------------------------
 # Function: xlsx_to_text
 # Purpose: Extract all text from an XLSX file-like object and return as a string
 # Inputs:
 #   - file: a FileStorage or file-like object representing the uploaded .xlsx
+#   - max_chars: stop reading rows once this much text is gathered (None = all)
 # Outputs:
-#   - A single string containing concatenated text from all sheets and rows
+#   - A single string containing concatenated text from the sheets and rows
 # ----------------------------------------------------------------------------
-def xlsx_to_text(file):
-    # Read file bytes
-    data = file.read()
-    # Reset file pointer
-    try:
-        file.seek(0)
-    except Exception:
-        pass
-    # Load workbook in read-only mode
-    wb = load_workbook(io.BytesIO(data), read_only=True)
-    texts = []
-    for sheet in wb.worksheets:
-        for row in sheet.iter_rows(values_only=True):
-            # Join non-empty cell values
-            row_vals = [str(cell) for cell in row if cell is not None]
-            if row_vals:
-                texts.append(' '.join(row_vals))
-    return "\n\n".join(texts) 
\ No newline at end of file
+def xlsx_to_text(file, max_chars=None):
+    return join_text(iter_xlsx_text(file), max_chars)
@@ -0,0 +1,94 @@
+# backend/persistence.py
+# Shared write path for new quiz sessions.
+# A session and all of its questions are written in one transaction, with the
+# questions sent as a single executemany INSERT instead of one ORM add() each.
+# Near-duplicate questions are dropped on the way in (see dedup.py).
+
+from sqlalchemy import insert
+from .extensions import db
+from .models import QuizSession, QuizQuestion, QuestionBucket
+from .dedup import check_questions, index_rows, shingles, band_keys_batch
+from .topics import canonicalize_topics
+
+
+# ------------------------------------------------------------------------------
+# Function: insert_questions
+# Purpose: Bulk INSERT ParsedQuestion records as rows start_index.. of a session.
+# Inputs:
+#   - user_id: owner of the session (near-duplicate index is per user)
+#   - session_id: target QuizSession.id
+#   - questions: ordered ParsedQuestion records
+#   - start_index: question_index of the first new row
+#   - dedup: False for copies of stored questions (retries, reviews), which
+#     cannot be new duplicates and already name their source in repeat_of
+# Process:
+#   - check_questions drops near-duplicates of questions already in the
+#     session or earlier in the batch, and finds repeats of answered questions;
+#     copies are only indexed
+#   - Topic labels are mapped onto the user's topic vocabulary
+#   - One executemany for the question rows, one (Core) for their LSH bucket rows
+#   - No commit; the caller owns the transaction
+# Outputs:
+#   - Number of rows inserted
+# ------------------------------------------------------------------------------
+def insert_questions(user_id, session_id, questions, start_index=0, dedup=True):
+    if not questions:
+        return 0
+    if dedup:
+        kept = check_questions(user_id, session_id, questions)
+    else:
+        keys = band_keys_batch([shingles(q.prompt) for q in questions])
+        kept = [(q, k, None) for q, k in zip(questions, keys)]
+    if not kept:
+        return 0
+    canonicalize_topics(user_id, [q for q, _, _ in kept])
+    db.session.execute(insert(QuizQuestion), [
+        {
+            'session_id': session_id,
+            'question_index': start_index + offset,
+            'prompt': q.prompt,
+            'options': q.options,
+            'correct_answer': q.answer,
+            'hint': q.hint,
+            'topic': q.topic,
+            'repeat_of_id': q.repeat_of or repeat_of,
+        }
+        for offset, (q, _, repeat_of) in enumerate(kept)
+    ])
+    db.session.execute(QuestionBucket.__table__.insert(),
+                       index_rows(user_id, session_id, start_index, [keys for _, keys, _ in kept]))
+    return len(kept)
+
+
+# ------------------------------------------------------------------------------
+# Function: create_quiz_session
+# Purpose: Persist a QuizSession and its questions in one transaction.
+# Inputs:
+#   - user_id: owner of the new session
+#   - questions: ordered list of quiz_parser.ParsedQuestion records
+#   - dedup: passed to insert_questions (False for retry/review copies)
+#   - **session_fields: extra QuizSession columns (session_type, question_type,
+#     title, status, ...); num_questions defaults to the number of questions
+#     kept after near-duplicates are dropped
+# Process:
+#   - Add the session and flush to obtain its id (no commit yet)
+#   - Bulk INSERT all question rows with one executemany (insert_questions)
+#   - Commit once; on error roll back so no half-written quiz remains
+# Outputs:
+#   - The committed QuizSession
+# ------------------------------------------------------------------------------
+def create_quiz_session(user_id, questions, dedup=True, **session_fields):
+    count_given = 'num_questions' in session_fields
+    session_fields.setdefault('num_questions', len(questions))
+    quiz = QuizSession(user_id=user_id, **session_fields)
+    try:
+        db.session.add(quiz)
+        db.session.flush()
+        saved = insert_questions(user_id, quiz.id, questions, dedup=dedup)
+        if not count_given:
+            quiz.num_questions = saved
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return quiz
@@ -0,0 +1,117 @@
+# backend/quiz_cache.py
+# Cache of generated quizzes shared by all workers (stored in the database).
+# When several students upload the same deck with the same question type,
+# count and model, the first generation job stores its quiz and later jobs
+# reuse it instead of calling the model again.
+# - Key: SHA-256 of the whitespace-normalized source text plus the generation
+#   parameters and QUIZ_CACHE_VERSION (bump it when the prompt changes)
+# - Entries expire QUIZ_CACHE_TTL seconds after creation; beyond
+#   QUIZ_CACHE_MAX_ENTRIES the least recently used entries are evicted
+# - Hit rate is computed from GenerationJob.cache_hit, so it covers every worker
+
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from .extensions import db
+from .models import CachedQuiz, GenerationJob, QuizQuestion
+from .quiz_parser import ParsedQuestion
+
+QUIZ_CACHE_VERSION = 2
+# One week, 1000 quizzes
+QUIZ_CACHE_TTL = 7 * 24 * 3600
+QUIZ_CACHE_MAX_ENTRIES = 1000
+
+
+def quiz_cache_key(content, question_type, num_questions, model_name):
+    """Cache key for a generation request; whitespace differences do not matter."""
+    digest = hashlib.sha256()
+    digest.update(f"{QUIZ_CACHE_VERSION}:{model_name}:{question_type}:{num_questions}:".encode('utf-8'))
+    digest.update(' '.join(content.split()).encode('utf-8'))
+    return digest.hexdigest()
+
+
+# ------------------------------------------------------------------------------
+# Function: get_cached_quiz
+# Purpose: Look up a cached quiz and count the hit.
+# Inputs:
+#   - key: quiz_cache_key(...)
+#   - ttl: maximum entry age in seconds
+# Process:
+#   - Expired entries are deleted and reported as a miss
+#   - On a hit, bump hits/last_used_at and commit
+# Outputs:
+#   - (title, [ParsedQuestion]) with fresh records per call, or None
+# ------------------------------------------------------------------------------
+def get_cached_quiz(key, ttl=QUIZ_CACHE_TTL):
+    entry = db.session.execute(select(CachedQuiz).where(CachedQuiz.cache_key == key)).scalar()
+    if entry is None:
+        return None
+    now = datetime.utcnow()
+    if entry.created_at < now - timedelta(seconds=ttl):
+        db.session.delete(entry)
+        db.session.commit()
+        return None
+    title, questions = entry.title, entry.questions
+    db.session.execute(
+        update(CachedQuiz).where(CachedQuiz.id == entry.id)
+        .values(hits=CachedQuiz.hits + 1, last_used_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return title, [ParsedQuestion(q['prompt'], dict(q['options']), q['answer'], q.get('hint'), q.get('topic'))
+                   for q in questions]
+
+
+# ------------------------------------------------------------------------------
+# Function: store_session_quiz
+# Purpose: Cache the questions of a freshly generated QuizSession.
+# Inputs:
+#   - key: quiz_cache_key(...) of the generation request
+#   - session_id: the session the job filled; title: its title
+#   - max_entries: LRU bound on the cache size
+# Process:
+#   - Read the saved questions in question order (works for every generation
+#     path: streamed, chunked or single call)
+#   - Insert the entry; a concurrent insert of the same key is ignored
+#   - Delete the least recently used entries beyond max_entries
+# ------------------------------------------------------------------------------
+def store_session_quiz(key, session_id, title, max_entries=QUIZ_CACHE_MAX_ENTRIES):
+    rows = db.session.execute(
+        select(QuizQuestion).where(QuizQuestion.session_id == session_id).order_by(QuizQuestion.question_index)
+    ).scalars().all()
+    if not rows:
+        return
+    questions = [{'prompt': q.prompt, 'options': q.options, 'answer': q.correct_answer,
+                  'hint': q.hint, 'topic': q.topic} for q in rows]
+    try:
+        db.session.add(CachedQuiz(cache_key=key, title=title, questions=questions))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return
+    # LIMIT inside a derived table, since MySQL rejects it directly in NOT IN (...)
+    keep = (select(CachedQuiz.id).order_by(CachedQuiz.last_used_at.desc(), CachedQuiz.id.desc())
+            .limit(max_entries).subquery())
+    result = db.session.execute(
+        delete(CachedQuiz).where(CachedQuiz.id.not_in(select(keep.c.id)))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount:
+        print(f"[DEBUG] Quiz cache evicted {result.rowcount} entries")
+
+
+def quiz_cache_stats():
+    """Entry count plus hits/misses/hit_rate over all generation jobs that consulted the cache."""
+    hits, lookups = db.session.execute(
+        select(func.count(GenerationJob.id).filter(GenerationJob.cache_hit.is_(True)),
+               func.count(GenerationJob.id)).where(GenerationJob.cache_hit.is_not(None))
+    ).one()
+    entries = db.session.execute(select(func.count(CachedQuiz.id))).scalar()
+    return {
+        'entries': entries,
+        'hits': hits,
+        'misses': lookups - hits,
+        'hit_rate': (hits / lookups) if lookups else 0.0,
+    }
@@ -0,0 +1,140 @@
+# backend/quiz_parser.py
+# Parser for LLM quiz output in QuizPro's '<|Q|>'-delimited text format.
+# - All patterns are compiled once at import time
+# - Each question block is scanned line by line in a single pass, with one
+#   combined regex classifying option / hint / answer lines
+# - Returns typed ParsedQuestion records for multiple-choice and free-response
+#
+# Expected block format (one block per question, blocks separated by '<|Q|>'):
+#   1. Question text
+#   A) Option A  ...  D) Option D     (multiple-choice only)
+#   Topic: short topic label          (optional)
+#   Hint: brief hint
+#   Answer: X  |  Answer: complete answer text
+
+import re
+from dataclasses import dataclass, field
+
+# Delimiter the model is asked to place after every question
+QUESTION_DELIMITER = '<|Q|>'
+
+# Leading question number ("12. ")
+_NUMBER_RE = re.compile(r'^\d+\.\s*')
+# One pattern per line: an A-D option, a Topic, Hint or Answer line
+_LINE_RE = re.compile(
+    r'(?P<letter>[A-D])[).:]\s*(?P<option>.*)'
+    r'|(?i:topic):\s*(?P<topic>.*)'
+    r'|(?i:hint)[:\s]*(?P<hint>.*)'
+    r'|(?i:answer)[:\s]*(?P<answer>.*)'
+)
+# MC answers are sometimes embedded mid-line ("The Answer: C")
+_MC_ANSWER_RE = re.compile(r'Answer[:\s]*([A-D])', re.IGNORECASE)
+
+
+@dataclass
+class ParsedQuestion:
+    """One parsed quiz question. MC questions carry four options keyed A-D;
+    free-response (and malformed MC) questions have empty options. Copies of a
+    stored question (retries, reviews) carry its id in repeat_of."""
+    prompt: str
+    options: dict = field(default_factory=dict)
+    answer: str = ''
+    hint: str = None
+    topic: str = None
+    repeat_of: int = None
+
+
+def strip_number(text):
+    """Remove a leading '<n>. ' question number."""
+    return _NUMBER_RE.sub('', text, count=1)
+
+
+def split_title(text):
+    """Split a leading 'Title: ...' line off generated text. Returns (title or None, rest)."""
+    stripped = text.lstrip()
+    lines = stripped.splitlines()
+    if lines and lines[0].lower().startswith('title:'):
+        return lines[0].split(':', 1)[1].strip(), '\n'.join(lines[1:])
+    return None, text
+
+
+# ------------------------------------------------------------------------------
+# Function: parse_question_item
+# Purpose: Parse one '<|Q|>'-separated block into a ParsedQuestion.
+# Inputs:
+#   - item: raw text of one question
+#   - question_type: 'multiple_choice' or 'free_response'
+# Process:
+#   - First non-blank line is the prompt (question number stripped)
+#   - Remaining lines are classified once by _LINE_RE:
+#     MC keeps the last A-D answer seen; free-response keeps the first answer
+#     (so a Topic line must come before it)
+# Outputs:
+#   - ParsedQuestion, or None for an empty block. MC blocks without exactly
+#     four options and an answer come back with options={} and answer=''
+# ------------------------------------------------------------------------------
+def parse_question_item(item, question_type):
+    lines = [l.strip() for l in item.splitlines()]
+    lines = [l for l in lines if l]
+    # A bare number line ("1.") is not the prompt; the text may follow on the next line
+    while lines and not strip_number(lines[0]):
+        lines.pop(0)
+    if not lines:
+        return None
+    prompt = strip_number(lines[0])
+    multiple_choice = question_type == 'multiple_choice'
+    options = {}
+    answer = None
+    hint = None
+    topic = None
+    for line in lines[1:]:
+        m = _LINE_RE.match(line)
+        if m is None:
+            if multiple_choice:
+                m_ans = _MC_ANSWER_RE.search(line)
+                if m_ans:
+                    answer = m_ans.group(1).upper()
+            continue
+        letter, text, topic_text, hint_text, answer_text = m.group('letter', 'option', 'topic', 'hint', 'answer')
+        if letter is not None:
+            if multiple_choice:
+                options[letter] = text.strip()
+        elif topic_text is not None:
+            topic = topic_text.strip() or None
+        elif hint_text is not None:
+            hint = hint_text.strip()
+        elif multiple_choice:
+            m_ans = _MC_ANSWER_RE.search(line)
+            if m_ans:
+                answer = m_ans.group(1).upper()
+        else:
+            answer = answer_text.strip()
+            break
+    if multiple_choice:
+        if answer and len(options) == 4:
+            return ParsedQuestion(prompt, options, answer, hint, topic)
+        # fallback: no valid MC options
+        return ParsedQuestion(prompt, {}, '', hint, topic)
+    return ParsedQuestion(prompt, {}, answer or '', hint, topic)
+
+
+# ------------------------------------------------------------------------------
+# Function: parse_quiz
+# Purpose: Parse a complete model response (optional title + question blocks).
+# Inputs:
+#   - text: raw generated output
+#   - question_type: 'multiple_choice' or 'free_response'
+#   - with_title: strip a leading 'Title:' line from the first block
+# Outputs:
+#   - (title or None, [ParsedQuestion, ...]) with empty blocks dropped
+# ------------------------------------------------------------------------------
+def parse_quiz(text, question_type, with_title=True):
+    title = None
+    if with_title:
+        title, text = split_title(text)
+    questions = []
+    for item in text.split(QUESTION_DELIMITER):
+        parsed = parse_question_item(item, question_type)
+        if parsed is not None:
+            questions.append(parsed)
+    return title, questions
@@ -0,0 +1,143 @@
+# backend/review.py
+# Spaced-repetition review scheduling (SM-2).
+# Every answered question becomes (or updates) a ReviewCard of its owner with
+# SM-2 ease / interval / repetition state and the next due date. Repeats of a
+# question (QuizQuestion.repeat_of_id, see dedup.py) update the card of the
+# question they repeat, so a card follows one question across sessions.
+# - Cards are updated in the answer's transaction (chat POST, answer_question,
+#   and free-response verdicts once they are stored)
+# - A review session is built from the (user_id, due_at) index: the most
+#   overdue cards come from one index range scan, however long the history;
+#   only cards on questions of the user's own sessions are served
+
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, update, func
+from .extensions import db
+from .models import ReviewCard, QuizQuestion, QuizSession
+from .quiz_parser import ParsedQuestion
+from .generation import shuffle_options
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# Cards per review session
+REVIEW_SIZE = 50
+# SM-2 answer quality (0-5) for each outcome
+QUALITY = {'Correct': 4, 'Partially Correct': 3, 'Incorrect': 1}
+
+
+def answer_quality(question):
+    """SM-2 quality of a question's current answer, or None while it is ungraded."""
+    if question.user_answer is None:
+        return None
+    if question.options:
+        return QUALITY['Correct'] if question.user_answer == question.correct_answer else QUALITY['Incorrect']
+    return QUALITY.get(question.eval_status)
+
+
+def sm2(ease, interval, repetitions, quality):
+    """One SM-2 step. Returns (ease, interval in days, repetitions)."""
+    if quality < 3:
+        repetitions, interval = 0, 1
+    else:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+        repetitions += 1
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval, repetitions
+
+
+# ------------------------------------------------------------------------------
+# Function: record_review
+# Purpose: Update the user's review card for an answered question.
+# Inputs:
+#   - user_id: who answered
+#   - question: the answered QuizQuestion (graded: MC always, free-response
+#     once eval_status is stored)
+#   - now: review time (defaults to utcnow)
+# Process:
+#   - The card is keyed by the question it repeats (repeat_of_id) or itself
+#   - Ungraded answers and a second update from the same question row are
+#     ignored, so re-submitting an answer does not count as another review
+#   - Apply one SM-2 step and set due_at = now + interval days
+#   - No commit: the write joins the caller's transaction
+# ------------------------------------------------------------------------------
+def record_review(user_id, question, now=None):
+    quality = answer_quality(question)
+    if quality is None or question.id is None:
+        return None
+    now = now or datetime.utcnow()
+    card_question = question.repeat_of_id or question.id
+    card = db.session.execute(
+        select(ReviewCard).where(ReviewCard.user_id == user_id, ReviewCard.question_id == card_question)
+    ).scalar()
+    if card is None:
+        card = ReviewCard(user_id=user_id, question_id=card_question, ease=DEFAULT_EASE, interval=0,
+                          repetitions=0, lapses=0)
+        db.session.add(card)
+    elif card.last_question_id == question.id:
+        return card
+    card.ease, card.interval, card.repetitions = sm2(card.ease, card.interval, card.repetitions, quality)
+    if quality < 3:
+        card.lapses += 1
+    card.last_question_id = question.id
+    card.reviewed_at = now
+    card.due_at = now + timedelta(days=card.interval)
+    return card
+
+
+def _own_due(stmt, user_id, now):
+    """Restrict a ReviewCard select to the user's due cards on questions of the user's own sessions."""
+    return (stmt.join(QuizQuestion, QuizQuestion.id == ReviewCard.question_id)
+            .join(QuizSession, QuizSession.id == QuizQuestion.session_id)
+            .where(ReviewCard.user_id == user_id, ReviewCard.due_at <= (now or datetime.utcnow()),
+                   QuizSession.user_id == user_id))
+
+
+def due_cards(user_id, limit=REVIEW_SIZE, now=None):
+    """The user's most overdue cards (a range scan of the (user_id, due_at) index)."""
+    return db.session.execute(
+        _own_due(select(ReviewCard), user_id, now)
+        .order_by(ReviewCard.due_at)
+        .limit(limit)
+    ).scalars().all()
+
+
+def due_count(user_id, limit=REVIEW_SIZE, now=None):
+    """Number of cards due now, counted up to limit (a bounded index range scan)."""
+    due = _own_due(select(ReviewCard.id), user_id, now).limit(limit).subquery()
+    return db.session.execute(select(func.count()).select_from(due)).scalar()
+
+
+def review_questions(user_id, limit=REVIEW_SIZE, now=None):
+    """ParsedQuestion copies (repeat_of the card's question) of the due cards' questions, MC options
+    reshuffled, most overdue first."""
+    cards = due_cards(user_id, limit, now)
+    if not cards:
+        return []
+    rows = db.session.execute(
+        select(QuizQuestion).where(QuizQuestion.id.in_([c.question_id for c in cards]))
+    ).scalars().all()
+    by_id = {q.id: q for q in rows}
+    questions = []
+    for card in cards:
+        q = by_id.get(card.question_id)
+        if q is None:
+            continue
+        copy = ParsedQuestion(q.prompt, dict(q.options or {}), q.correct_answer, q.hint, q.topic, card.question_id)
+        questions.append(shuffle_options(copy) if copy.options else copy)
+    return questions
+
+
+def forget_session_cards(session_id):
+    """Drop cards of a session's questions before the session is deleted (no commit)."""
+    ids = db.session.execute(select(QuizQuestion.id).where(QuizQuestion.session_id == session_id)).scalars().all()
+    if not ids:
+        return
+    db.session.execute(delete(ReviewCard).where(ReviewCard.question_id.in_(ids))
+                       .execution_options(synchronize_session=False))
+    db.session.execute(update(ReviewCard).where(ReviewCard.last_question_id.in_(ids)).values(last_question_id=None)
+                       .execution_options(synchronize_session=False))
@@ -0,0 +1,104 @@
+# backend/schema.py
+# One-time database schema setup and readiness checks for QuizPro.
+# Schema work happens at startup (or via `flask --app backend.app init-db`),
+# never on the request hot path.
+
+from sqlalchemy import inspect
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask_migrate import stamp, upgrade
+from .extensions import db, migrate
+
+# Revision whose schema (plus the tables 2a6f1c8d4e07 creates when missing) is
+# what db.create_all() built before migrations were tracked
+BASELINE_REVISION = '50aea0b40efa'
+
+
+def missing_tables():
+    """Return the model tables that do not exist in the connected database."""
+    existing = set(inspect(db.engine).get_table_names())
+    return sorted(set(db.metadata.tables) - existing)
+
+
+def missing_columns():
+    """Return 'table.column' for model columns absent from existing tables."""
+    found = inspect(db.engine)
+    existing = set(found.get_table_names())
+    missing = []
+    for name, table in db.metadata.tables.items():
+        if name not in existing:
+            continue
+        columns = {c['name'] for c in found.get_columns(name)}
+        missing.extend(f"{name}.{c.name}" for c in table.columns if c.name not in columns)
+    return sorted(missing)
+
+
+def _has_app_tables():
+    return bool(set(db.metadata.tables) & set(inspect(db.engine).get_table_names()))
+
+
+def _revisions():
+    """Return (current DB revision or None, head revision of migrations/)."""
+    with db.engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+    config = migrate.get_config()
+    head = ScriptDirectory.from_config(config).get_current_head()
+    return current, head
+
+
+# ------------------------------------------------------------------------------
+# Function: init_schema
+# Purpose: Bring the database schema up to date (CLI `init-db` and startup).
+# Process:
+#   - Empty database: create all model tables, then stamp the Alembic head so
+#     later `flask db upgrade` runs only newer migrations
+#   - Unversioned database with app tables (built by db.create_all() before
+#     migrations were tracked): stamp BASELINE_REVISION and upgrade, so the
+#     columns added since are created too
+#   - Versioned database: run pending Alembic migrations
+# ------------------------------------------------------------------------------
+def init_schema():
+    current, _ = _revisions()
+    if current is None and not _has_app_tables():
+        db.create_all()
+        stamp()
+        return
+    if current is None:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+
+# ------------------------------------------------------------------------------
+# Function: check_schema
+# Purpose: Startup readiness check; optionally creates a fresh schema.
+# Inputs:
+#   - auto_init: run init_schema when tables or columns are missing --
+#     convenient for development, disable in production
+# Outputs:
+#   - A dict {'ready': bool, 'missing_tables': [...], 'missing_columns': [...],
+#     'revision', 'head', 'error'}
+#     recorded in app.config['SCHEMA_STATUS'] by the caller and served by /healthz
+# ------------------------------------------------------------------------------
+def check_schema(auto_init=False):
+    status = {'ready': False, 'missing_tables': [], 'missing_columns': [], 'revision': None, 'head': None,
+              'error': None}
+    try:
+        missing, missing_cols = missing_tables(), missing_columns()
+        if (missing or missing_cols) and auto_init:
+            init_schema()
+            missing, missing_cols = missing_tables(), missing_columns()
+        status['missing_tables'], status['missing_columns'] = missing, missing_cols
+        status['revision'], status['head'] = _revisions()
+        versioned_ok = status['revision'] in (None, status['head'])
+        status['ready'] = not missing and not missing_cols and versioned_ok
+        if missing:
+            print(f"[ERROR] Database is missing tables {missing}; run `flask --app backend.app init-db`.")
+        elif missing_cols:
+            print(f"[ERROR] Database is missing columns {missing_cols}; run `flask --app backend.app init-db`.")
+        elif not versioned_ok:
+            print(f"[ERROR] Database revision {status['revision']} is not at head {status['head']}; "
+                  "run `flask --app backend.app db upgrade`.")
+    except Exception as e:
+        status['error'] = str(e)
+        print(f"[ERROR] Database readiness check failed: {e}")
+    return status
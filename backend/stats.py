@@ -0,0 +1,72 @@
+# backend/stats.py
+# Session scoreboard helpers shared by the setup sidebar and the sessions page.
+# Totals and correct counts are computed in SQL with a single grouped aggregate
+# instead of loading every QuizQuestion row per session.
+
+from sqlalchemy import func, case
+from .extensions import db
+from .models import QuizSession, QuizQuestion
+
+# Default number of sessions shown per page in the sidebar / history list
+SESSIONS_PER_PAGE = 25
+
+
+# ------------------------------------------------------------------------------
+# Function: get_session_stats
+# Purpose: Return one page of a user's quiz sessions with question totals and
+#          correct-answer counts, newest first.
+# Inputs:
+#   - user_id: id of the User whose sessions to list
+#   - page: 1-based page number
+#   - per_page: number of sessions per page
+# Process:
+#   - LEFT JOIN quiz_sessions to quiz_questions and GROUP BY session so that
+#     COUNT/SUM run inside the database (one query per page, regardless of
+#     how many sessions or questions the user has)
+#   - Fetch per_page + 1 rows to know whether another page exists without a
+#     separate COUNT query
+# Outputs:
+#   - A dict: {'items': [session stat dicts], 'page', 'per_page', 'has_next', 'has_prev'}
+# ------------------------------------------------------------------------------
+def get_session_stats(user_id, page=1, per_page=SESSIONS_PER_PAGE):
+    page = max(int(page or 1), 1)
+    per_page = max(int(per_page or SESSIONS_PER_PAGE), 1)
+    offset = (page - 1) * per_page
+
+    correct_expr = func.coalesce(func.sum(case(
+        (QuizQuestion.user_answer == QuizQuestion.correct_answer, 1),
+        else_=0,
+    )), 0)
+    rows = db.session.query(
+        QuizSession.id,
+        QuizSession.title,
+        QuizSession.created_at,
+        QuizSession.status,
+        func.count(QuizQuestion.id).label('total'),
+        correct_expr.label('correct'),
+    ).outerjoin(QuizQuestion, QuizQuestion.session_id == QuizSession.id) \
+        .filter(QuizSession.user_id == user_id) \
+        .group_by(QuizSession.id, QuizSession.title, QuizSession.created_at, QuizSession.status) \
+        .order_by(QuizSession.created_at.desc(), QuizSession.id.desc()) \
+        .limit(per_page + 1).offset(offset).all()
+
+    has_next = len(rows) > per_page
+    items = []
+    for position, row in enumerate(rows[:per_page], start=offset + 1):
+        items.append({
+            'id': row.id,
+            'title': row.title,
+            # 1-based position in the user's history, used for untitled sessions
+            'position': position,
+            'created_at': row.created_at,
+            'status': row.status,
+            'total': int(row.total or 0),
+            'correct': int(row.correct or 0),
+        })
+    return {
+        'items': items,
+        'page': page,
+        'per_page': per_page,
+        'has_next': has_next,
+        'has_prev': page > 1,
+    }
@@ -0,0 +1,107 @@
+# backend/topics.py
+# Topic labels for generated questions, so adaptive ordering has data.
+# - The generation prompt asks for a 'Topic:' line per question (same model
+#   call); quiz_parser reads it into ParsedQuestion.topic
+# - Questions that come back without one get a keyword topic: the prompt word
+#   that occurs most often in the source chunk the question was written from
+# - Labels are mapped onto the user's topic vocabulary (their TopicPerformance
+#   topics) so 'cellular respiration' and 'Cellular Respiration.' count towards
+#   the same row
+
+import re
+from collections import Counter
+from sqlalchemy import select
+from .extensions import db
+from .models import TopicPerformance
+from .dedup import content_words
+
+# Longest label kept (TopicPerformance.topic is String(255))
+MAX_TOPIC_LENGTH = 80
+# Word-set Jaccard similarity at which a label reuses an existing user topic
+TOPIC_MATCH_SIMILARITY = 0.5
+
+_SPACE_RE = re.compile(r'\s+')
+_EDGE_PUNCT = ' \t.,;:!?"\'()[]{}-*_'
+
+
+def clean_label(label):
+    """Trim whitespace/punctuation, collapse spaces and cap the length; None if empty."""
+    text = _SPACE_RE.sub(' ', label or '').strip(_EDGE_PUNCT)[:MAX_TOPIC_LENGTH].strip()
+    if not text:
+        return None
+    return text[0].upper() + text[1:]
+
+
+def topic_key(label):
+    """Comparison key of a label: its content words (lowercased, plurals folded)."""
+    return ' '.join(content_words(label or ''))
+
+
+def keyword_topic(prompt, source_counts):
+    """Most frequent (in the source) content word of the prompt, capitalized; None if none."""
+    words = [w for w in content_words(prompt) if len(w) > 3 and not w.isdigit()]
+    if not words:
+        return None
+    best = max(words, key=lambda w: (source_counts.get(w, 0), len(w)))
+    return best.capitalize()
+
+
+def tag_questions(questions, source_text):
+    """Fill in a keyword topic for questions the model left untagged."""
+    counts = None
+    for q in questions:
+        q.topic = clean_label(q.topic)
+        if q.topic:
+            continue
+        if counts is None:
+            counts = Counter(content_words(source_text or ''))
+        q.topic = keyword_topic(q.prompt, counts)
+    return questions
+
+
+def _best_match(key, vocabulary):
+    """Existing label whose key is equal to or overlaps most with key (>= TOPIC_MATCH_SIMILARITY)."""
+    if key in vocabulary:
+        return vocabulary[key]
+    words = set(key.split())
+    best, best_score = None, TOPIC_MATCH_SIMILARITY
+    for other_key, label in vocabulary.items():
+        other = set(other_key.split())
+        score = len(words & other) / len(words | other)
+        if score >= best_score:
+            best, best_score = label, score
+    return best
+
+
+# ------------------------------------------------------------------------------
+# Function: canonicalize_topics
+# Purpose: Map question topic labels onto the user's topic vocabulary.
+# Inputs:
+#   - user_id: whose vocabulary (TopicPerformance topics) to use
+#   - questions: ParsedQuestion records; topic is rewritten in place
+# Process:
+#   - Load the user's topics once (indexed by user_id)
+#   - A label matching an existing topic (same key, or word overlap of at
+#     least TOPIC_MATCH_SIMILARITY) takes that topic's spelling
+#   - New labels join the vocabulary, so the rest of the batch converges on them
+# ------------------------------------------------------------------------------
+def canonicalize_topics(user_id, questions):
+    labelled = [q for q in questions if q.topic]
+    if not labelled:
+        return questions
+    known = db.session.execute(select(TopicPerformance.topic).where(TopicPerformance.user_id == user_id)).scalars()
+    vocabulary = {}
+    for label in known:
+        vocabulary.setdefault(topic_key(label), label)
+    for q in labelled:
+        label = clean_label(q.topic)
+        key = topic_key(label)
+        if not key:
+            q.topic = label
+            continue
+        match = _best_match(key, vocabulary)
+        if match is None:
+            vocabulary[key] = label
+            match = label
+        q.topic = match
+    return questions
@@ -0,0 +1,64 @@
+# backend/upload_io.py
+# Helpers shared by the upload parsers for reading files without copying them.
+# - open_upload: a seekable binary stream over an upload, memory-mapped when
+#   it is a real file on disk (spooled job uploads), so parsers never need a
+#   full in-memory copy
+# - join_text: join the pieces a streaming extractor yields, stopping early
+#   once max_chars of text have been gathered
+
+import io
+import os
+import mmap
+from contextlib import contextmanager
+
+
+@contextmanager
+def open_upload(file, use_mmap=False):
+    """
+    Yield a seekable binary stream for file (a path, FileStorage or file object),
+    positioned at the start. use_mmap maps on-disk files read-only instead; use it
+    for parsers that only need read/seek/tell (not zip archives).
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as fh:
+            with open_upload(fh, use_mmap=use_mmap) as stream:
+                yield stream
+        return
+    stream = getattr(file, 'stream', file)
+    try:
+        stream.seek(0)
+    except Exception:
+        pass
+    mapped = None
+    if use_mmap and isinstance(stream, (io.BufferedReader, io.FileIO)):
+        try:
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mapped = None  # empty file or not mappable: read it normally
+    if mapped is None:
+        yield stream
+        return
+    try:
+        yield mapped
+    finally:
+        try:
+            mapped.close()
+        except BufferError:
+            pass  # a parser still holds a view; the map closes when it is collected
+
+
+def join_text(pieces, max_chars=None, sep="\n\n"):
+    """Join text pieces with sep, consuming only as many as max_chars needs."""
+    parts, size = [], 0
+    try:
+        for piece in pieces:
+            parts.append(piece)
+            size += len(piece) + len(sep)
+            if max_chars is not None and size >= max_chars:
+                break
+    finally:
+        close = getattr(pieces, 'close', None)
+        if close is not None:
+            close()  # release the parser's file/mmap now rather than at GC
+    text = sep.join(parts)
+    return text if max_chars is None else text[:max_chars]
@@ -0,0 +1,205 @@
+# backend/uploads.py
+# Turns uploaded files into plain text for quiz generation.
+# Dispatches on file extension to the parser modules and consults the
+# content-addressed ParseCache first, so identical uploads are parsed once.
+# Uploads are hashed and parsed straight from their stream (no full in-memory
+# copy) and parsing can stop early once max_chars of text are gathered.
+# parse_uploads parses several files at once on a reusable process pool (the
+# parsers are CPU-bound pure Python), with a size limit and timeout per file.
+
+import os
+import re
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from .upload_io import join_text
+from .parser_pptx_json import iter_pptx_slides, PARSER_VERSION as PPTX_VERSION  # PPTX parsing utility
+from .parser_pdf_text import pdf_to_text, PARSER_VERSION as PDF_VERSION  # PDF parsing utility
+from .parser_docx_text import docx_to_text, PARSER_VERSION as DOCX_VERSION  # DOCX parsing utility
+from .parser_xlsx_text import xlsx_to_text, PARSER_VERSION as XLSX_VERSION  # XLSX parsing utility
+
+# Keep PPTX lines with more than three words or a four-digit number (e.g. a year)
+_YEAR_RE = re.compile(r"\b\d{4}\b")
+
+# Parse pool defaults: worker processes, seconds per file, bytes per file
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+PARSE_TIMEOUT = 60
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+
+def _pptx_slides(file):
+    slides = iter_pptx_slides(file)
+    next(slides, None)  # title slide
+    for slide in slides:
+        lines = [line for line in slide.get('text', []) if len(line.split()) > 3 or _YEAR_RE.search(line)]
+        if lines:
+            yield ' '.join(lines)
+
+
+def pptx_to_text(file, max_chars=None):
+    """Extract quiz-worthy text from a PPTX: skip the title slide and very short lines."""
+    return join_text(_pptx_slides(file), max_chars)
+
+
+# Extension -> (parser name, parser version, text extractor(file, max_chars=None))
+PARSERS = {
+    '.pptx': ('pptx', PPTX_VERSION, pptx_to_text),
+    '.pdf': ('pdf', PDF_VERSION, pdf_to_text),
+    '.docx': ('docx', DOCX_VERSION, docx_to_text),
+    '.xlsx': ('xlsx', XLSX_VERSION, xlsx_to_text),
+}
+
+
+def _parser_for(filename):
+    """The PARSERS entry for a filename's extension, or None for plain text."""
+    filename = (filename or '').lower()
+    for ext, entry in PARSERS.items():
+        if filename.endswith(ext):
+            return entry
+    return None
+
+
+# --------------------------------
+# Parallel parsing on a process pool
+# --------------------------------
+class ParseTimeout(Exception):
+    """Raised inside a parse worker when a file takes longer than its timeout."""
+
+
+def _on_alarm(signum, frame):
+    raise ParseTimeout()
+
+
+def _parse_in_worker(path, filename, max_chars, timeout):
+    # Runs in a pool process. SIGALRM interrupts a parser stuck on one file, so
+    # the worker is freed for the next file instead of staying busy.
+    use_alarm = timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(max(1, int(timeout + 0.999)))
+    try:
+        parser, version, extractor = _parser_for(filename)
+        with open(path, 'rb') as fh:
+            return extractor(fh, max_chars=max_chars)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """The shared parse pool (spawned processes, so no DB connections or locks are inherited)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_pool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+
+
+def shutdown_parse_pool():
+    """Stop the parse pool's worker processes (they are restarted on next use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+# ------------------------------------------------------------------------------
+# Function: parse_uploads
+# Purpose: Extract text from several spooled uploads at once, in upload order.
+# Inputs:
+#   - uploads: list of {'path', 'filename'} (see jobs.spool_uploads)
+#   - cache: optional ParseCache (looked up and filled in this process)
+#   - max_chars: per-file text budget (None = all)
+#   - workers: pool size; 0 parses one file after another in this process
+#   - timeout: seconds allowed per file; max_bytes: larger files are skipped
+# Process:
+#   - Size check and cache lookup for each file; plain-text files are read here
+#   - Remaining files go to the shared process pool together, so the batch
+#     takes about as long as the slowest file
+#   - Collect results in the original order; a failed, oversized or timed-out
+#     file yields empty text and an error message
+# Outputs:
+#   - List of {'filename', 'text', 'error'} in upload order
+# ------------------------------------------------------------------------------
+def parse_uploads(uploads, cache=None, max_chars=None, workers=PARSE_WORKERS,
+                  timeout=PARSE_TIMEOUT, max_bytes=MAX_UPLOAD_BYTES):
+    results = [{'filename': u['filename'], 'text': '', 'error': None} for u in uploads]
+    pending = []  # (index, cache key)
+    for i, upload in enumerate(uploads):
+        result = results[i]
+        try:
+            size = os.path.getsize(upload['path'])
+            if max_bytes and size > max_bytes:
+                result['error'] = f"{upload['filename']} is larger than {max_bytes // (1024 * 1024)} MB."
+                continue
+            entry = _parser_for(upload['filename'])
+            if entry is None:
+                with open(upload['path'], 'rb') as fh:
+                    data = fh.read() if max_chars is None else fh.read(max_chars * 4)
+                text = data.decode('utf-8', errors='ignore')
+                result['text'] = text if max_chars is None else text[:max_chars]
+                continue
+            key = None
+            if cache is not None:
+                with open(upload['path'], 'rb') as fh:
+                    key = cache.key_for_stream(fh, entry[0], entry[1])
+                cached = cache.get(key)
+                if cached is not None:
+                    result['text'] = cached if max_chars is None else cached[:max_chars]
+                    continue
+            pending.append((i, key))
+        except OSError as e:
+            result['error'] = f"Cannot read {upload['filename']}."
+            print(f"[ERROR] Cannot read upload {upload['filename']}: {e}")
+
+    pool = None
+    if workers and pending:
+        pool = _get_pool(workers)
+        futures = [(i, key, pool.submit(_parse_in_worker, uploads[i]['path'], uploads[i]['filename'],
+                                        max_chars, timeout)) for i, key in pending]
+    else:
+        futures = [(i, key, None) for i, key in pending]
+
+    for i, key, future in futures:
+        upload, result = uploads[i], results[i]
+        try:
+            if future is None:
+                text = _parse_in_worker(upload['path'], upload['filename'], max_chars, None)
+            else:
+                # the worker enforces the timeout itself; this is a backstop
+                text = future.result(timeout=timeout + 5 if timeout else None)
+        except (ParseTimeout, FutureTimeout):
+            result['error'] = f"{upload['filename']} took too long to read."
+            print(f"[ERROR] Parsing {upload['filename']} timed out after {timeout}s")
+            continue
+        except BrokenProcessPool as e:
+            _reset_pool(pool)
+            result['error'] = f"{upload['filename']} could not be read."
+            print(f"[ERROR] Parse worker died on {upload['filename']}: {e}")
+            continue
+        except Exception as e:
+            result['error'] = f"{upload['filename']} could not be read."
+            print(f"[ERROR] Parsing {upload['filename']} failed: {e}")
+            continue
+        result['text'] = text
+        if key is not None and (max_chars is None or len(text) < max_chars):
+            cache.set(key, text)
+    return results
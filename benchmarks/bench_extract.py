@@ -0,0 +1,106 @@
+# benchmarks/bench_extract.py
+# Peak-memory benchmark of upload text extraction: the legacy read-everything
+# extractors (whole upload -> BytesIO -> list of page/row strings) versus the
+# streaming extractors in backend.parser_pdf_text / backend.parser_xlsx_text,
+# with and without the max_chars early stop used by generation jobs.
+#
+# Usage:
+#   python benchmarks/bench_extract.py --pdf-pages 500 --pdf-padding-mb 50 --xlsx-rows 50000
+#
+# Peaks are Python allocations measured with tracemalloc; memory-mapped file
+# pages are shared OS page cache and do not count against the worker.
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+
+def pdf_legacy(file):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(io.BytesIO(file.read()))
+    texts = []
+    for page in reader.pages:
+        text = page.extract_text()
+        if text:
+            texts.append(text)
+    return "\n\n".join(texts)
+
+
+def xlsx_legacy(file):
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(file.read()), read_only=True)
+    texts = []
+    for sheet in wb.worksheets:
+        for row in sheet.iter_rows(values_only=True):
+            row_vals = [str(cell) for cell in row if cell is not None]
+            if row_vals:
+                texts.append(' '.join(row_vals))
+    return "\n\n".join(texts)
+
+
+def measure(fn, path):
+    """Run fn on an open file; returns (seconds, peak MB, characters extracted)."""
+    with open(path, 'rb') as fh:
+        tracemalloc.start()
+        start = time.perf_counter()
+        text = fn(fh)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pdf-pages', type=int, default=500)
+    parser.add_argument('--pdf-padding-mb', type=int, default=50,
+                        help='non-text bytes in the PDF (images, fonts) that parsing skips')
+    parser.add_argument('--xlsx-rows', type=int, default=50000)
+    parser.add_argument('--questions', type=int, default=10,
+                        help='quiz size used for the max_chars budget')
+    args = parser.parse_args()
+
+    from samples import make_pdf, make_xlsx
+    from backend.chunking import source_char_budget
+    from backend.parser_pdf_text import pdf_to_text
+    from backend.parser_xlsx_text import xlsx_to_text
+
+    budget = source_char_budget(args.questions)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, 'deck.pdf')
+        with open(pdf_path, 'wb') as fh:
+            fh.write(make_pdf(args.pdf_pages, line="mitochondria release energy " * 8,
+                              padding=args.pdf_padding_mb * 1024 * 1024))
+        xlsx_path = os.path.join(tmp, 'sheet.xlsx')
+        make_xlsx(xlsx_path, args.xlsx_rows)
+
+        cases = [
+            ('pdf', pdf_path, [
+                ('legacy', pdf_legacy),
+                ('streaming', pdf_to_text),
+                (f'streaming, max_chars={budget}', lambda f: pdf_to_text(f, max_chars=budget)),
+            ]),
+            ('xlsx', xlsx_path, [
+                ('legacy', xlsx_legacy),
+                ('streaming', xlsx_to_text),
+                (f'streaming, max_chars={budget}', lambda f: xlsx_to_text(f, max_chars=budget)),
+            ]),
+        ]
+        for kind, path, variants in cases:
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"{kind}: {size_mb:.1f} MB file")
+            for label, fn in variants:
+                elapsed, peak, chars = measure(fn, path)
+                print(f"  {label:<32} peak {peak:8.1f} MB  {elapsed:7.2f}s  {chars:>10} chars")
+
+
+if __name__ == '__main__':
+    main()
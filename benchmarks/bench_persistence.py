@@ -0,0 +1,91 @@
+# benchmarks/bench_persistence.py
+# Micro-benchmark of quiz persistence: the legacy per-question ORM add() path
+# versus the single-transaction bulk insert in backend.persistence.
+#
+# Usage:
+#   python benchmarks/bench_persistence.py --sizes 20 200 2000 --repeat 5
+#   python benchmarks/bench_persistence.py --database-url postgresql://user:pw@localhost/quizpro_bench
+#
+# Reports rows/second and commits per quiz for each batch size.
+
+import os
+import sys
+import time
+import argparse
+
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _questions(n):
+    from backend.quiz_parser import ParsedQuestion
+    return [ParsedQuestion(
+        prompt=f"Question {i}: which statement is true?",
+        options={'A': f"Option {i}A", 'B': f"Option {i}B", 'C': f"Option {i}C", 'D': f"Option {i}D"},
+        answer='ABCD'[i % 4],
+        hint=f"Hint {i}",
+    ) for i in range(n)]
+
+
+def persist_legacy(db, QuizSession, QuizQuestion, user_id, questions):
+    """The pre-bulk write path: commit the session, then add() each question."""
+    quiz = QuizSession(user_id=user_id, session_type='quiz',
+                       question_type='multiple_choice', num_questions=len(questions))
+    db.session.add(quiz)
+    db.session.commit()
+    for idx, q in enumerate(questions):
+        db.session.add(QuizQuestion(session_id=quiz.id, question_index=idx, prompt=q.prompt,
+                                    options=q.options, correct_answer=q.answer, hint=q.hint))
+    db.session.commit()
+    return quiz
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 2000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', default='sqlite:///:memory:')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['LLM_PROVIDER'] = 'stub'
+    from backend.app import app
+    from backend.extensions import db
+    from backend.models import User, QuizSession, QuizQuestion
+    from backend.persistence import create_quiz_session
+
+    with app.app_context():
+        db.create_all()
+        user = User(email=f"bench-{time.time()}@example.com")
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        commits = [0]
+        event.listen(db.engine, 'commit', lambda conn: commits.__setitem__(0, commits[0] + 1))
+
+        print(f"database={db.engine.url.get_backend_name()} repeat={args.repeat}")
+        for size in args.sizes:
+            questions = _questions(size)
+            for label, persist in (
+                ('legacy', lambda: persist_legacy(db, QuizSession, QuizQuestion, user_id, questions)),
+                ('bulk', lambda: create_quiz_session(user_id, questions, session_type='quiz',
+                                                     question_type='multiple_choice')),
+            ):
+                commits[0] = 0
+                elapsed = 0.0
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    persist()
+                    elapsed += time.perf_counter() - started
+                    db.session.expunge_all()
+                rows_per_sec = size * args.repeat / elapsed if elapsed else float('inf')
+                print(f"  size={size:<6} {label:<7} {elapsed / args.repeat * 1000:9.2f} ms/quiz  "
+                      f"{rows_per_sec:10.0f} rows/s  commits/quiz={commits[0] / args.repeat:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_pipeline.py
+# End-to-end load test of the quiz pipeline (generate -> answer -> grade -> hint)
+# against the offline stub LLM backend: no network, no API spend.
+#
+# Usage:
+#   python benchmarks/bench_pipeline.py --quizzes 20 --questions 20 --latency 0.05
+#
+# --latency simulates model round-trip time per call, so the effect of streaming
+# and concurrent grading can be measured locally.
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--quizzes', type=int, default=10)
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--question-type', default='free_response',
+                        choices=['multiple_choice', 'free_response'])
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated seconds per model call')
+    # generation jobs run on worker threads, so the default is a file database
+    # (one in-memory SQLite connection cannot be shared safely between threads)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['LLM_PROVIDER'] = 'stub'
+    os.environ['STUB_LLM_LATENCY'] = str(args.latency)
+    from backend.app import app
+    from backend.extensions import db
+    from backend.models import User
+
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        user = User(email=f"bench-{time.time()}@example.com")
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+
+    timings = {'setup': [], 'job_ready': [], 'first_question': [], 'answer': [], 'results': [], 'hint': []}
+    content = "Photosynthesis converts light energy into chemical energy stored in glucose. " * 20
+    for _ in range(args.quizzes):
+        started = time.perf_counter()
+        resp = client.post('/setup', data={'pastedText': content,
+                                           'numQuestions': str(args.questions),
+                                           'questionType': args.question_type})
+        timings['setup'].append(time.perf_counter() - started)
+        assert resp.status_code == 302, resp.status_code
+        job_id = int(resp.location.rsplit('=', 1)[1])
+        started = time.perf_counter()
+        while True:
+            status = client.get(f'/jobs/{job_id}').get_json()
+            if status['ready'] or status['status'] == 'failed':
+                break
+            time.sleep(0.01)
+        timings['job_ready'].append(time.perf_counter() - started)
+        assert status['ready'], status
+        client.get(status['open_url'])
+        started = time.perf_counter()
+        client.get('/chat')
+        timings['first_question'].append(time.perf_counter() - started)
+        for _ in range(args.questions):
+            # wait for streamed questions that have not arrived yet
+            while b'Generating the next question' in client.get('/chat').data:
+                time.sleep(0.01)
+            started = time.perf_counter()
+            client.post('/chat', data={'answer': 'A'})
+            timings['answer'].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        client.get('/results')
+        timings['results'].append(time.perf_counter() - started)
+
+    with app.app_context():
+        from backend.models import QuizQuestion
+        question_id = QuizQuestion.query.first().id
+    started = time.perf_counter()
+    client.post('/get_hint', json={'question_id': question_id})
+    timings['hint'].append(time.perf_counter() - started)
+
+    print(f"quizzes={args.quizzes} questions={args.questions} type={args.question_type} latency={args.latency}s")
+    for name, values in timings.items():
+        if values:
+            values.sort()
+            mean = sum(values) / len(values)
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            print(f"  {name:<15} n={len(values):<5} mean={mean * 1000:8.2f} ms  p95={p95 * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
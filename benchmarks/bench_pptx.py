@@ -0,0 +1,92 @@
+# benchmarks/bench_pptx.py
+# Speed and peak-memory benchmark of PPTX text extraction: the legacy parser
+# (zip-order slides, full ElementTree per slide, any tag containing 't')
+# versus backend.parser_pptx_json (numeric slide order, iterparse on a:t with
+# element clearing), on synthetic decks. A third row times the quiz path:
+# pptx_to_text with the max_chars budget of a --questions quiz, which stops
+# reading slides once it has enough text.
+#
+# Usage:
+#   python benchmarks/bench_pptx.py --slides 500 --paragraphs 40 --repeat 3
+#
+# Peaks are Python allocations measured with tracemalloc (a separate run from
+# the timed one, since tracing slows parsing down).
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import zipfile
+import xml.etree.ElementTree as ET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+
+def pptx_legacy(path):
+    """The pre-rewrite pptx_to_json."""
+    pptx_json = {"slides": []}
+    with zipfile.ZipFile(path, 'r') as pptx:
+        for filename in pptx.namelist():
+            if filename.startswith('ppt/slides/slide') and filename.endswith('.xml'):
+                root = ET.fromstring(pptx.read(filename))
+                slide_json = {"text": []}
+                for element in root.iter():
+                    if 't' in element.tag and element.text:
+                        slide_json["text"].append(element.text)
+                pptx_json["slides"].append(slide_json)
+    return pptx_json
+
+
+def build_deck(path, slides, paragraphs):
+    from samples import make_pptx, slide_xml
+    xml = [slide_xml([[f"Slide {n} point {p}: ", "ribosomes translate ", "messenger RNA into proteins"]
+                      for p in range(paragraphs)])
+           for n in range(1, slides + 1)]
+    make_pptx(path, xml, order=sorted(range(1, slides + 1), key=str))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--slides', type=int, default=500)
+    parser.add_argument('--paragraphs', type=int, default=40, help='text paragraphs per slide')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--questions', type=int, default=10)
+    args = parser.parse_args()
+
+    from backend.chunking import source_char_budget
+    from backend.parser_pptx_json import pptx_to_json
+    from backend.uploads import pptx_to_text
+
+    budget = source_char_budget(args.questions)
+
+    def quiz_text(path):
+        text = pptx_to_text(path, max_chars=budget)
+        return {'slides': [{'text': text.split('\n\n')}]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'deck.pptx')
+        build_deck(path, args.slides, args.paragraphs)
+        print(f"{args.slides} slides x {args.paragraphs} paragraphs, "
+              f"{os.path.getsize(path) / 1024:.0f} KB compressed")
+        for label, fn in (('legacy', pptx_legacy), ('iterparse', pptx_to_json), ('quiz text', quiz_text)):
+            best = min(_timed(fn, path) for _ in range(args.repeat))
+            tracemalloc.start()
+            result = fn(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = sum(len(s['text']) for s in result['slides'])
+            print(f"  {label:<10} {best * 1000:8.1f} ms  peak {peak / (1024 * 1024):6.1f} MB  {lines} text blocks")
+
+
+def _timed(fn, path):
+    start = time.perf_counter()
+    fn(path)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_quiz_parser.py
+# pytest-benchmark suite for backend.quiz_parser: parse throughput on large
+# (500+ question) model outputs built from the tests/corpus samples.
+#
+# Usage (requires `pip install pytest-benchmark`):
+#   python -m pytest benchmarks/bench_quiz_parser.py --benchmark-columns=mean,ops
+#
+# questions/sec is reported per case in the benchmark's extra_info.
+
+import sys
+from pathlib import Path
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.quiz_parser import parse_quiz, split_title, QUESTION_DELIMITER  # noqa: E402
+
+CORPUS = ROOT / 'tests' / 'corpus'
+
+
+def _batch(sample, size):
+    """Repeat a corpus sample's question blocks until the output holds `size` blocks."""
+    _, body = split_title((CORPUS / sample).read_text())
+    blocks = [b for b in body.split(QUESTION_DELIMITER) if b.strip()]
+    items = [blocks[i % len(blocks)] for i in range(size)]
+    return "Title: Benchmark\n" + QUESTION_DELIMITER.join(items) + QUESTION_DELIMITER
+
+
+@pytest.mark.parametrize('size', [50, 500, 2000])
+@pytest.mark.parametrize('sample,question_type', [
+    ('mc_clean.txt', 'multiple_choice'),
+    ('mc_loose_format.txt', 'multiple_choice'),
+    ('mc_malformed.txt', 'multiple_choice'),
+    ('fr_clean.txt', 'free_response'),
+])
+def test_parse_quiz_throughput(benchmark, sample, question_type, size):
+    text = _batch(sample, size)
+    _, questions = benchmark(parse_quiz, text, question_type)
+    assert len(questions) == size
+    benchmark.extra_info['questions'] = size
+    if benchmark.stats:
+        benchmark.extra_info['questions_per_sec'] = round(size / benchmark.stats.stats.mean)
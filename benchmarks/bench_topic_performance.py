@@ -0,0 +1,126 @@
+# benchmarks/bench_topic_performance.py
+# Concurrent answer load on TopicPerformance: the legacy read-modify-write
+# record_performance (SELECT, add, attempts += 1, commit) versus the atomic
+# upsert in backend.adaptive, plus get_poor_topics (Python filter vs SQL filter).
+#
+# Usage:
+#   python benchmarks/bench_topic_performance.py --threads 8 --answers 200 --topics 5
+#   python benchmarks/bench_topic_performance.py --database-url postgresql://user:pw@localhost/quizpro_bench
+#
+# Reports answers/second and lost updates (expected attempts - stored attempts).
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class _Answer:
+    def __init__(self, topic, is_correct):
+        self.topic = topic
+        self.is_correct = is_correct
+
+
+def record_legacy(db, TopicPerformance, user_id, question):
+    """The pre-upsert path: SELECT, maybe INSERT, increment in Python, commit."""
+    perf = TopicPerformance.query.filter_by(user_id=user_id, topic=question.topic).first()
+    if not perf:
+        perf = TopicPerformance(user_id=user_id, topic=question.topic, attempts=0, correct=0)
+        db.session.add(perf)
+    perf.attempts += 1
+    if question.is_correct:
+        perf.correct += 1
+    db.session.commit()
+
+
+def poor_topics_legacy(TopicPerformance, user_id, threshold=0.7):
+    perfs = TopicPerformance.query.filter_by(user_id=user_id).all()
+    return [p.topic for p in perfs if p.attempts > 0 and (p.correct / p.attempts) < threshold]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--answers', type=int, default=200, help='answers per thread')
+    parser.add_argument('--topics', type=int, default=5)
+    parser.add_argument('--history', type=int, default=2000, help='extra topics for the get_poor_topics run')
+    # answers come from several threads, so the default is a file database
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    tmp = None
+    if not args.database_url:
+        tmp = tempfile.mkdtemp(prefix='quizpro-bench-')
+        args.database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['LLM_PROVIDER'] = 'stub'
+    from backend.app import app
+    from backend.extensions import db
+    from backend.models import User, TopicPerformance
+    from backend.adaptive import record_performance, get_poor_topics
+
+    def upsert(db, TopicPerformance, user_id, question):
+        record_performance(user_id, question)
+        db.session.commit()
+
+    with app.app_context():
+        db.create_all()
+        print(f"database={db.engine.url.get_backend_name()} threads={args.threads} "
+              f"answers/thread={args.answers} topics={args.topics}")
+        for label, record in (('legacy', record_legacy), ('upsert', upsert)):
+            user = User(email=f"bench-{label}-{time.time()}@example.com", password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            errors = []
+
+            def worker(seed):
+                with app.app_context():
+                    for i in range(args.answers):
+                        topic = f"topic-{(seed + i) % args.topics}"
+                        try:
+                            record(db, TopicPerformance, user_id, _Answer(topic, i % 3 == 0))
+                        except Exception as e:
+                            # e.g. IntegrityError when two threads INSERT the same new topic
+                            db.session.rollback()
+                            errors.append(type(e).__name__)
+                    db.session.remove()
+
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+            db.session.expire_all()
+            stored = sum(p.attempts for p in TopicPerformance.query.filter_by(user_id=user_id))
+            expected = args.threads * args.answers
+            print(f"  record  {label:<7} {expected / elapsed:9.0f} answers/s  "
+                  f"lost updates={expected - stored - len(errors)}  failed={len(errors)}")
+
+        user = User(email=f"bench-poor-{time.time()}@example.com", password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(TopicPerformance.__table__.insert(), [
+            {'user_id': user.id, 'topic': f"history-{i}", 'attempts': 10, 'correct': 10 if i % 10 else 3}
+            for i in range(args.history)
+        ])
+        db.session.commit()
+        for label, poor in (('legacy', lambda: poor_topics_legacy(TopicPerformance, user.id)),
+                            ('sql', lambda: get_poor_topics(user.id))):
+            started = time.perf_counter()
+            for _ in range(20):
+                found = poor()
+                db.session.expunge_all()
+            elapsed = (time.perf_counter() - started) / 20
+            print(f"  poor    {label:<7} {elapsed * 1000:9.2f} ms  topics={len(found)} of {args.history}")
+
+
+if __name__ == '__main__':
+    main()
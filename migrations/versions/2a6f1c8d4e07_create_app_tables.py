@@ -0,0 +1,104 @@
+"""Create the QuizPro application tables
+
+Revision ID: 2a6f1c8d4e07
+Revises: 50aea0b40efa
+Create Date: 2026-10-17 09:20:44.108529
+
+The initial revision only created the presentation/slide/question tables; the
+app tables were created by db.create_all(). This revision creates them as they
+were before the first ALTER (3c9d2f1a7b44), so `flask db upgrade` works on an
+empty database. Tables that already exist (databases created by
+db.create_all()) are left as they are.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a6f1c8d4e07'
+down_revision = '50aea0b40efa'
+branch_labels = None
+depends_on = None
+
+TABLES = ('users', 'api_key', 'quiz_sessions', 'quiz_questions', 'chat_messages', 'topic_performance')
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+    if 'api_key' not in existing:
+        op.create_table('api_key',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('model', sa.String(length=50), nullable=False),
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'model', name='uq_user_model')
+        )
+    if 'quiz_sessions' not in existing:
+        op.create_table('quiz_sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('session_type', sa.String(length=20), nullable=False),
+        sa.Column('question_type', sa.String(length=20), nullable=False),
+        sa.Column('num_questions', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'quiz_questions' not in existing:
+        op.create_table('quiz_questions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('question_index', sa.Integer(), nullable=False),
+        sa.Column('prompt', sa.Text(), nullable=False),
+        sa.Column('options', sa.JSON(), nullable=False),
+        sa.Column('correct_answer', sa.Text(), nullable=False),
+        sa.Column('user_answer', sa.Text(), nullable=True),
+        sa.Column('topic', sa.String(length=255), nullable=True),
+        sa.Column('hint', sa.Text(), nullable=True),
+        sa.Column('explanation', sa.Text(), nullable=True),
+        sa.Column('is_correct', sa.Boolean(), nullable=True),
+        sa.Column('answered_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['quiz_sessions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'chat_messages' not in existing:
+        op.create_table('chat_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('sender', sa.String(length=20), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['quiz_sessions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'topic_performance' not in existing:
+        op.create_table('topic_performance',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('topic', sa.String(length=255), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('correct', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
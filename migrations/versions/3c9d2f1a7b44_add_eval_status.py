@@ -0,0 +1,26 @@
+"""Add eval_status to quiz_questions for persisted grading verdicts
+
+Revision ID: 3c9d2f1a7b44
+Revises: 2a6f1c8d4e07
+Create Date: 2026-10-16 09:12:31.402114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d2f1a7b44'
+down_revision = '2a6f1c8d4e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('eval_status', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_questions', schema=None) as batch_op:
+        batch_op.drop_column('eval_status')
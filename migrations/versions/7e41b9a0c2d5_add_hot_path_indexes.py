@@ -0,0 +1,51 @@
+"""Add composite indexes for hot lookup paths
+
+Revision ID: 7e41b9a0c2d5
+Revises: 3c9d2f1a7b44
+Create Date: 2026-10-16 11:40:08.215337
+
+- quiz_questions(session_id, question_index): /chat, /results, retries
+- quiz_sessions(user_id, created_at): session history sidebar and /sessions
+- topic_performance(user_id, topic) UNIQUE: per-answer topic counters
+api_key(user_id, model) is already covered by the uq_user_model constraint.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e41b9a0c2d5'
+down_revision = '3c9d2f1a7b44'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_quiz_questions_session_index', 'quiz_questions',
+                    ['session_id', 'question_index'], unique=False)
+    op.create_index('ix_quiz_sessions_user_created', 'quiz_sessions',
+                    ['user_id', 'created_at'], unique=False)
+    # Merge duplicate (user_id, topic) rows left by concurrent inserts before
+    # enforcing uniqueness: keep the lowest id and fold the counters into it.
+    # Done row by row from Python: MySQL rejects an UPDATE/DELETE whose
+    # subquery reads the table being changed (error 1093)
+    bind = op.get_bind()
+    tp = sa.table('topic_performance', sa.column('id'), sa.column('user_id'), sa.column('topic'),
+                  sa.column('attempts'), sa.column('correct'))
+    duplicates = bind.execute(
+        sa.select(tp.c.user_id, tp.c.topic, sa.func.min(tp.c.id),
+                  sa.func.sum(tp.c.attempts), sa.func.sum(tp.c.correct))
+        .group_by(tp.c.user_id, tp.c.topic)
+        .having(sa.func.count() > 1)
+    ).all()
+    for user_id, topic, keep_id, attempts, correct in duplicates:
+        bind.execute(tp.update().where(tp.c.id == keep_id).values(attempts=attempts, correct=correct))
+        bind.execute(tp.delete().where(tp.c.user_id == user_id, tp.c.topic == topic, tp.c.id != keep_id))
+    op.create_index('uq_topic_performance_user_topic', 'topic_performance',
+                    ['user_id', 'topic'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_topic_performance_user_topic', table_name='topic_performance')
+    op.drop_index('ix_quiz_sessions_user_created', table_name='quiz_sessions')
+    op.drop_index('ix_quiz_questions_session_index', table_name='quiz_questions')
@@ -0,0 +1,52 @@
+"""Add daily_stats and daily_topic_stats analytics rollups
+
+Revision ID: a4d7c93e1f06
+Revises: f19c4e7a2b58
+Create Date: 2026-10-16 23:58:12.417306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7c93e1f06'
+down_revision = 'f19c4e7a2b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('answers', sa.Integer(), nullable=False),
+    sa.Column('graded', sa.Integer(), nullable=False),
+    sa.Column('correct', sa.Integer(), nullable=False),
+    sa.Column('answer_seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_daily_stats_user_day', 'daily_stats', ['user_id', 'day'], unique=True)
+    op.create_table('daily_topic_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('topic', sa.String(length=255), nullable=False),
+    sa.Column('answers', sa.Integer(), nullable=False),
+    sa.Column('graded', sa.Integer(), nullable=False),
+    sa.Column('correct', sa.Integer(), nullable=False),
+    sa.Column('answer_seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_daily_topic_stats_user_day_topic', 'daily_topic_stats', ['user_id', 'day', 'topic'],
+                    unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_daily_topic_stats_user_day_topic', table_name='daily_topic_stats')
+    op.drop_table('daily_topic_stats')
+    op.drop_index('uq_daily_stats_user_day', table_name='daily_stats')
+    op.drop_table('daily_stats')
@@ -0,0 +1,44 @@
+"""Add generation_jobs table for the background quiz generation queue
+
+Revision ID: b5f0e3a9d217
+Revises: 7e41b9a0c2d5
+Create Date: 2026-10-16 14:05:52.730118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f0e3a9d217'
+down_revision = '7e41b9a0c2d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('generation_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('model_name', sa.String(length=32), nullable=False),
+    sa.Column('question_type', sa.String(length=20), nullable=False),
+    sa.Column('num_questions', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('uploads', sa.JSON(), nullable=False),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['quiz_sessions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_generation_jobs_status_id', 'generation_jobs', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_generation_jobs_status_id', table_name='generation_jobs')
+    op.drop_table('generation_jobs')
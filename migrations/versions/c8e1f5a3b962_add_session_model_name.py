@@ -0,0 +1,32 @@
+"""Add quiz_sessions.model_name so every model call for a quiz uses its backend
+
+Revision ID: c8e1f5a3b962
+Revises: a4d7c93e1f06
+Create Date: 2026-10-17 10:14:37.802251
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e1f5a3b962'
+down_revision = 'a4d7c93e1f06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_sessions') as batch_op:
+        batch_op.add_column(sa.Column('model_name', sa.String(length=32), nullable=True))
+    # sessions built by a generation job take the backend picked for that job
+    op.execute(
+        "UPDATE quiz_sessions SET model_name = ("
+        "SELECT MAX(generation_jobs.model_name) FROM generation_jobs "
+        "WHERE generation_jobs.session_id = quiz_sessions.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_sessions') as batch_op:
+        batch_op.drop_column('model_name')
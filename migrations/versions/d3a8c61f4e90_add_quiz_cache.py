@@ -0,0 +1,40 @@
+"""Add cached_quizzes table and generation_jobs.cache_hit for the generated-quiz cache
+
+Revision ID: d3a8c61f4e90
+Revises: b5f0e3a9d217
+Create Date: 2026-10-16 17:22:41.503918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8c61f4e90'
+down_revision = 'b5f0e3a9d217'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cached_quizzes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('questions', sa.JSON(), nullable=False),
+    sa.Column('hits', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cache_key')
+    )
+    op.create_index('ix_cached_quizzes_last_used', 'cached_quizzes', ['last_used_at'], unique=False)
+    with op.batch_alter_table('generation_jobs') as batch_op:
+        batch_op.add_column(sa.Column('cache_hit', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('generation_jobs') as batch_op:
+        batch_op.drop_column('cache_hit')
+    op.drop_index('ix_cached_quizzes_last_used', table_name='cached_quizzes')
+    op.drop_table('cached_quizzes')
@@ -0,0 +1,43 @@
+"""Add question_lsh_buckets and quiz_questions.repeat_of_id for near-duplicate detection
+
+Revision ID: e6b27d945c13
+Revises: d3a8c61f4e90
+Create Date: 2026-10-16 18:05:12.318540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b27d945c13'
+down_revision = 'd3a8c61f4e90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('question_lsh_buckets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.Column('session_id', sa.Integer(), nullable=False),
+    sa.Column('question_index', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['quiz_sessions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_question_lsh_buckets_user_bucket', 'question_lsh_buckets', ['user_id', 'bucket'], unique=False)
+    op.create_index('ix_question_lsh_buckets_session', 'question_lsh_buckets', ['session_id'], unique=False)
+    with op.batch_alter_table('quiz_questions') as batch_op:
+        batch_op.add_column(sa.Column('repeat_of_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_quiz_questions_repeat_of_id', 'quiz_questions', ['repeat_of_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_questions') as batch_op:
+        batch_op.drop_constraint('fk_quiz_questions_repeat_of_id', type_='foreignkey')
+        batch_op.drop_column('repeat_of_id')
+    op.drop_index('ix_question_lsh_buckets_session', table_name='question_lsh_buckets')
+    op.drop_index('ix_question_lsh_buckets_user_bucket', table_name='question_lsh_buckets')
+    op.drop_table('question_lsh_buckets')
@@ -0,0 +1,44 @@
+"""Add review_cards for spaced-repetition review scheduling
+
+Revision ID: f19c4e7a2b58
+Revises: e6b27d945c13
+Create Date: 2026-10-16 19:12:37.904215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f19c4e7a2b58'
+down_revision = 'e6b27d945c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('review_cards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('last_question_id', sa.Integer(), nullable=True),
+    sa.Column('ease', sa.Float(), nullable=False),
+    sa.Column('interval', sa.Float(), nullable=False),
+    sa.Column('repetitions', sa.Integer(), nullable=False),
+    sa.Column('lapses', sa.Integer(), nullable=False),
+    sa.Column('due_at', sa.DateTime(), nullable=False),
+    sa.Column('reviewed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['last_question_id'], ['quiz_questions.id'], ),
+    sa.ForeignKeyConstraint(['question_id'], ['quiz_questions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_review_cards_user_question', 'review_cards', ['user_id', 'question_id'], unique=True)
+    op.create_index('ix_review_cards_user_due', 'review_cards', ['user_id', 'due_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_review_cards_user_due', table_name='review_cards')
+    op.drop_index('uq_review_cards_user_question', table_name='review_cards')
+    op.drop_table('review_cards')
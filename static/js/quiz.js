@@ -29,4 +29,65 @@ document.addEventListener('DOMContentLoaded', function() {
       }
     });
   }
-}); 
\ No newline at end of file
+}); 
+// Instant feedback: when the chat form carries data-feedback-url, submit the
+// answer via AJAX (/answer_question), show correctness at once, then poll
+// /answer_status until the background worker has stored the explanation.
+const FEEDBACK_POLL_MS = 1000;
+const FEEDBACK_MAX_POLLS = 60;
+
+async function pollExplanation(pollUrl, target) {
+  for (let attempt = 0; attempt < FEEDBACK_MAX_POLLS; attempt++) {
+    try {
+      const res = await fetch(pollUrl);
+      const data = await res.json();
+      if (data.ready) {
+        const verdict = data.status && data.status !== 'Error' ? data.status + ': ' : '';
+        target.textContent = verdict + (data.explanation || 'No explanation available.');
+        return data;
+      }
+    } catch (err) {
+      console.error('Error polling explanation:', err);
+    }
+    await new Promise(resolve => setTimeout(resolve, FEEDBACK_POLL_MS));
+  }
+  target.textContent = 'Explanation unavailable.';
+  return null;
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+  const form = document.getElementById('chat-form');
+  const explanation = document.getElementById('explanation-text');
+  const questionIdElem = document.getElementById('questionId');
+  if (!form || !explanation || !questionIdElem || !form.dataset.feedbackUrl) return;
+  let answered = false;
+  form.addEventListener('submit', async function(e) {
+    e.preventDefault();
+    // second click moves on: the server already advanced the question index
+    if (answered) {
+      window.location.href = window.location.pathname;
+      return;
+    }
+    const answer = new FormData(form).get('answer') || '';
+    try {
+      const res = await fetch(form.dataset.feedbackUrl, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({question_id: questionIdElem.value, answer: answer})
+      });
+      const data = await res.json();
+      if (!res.ok) throw new Error(data.error || res.statusText);
+      answered = true;
+      form.querySelectorAll('input, textarea').forEach(el => { el.disabled = true; });
+      explanation.style.display = 'block';
+      if (data.is_correct === true) explanation.textContent = 'Correct! Loading explanation…';
+      else if (data.is_correct === false) explanation.textContent = 'Incorrect. Loading explanation…';
+      else explanation.textContent = 'Answer submitted. Grading…';
+      pollExplanation(data.poll_url, explanation);
+    } catch (err) {
+      // fall back to the regular form post
+      console.error('Error submitting answer:', err);
+      form.submit();
+    }
+  });
+});
@@ -0,0 +1,26 @@
+# tests/conftest.py
+import os
+import pytest
+
+# Point the app at an in-memory database before backend.app is imported, so the
+# test suite never touches instance/quizpro.db.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from backend.app import app  # noqa: E402
+from backend.extensions import db  # noqa: E402
+
+
+@pytest.fixture
+def ctx():
+    """An app context over freshly created tables, dropped after the test."""
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(ctx):
+    return ctx.test_client()
@@ -0,0 +1,107 @@
+# tests/samples.py
+# Builders for synthetic upload files (shared by the tests and benchmarks).
+
+from openpyxl import Workbook
+
+
+def make_pdf(pages, line="mitochondria release energy", padding=0):
+    """
+    A minimal valid PDF with one line of Helvetica text per page; padding adds an
+    unreferenced binary stream of that many bytes (like embedded images).
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = ' '.join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    font = 3 + 2 * pages
+    for i in range(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode())
+        stream = f"BT /F1 12 Tf 72 720 Td (Page {i} {line}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    if padding:
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (padding, b"\0" * padding))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (n, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_xlsx(path, rows, sheets=1):
+    """Write an .xlsx with `rows` text rows per sheet (write-only, so it stays small in memory)."""
+    wb = Workbook(write_only=True)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"Sheet{s}")
+        for i in range(rows):
+            ws.append([f"Row {i}", "ribosomes build proteins", None, i])
+    wb.save(path)
+
+
+_SLIDE_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"><p:cSld><p:spTree>{shapes}'
+    '</p:spTree></p:cSld></p:sld>'
+)
+_SHAPE_XML = (
+    '<p:sp><p:nvSpPr><p:cNvPr id="{id}" name="Shape {id}"/><p:nvPr>{ph}</p:nvPr></p:nvSpPr>'
+    '<p:txBody><a:bodyPr/>{paragraphs}</p:txBody></p:sp>'
+)
+# A text run with the formatting PowerPoint writes for every run
+_RUN_XML = (
+    '<a:r><a:rPr lang="en-US" sz="2400" dirty="0"><a:solidFill><a:schemeClr val="tx1"/></a:solidFill>'
+    '<a:latin typeface="Calibri"/><a:ea typeface="+mn-ea"/><a:cs typeface="+mn-cs"/></a:rPr><a:t>{}</a:t></a:r>'
+)
+_NOTES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<p:notes xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"><p:cSld><p:spTree>{shapes}'
+    '</p:spTree></p:cSld></p:notes>'
+)
+_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide" '
+    'Target="../notesSlides/notesSlide{n}.xml"/></Relationships>'
+)
+
+
+def _shape(shape_id, paragraphs, ph=''):
+    body = ''.join(
+        '<a:p><a:pPr marL="342900" indent="-342900"><a:buFont typeface="Arial"/><a:buChar char="&#8226;"/></a:pPr>'
+        + ''.join(_RUN_XML.format(run) for run in runs) + '<a:endParaRPr lang="en-US" dirty="0"/></a:p>'
+        for runs in paragraphs
+    )
+    return _SHAPE_XML.format(id=shape_id, ph=ph, paragraphs=body)
+
+
+def slide_xml(paragraphs):
+    """Slide XML with one text shape holding paragraphs (each a list of runs)."""
+    return _SLIDE_XML.format(shapes=_shape(2, paragraphs))
+
+
+def make_pptx(path, slides, notes=None, order=None):
+    """
+    Write a minimal .pptx. slides: list of slide XML strings (slide_xml);
+    notes: optional {slide number: notes text}; order: archive order of slide
+    numbers (defaults to 1..N).
+    """
+    import zipfile
+    notes = notes or {}
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', '<?xml version="1.0"?><Types/>')
+        for n in order or range(1, len(slides) + 1):
+            zf.writestr(f'ppt/slides/slide{n}.xml', slides[n - 1])
+            if n in notes:
+                zf.writestr(f'ppt/slides/_rels/slide{n}.xml.rels', _RELS_XML.format(n=n))
+                shapes = (_shape(2, [], '<p:ph type="sldImg"/>')
+                          + _shape(3, [[notes[n]]], '<p:ph type="body" idx="1"/>')
+                          + _shape(4, [[str(n)]], '<p:ph type="sldNum" sz="quarter" idx="5"/>'))
+                zf.writestr(f'ppt/notesSlides/notesSlide{n}.xml', _NOTES_XML.format(shapes=shapes))
@@ -1,6 +1,15 @@
 # tests/test_adaptive.py
+import threading
 import pytest
-from backend.adaptive import order_questions
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from backend.app import app
+from backend import grading
+from backend.adaptive import order_questions, record_performance, get_poor_topics
+from backend.extensions import db
+from backend.models import User, TopicPerformance, QuizQuestion
+from backend.persistence import create_quiz_session
+from backend.quiz_parser import ParsedQuestion
 
 class DummyQuestion:
     def __init__(self, topic):
@@ -19,4 +28,80 @@ def test_order_questions_puts_poor_topics_first():
     assert ordered[0].topic in poor_topics
     assert ordered[1].topic in poor_topics
     # Remaining topics follow
-    assert ordered[-1].topic not in poor_topics 
\ No newline at end of file
+    assert ordered[-1].topic not in poor_topics 
+
+class Answered:
+    def __init__(self, topic, is_correct):
+        self.topic = topic
+        self.is_correct = is_correct
+
+
+@pytest.fixture
+def user_id(ctx):
+    user = User(email="adaptive@example.com", password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def test_record_performance_upserts_within_the_callers_transaction(user_id):
+    for topic, ok in [('math', True), ('math', False), ('math', False), ('history', True), (None, True)]:
+        record_performance(user_id, Answered(topic, ok))
+    db.session.rollback()
+    assert TopicPerformance.query.count() == 0
+
+    for topic, ok in [('math', True), ('math', False), ('math', False), ('history', True), ('art', True),
+                      ('art', False)]:
+        record_performance(user_id, Answered(topic, ok))
+    db.session.commit()
+    counts = {p.topic: (p.attempts, p.correct) for p in TopicPerformance.query.all()}
+    assert counts == {'math': (3, 1), 'history': (1, 1), 'art': (2, 1)}
+    assert sorted(get_poor_topics(user_id)) == ['art', 'math']
+    assert get_poor_topics(user_id, threshold=0.3) == []
+
+
+def test_default_answer_flow_counts_towards_topic_performance(user_id, monkeypatch):
+    # /chat answers (instant feedback off) and the results-page free-response grading
+    quiz = create_quiz_session(user_id, [
+        ParsedQuestion("What is 2+2?", {'A': '3', 'B': '4', 'C': '5', 'D': '6'}, 'B', topic='Math'),
+        ParsedQuestion("Define osmosis", {}, 'Water diffusion', topic='Biology'),
+    ])
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['quiz_session_id'] = quiz.id
+        sess['current_question_index'] = 0
+    client.post('/chat', data={'answer': 'A'})
+    client.post('/chat', data={'answer': 'Diffusion of water'})
+    monkeypatch.setattr(grading, 'evaluate_answer', lambda *args: {'status': 'Correct', 'explanation': 'Yes.'})
+    grading.grade_free_response(QuizQuestion.query.filter_by(session_id=quiz.id).all(), 'key', batch_size=1)
+    counts = {p.topic: (p.attempts, p.correct) for p in TopicPerformance.query.all()}
+    assert counts == {'Math': (1, 0), 'Biology': (1, 1)}
+
+
+def test_concurrent_answers_do_not_lose_updates(tmp_path):
+    # separate connections on a file database, as in the multi-process deployment
+    engine = create_engine(f"sqlite:///{tmp_path / 'perf.db'}", connect_args={'timeout': 30})
+    db.metadata.create_all(engine, tables=[User.__table__, TopicPerformance.__table__])
+    with Session(engine) as s:
+        s.add(User(id=1, email='race@example.com', password_hash='x'))
+        s.commit()
+
+    def answer(n):
+        with app.app_context():
+            with Session(engine) as s:
+                # record_performance writes through db.session; point it at this connection
+                db.session.registry.set(s)
+                for i in range(n):
+                    record_performance(1, Answered('math', i % 2 == 0))
+                    s.commit()
+                db.session.registry.clear()
+
+    threads = [threading.Thread(target=answer, args=(25,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with Session(engine) as s:
+        perf = s.query(TopicPerformance).one()
+        assert (perf.attempts, perf.correct) == (100, 52)
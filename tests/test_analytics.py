@@ -0,0 +1,115 @@
+# tests/test_analytics.py
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from backend import app as app_module
+from backend.adaptive import record_performance
+from backend.analytics import record_verdict, rebuild_rollups
+from backend.extensions import db
+from backend.models import User, QuizQuestion, DailyStats, DailyTopicStats, TopicPerformance
+from backend.persistence import create_quiz_session
+from backend.quiz_parser import ParsedQuestion
+
+OPTIONS = {'A': 'Paris', 'B': 'Rome', 'C': 'Madrid', 'D': 'Berlin'}
+
+
+def login(client):
+    user = User(email='analytics@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+    return user.id
+
+
+def test_answers_update_daily_rollups_and_the_dashboard_reads_them(client):
+    user_id = login(client)
+    quiz = create_quiz_session(user_id, [
+        ParsedQuestion("Capital of France?", dict(OPTIONS), 'A', topic='Geography'),
+        ParsedQuestion("Capital of Italy?", dict(OPTIONS), 'B', topic='Geography'),
+        ParsedQuestion("Define osmosis", {}, 'Water diffusion', topic='Biology'),
+    ])
+    QuizQuestion.query.filter_by(session_id=quiz.id).update(
+        {'created_at': datetime.utcnow() - timedelta(seconds=60)})
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['quiz_session_id'] = quiz.id
+        sess['current_question_index'] = 0
+    for answer in ('A', 'C', 'Diffusion of water'):
+        client.post('/chat', data={'answer': answer})
+    # the free-response verdict lands later (results page / background grading)
+    fr = QuizQuestion.query.filter_by(session_id=quiz.id, question_index=2).one()
+    fr.eval_status, fr.is_correct = 'Correct', True
+    record_verdict(user_id, fr)
+    db.session.commit()
+
+    today = datetime.utcnow().date()
+    day = DailyStats.query.filter_by(user_id=user_id, day=today).one()
+    assert (day.answers, day.graded, day.correct) == (3, 3, 2)
+    assert day.answer_seconds == pytest.approx(180, abs=15)
+    topics = {t.topic: (t.answers, t.graded, t.correct) for t in DailyTopicStats.query.all()}
+    assert topics == {'Geography': (2, 2, 1), 'Biology': (1, 1, 1)}
+
+    data = client.get('/analytics?days=7').get_json()
+    assert data['since'] == (today - timedelta(days=6)).isoformat()
+    assert [(d['day'], d['answers'], d['accuracy']) for d in data['days']] == [(today.isoformat(), 3, 0.6667)]
+    assert 55 <= data['days'][0]['avg_answer_seconds'] <= 65
+    assert [(t['topic'], t['accuracy']) for t in data['topic_totals']] == [('Biology', 1.0), ('Geography', 0.5)]
+
+    # a rebuild from the stored history gives the same rollups
+    before = [(r.day, r.answers, r.graded, r.correct) for r in DailyStats.query.all()]
+    assert rebuild_rollups() == (1, 2)
+    assert [(r.day, r.answers, r.graded, r.correct) for r in DailyStats.query.all()] == before
+
+
+def test_dashboard_does_not_read_quiz_questions(client):
+    user_id = login(client)
+    today = datetime.utcnow().date()
+    db.session.add_all([DailyStats(user_id=user_id, day=today - timedelta(days=i), answers=10, graded=10,
+                                   correct=i % 10, answer_seconds=100) for i in range(60)])
+    db.session.commit()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        data = client.get('/analytics').get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert len(data['days']) == 30 and data['days'][-1]['day'] == today.isoformat()
+    assert not any('quiz_questions' in s for s in statements)
+    assert len(client.get('/analytics?days=100000').get_json()['days']) == 60
+
+
+def test_re_answering_replaces_the_earlier_counts(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'explain_answer_async', lambda *args: None)
+    user_id = login(client)
+    quiz = create_quiz_session(user_id, [
+        ParsedQuestion("Capital of France?", dict(OPTIONS), 'A', topic='Geography'),
+        ParsedQuestion("Define osmosis", {}, 'Water diffusion', topic='Biology'),
+    ])
+    mc, fr = QuizQuestion.query.filter_by(session_id=quiz.id).order_by(QuizQuestion.question_index).all()
+    with client.session_transaction() as sess:
+        sess['quiz_session_id'] = quiz.id
+        sess['current_question_index'] = 0
+    client.post('/chat', data={'answer': 'C'})
+    client.post('/answer_question', json={'question_id': mc.id, 'answer': 'A'})
+    client.post('/answer_question', json={'question_id': fr.id, 'answer': 'Diffusion of water'})
+    # its verdict is stored and counted, then the answer is changed
+    fr = db.session.get(QuizQuestion, fr.id)
+    fr.eval_status, fr.is_correct = 'Correct', True
+    record_performance(user_id, fr)
+    record_verdict(user_id, fr)
+    db.session.commit()
+    client.post('/answer_question', json={'question_id': fr.id, 'answer': 'No idea'})
+
+    day = DailyStats.query.filter_by(user_id=user_id).one()
+    assert (day.answers, day.graded, day.correct) == (2, 1, 1)
+    performance = {t.topic: (t.attempts, t.correct) for t in TopicPerformance.query.all()}
+    assert performance == {'Geography': (1, 1), 'Biology': (0, 0)}
+    # the same as a rebuild from the stored answers
+    assert rebuild_rollups() == (1, 2)
+    day = DailyStats.query.filter_by(user_id=user_id).one()
+    assert (day.answers, day.graded, day.correct) == (2, 1, 1)
@@ -0,0 +1,129 @@
+# tests/test_answer_feedback.py
+import threading
+import pytest
+from backend import app as app_module
+from backend import grading
+from backend.app import app
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion, ReviewCard, DailyStats
+
+
+@pytest.fixture
+def futures(monkeypatch):
+    # keep the background jobs so the test can wait for them deterministically
+    submitted = []
+
+    def tracking(*args, **kwargs):
+        future = grading.explain_answer_async(*args, **kwargs)
+        submitted.append(future)
+        return future
+
+    monkeypatch.setattr(app_module, 'explain_answer_async', tracking)
+    return submitted
+
+
+def make_question(client, options, model_name=None):
+    user = User(email='feedback@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    quiz = QuizSession(user_id=user.id, num_questions=1, model_name=model_name)
+    db.session.add(quiz)
+    db.session.commit()
+    q = QuizQuestion(session_id=quiz.id, question_index=0, prompt='Why?', options=options,
+                     correct_answer='A' if options else 'because', explanation='old')
+    db.session.add(q)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+    return q.id
+
+
+def test_answer_returns_before_explanation_is_ready(client, futures, monkeypatch):
+    release = threading.Event()
+
+    def slow_evaluate(api_key, model_name, question, answer, reference):
+        release.wait(5)
+        return {'status': 'Correct', 'explanation': 'Because A.'}
+
+    monkeypatch.setattr(grading, 'evaluate_answer', slow_evaluate)
+    qid = make_question(client, {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'})
+
+    resp = client.post('/answer_question', json={'question_id': qid, 'answer': 'A'})
+    data = resp.get_json()
+    assert data['is_correct'] is True and data['status'] == 'pending'
+    assert client.get(data['poll_url']).get_json()['ready'] is False
+
+    release.set()
+    futures[0].result(timeout=5)
+    status = client.get(data['poll_url']).get_json()
+    assert status == {'question_id': qid, 'ready': True, 'explanation': 'Because A.',
+                      'status': 'Correct', 'is_correct': True}
+
+
+def test_free_response_verdict_comes_from_background_grade(client, futures, monkeypatch):
+    monkeypatch.setattr(grading, 'evaluate_answer',
+                        lambda *args: {'status': 'Partially Correct', 'explanation': 'Close.'})
+    qid = make_question(client, {})
+    data = client.post('/answer_question', json={'question_id': qid, 'answer': 'maybe'}).get_json()
+    assert data['is_correct'] is None
+    futures[0].result(timeout=5)
+    status = client.get(data['poll_url']).get_json()
+    assert status['status'] == 'Partially Correct' and status['is_correct'] is False
+    assert db.session.get(QuizQuestion, qid).eval_status == 'Partially Correct'
+
+
+def test_failed_grade_is_reported_but_not_stored(client, futures, monkeypatch):
+    monkeypatch.setattr(grading, 'evaluate_answer',
+                        lambda *args: {'status': 'Error', 'explanation': 'Evaluation call failed.'})
+    qid = make_question(client, {})
+    data = client.post('/answer_question', json={'question_id': qid, 'answer': 'maybe'}).get_json()
+    futures[0].result(timeout=5)
+    status = client.get(data['poll_url']).get_json()
+    assert status['ready'] is True and status['status'] == 'Error'
+    # left ungraded so the results page retries it, and not counted as wrong meanwhile
+    q = db.session.get(QuizQuestion, qid)
+    assert q.eval_status is None and q.is_correct is None
+
+
+def test_answer_status_is_only_served_to_the_questions_owner(client):
+    qid = make_question(client, {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'})
+    other = User(email='other@example.com', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(other.id)
+    resp = client.get(f'/answer_status/{qid}')
+    assert resp.status_code == 404 and 'explanation' not in resp.get_json()
+    # nor can another user answer it or fetch its hint
+    assert client.post('/answer_question', json={'question_id': qid, 'answer': 'A'}).status_code == 404
+    assert client.post('/get_hint', json={'question_id': qid}).status_code == 404
+    q = db.session.get(QuizQuestion, qid)
+    assert q.user_answer is None and q.hint is None
+    assert ReviewCard.query.count() == 0 and DailyStats.query.count() == 0
+
+
+def test_calls_for_a_quiz_use_its_backend_and_key(client, futures, monkeypatch):
+    monkeypatch.setitem(app.config, 'LLM_PROVIDER', '')
+    monkeypatch.setitem(app.config, 'OPENAI_API_KEY', 'server-openai')
+    calls = []
+
+    def evaluate(api_key, model_name, *args):
+        calls.append(('grade', api_key, model_name))
+        return {'status': 'Correct', 'explanation': 'Yes.'}
+
+    monkeypatch.setattr(grading, 'evaluate_answer', evaluate)
+    monkeypatch.setattr(app_module, 'generate_hint',
+                        lambda api_key, model_name, prompt: calls.append(('hint', api_key, model_name)) or 'Hint.')
+    qid = make_question(client, {}, model_name='openai')
+    client.post('/get_hint', json={'question_id': qid})
+    client.post('/answer_question', json={'question_id': qid, 'answer': 'because'})
+    futures[0].result(timeout=5)
+    assert calls == [('hint', 'server-openai', 'openai'), ('grade', 'server-openai', 'openai')]
+    # the results page grades with the same backend
+    q = db.session.get(QuizQuestion, qid)
+    q.eval_status = None
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['quiz_session_id'] = q.session_id
+    assert client.get('/results').status_code == 200
+    assert calls[-1] == ('grade', 'server-openai', 'openai')
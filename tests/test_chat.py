@@ -0,0 +1,59 @@
+# tests/test_chat.py
+import pytest
+from sqlalchemy import event, insert
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion
+
+
+def start_quiz(client, n_questions):
+    user = User(email=f"chat{n_questions}@example.com", password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    quiz = QuizSession(user_id=user.id, num_questions=n_questions)
+    db.session.add(quiz)
+    db.session.flush()
+    db.session.execute(insert(QuizQuestion), [
+        {'session_id': quiz.id, 'question_index': i, 'prompt': f"Question {i}",
+         'options': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'}
+        for i in range(n_questions)
+    ])
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['quiz_session_id'] = quiz.id
+        sess['current_question_index'] = 0
+    return quiz.id
+
+
+def loaded_question_rows(client, method, path, **kwargs):
+    # Count QuizQuestion instances materialized by the ORM during one request
+    loaded = []
+
+    def on_load(target, context):
+        loaded.append(target)
+
+    event.listen(QuizQuestion, 'load', on_load)
+    try:
+        resp = getattr(client, method)(path, **kwargs)
+    finally:
+        event.remove(QuizQuestion, 'load', on_load)
+    return resp, len(loaded)
+
+
+@pytest.mark.parametrize('n_questions', [5, 100])
+def test_chat_loads_only_the_current_question(client, n_questions):
+    start_quiz(client, n_questions)
+    resp, rows = loaded_question_rows(client, 'get', '/chat')
+    assert f"Question 1 of {n_questions}" in resp.get_data(as_text=True)
+    assert rows == 1
+    resp, rows = loaded_question_rows(client, 'post', '/chat', data={'answer': 'A'})
+    assert resp.status_code == 302 and resp.location.endswith('/chat')
+    assert rows == 1
+
+
+def test_chat_redirects_to_results_after_last_question(client):
+    start_quiz(client, 2)
+    client.post('/chat', data={'answer': 'A'})
+    resp = client.post('/chat', data={'answer': 'B'})
+    assert resp.location.endswith('/results')
+    assert client.get('/chat').location.endswith('/results')
@@ -0,0 +1,181 @@
+# tests/test_chunking.py
+from datetime import datetime
+import pytest
+from backend import generation, jobs, llm
+from backend.app import app
+from backend.chunking import estimate_tokens, split_content, plan_generation_calls
+from backend.dedup import check_questions
+from backend.extensions import db
+from backend.generation import generate_chunked_quiz
+from backend.jobs import enqueue_generation_job, run_worker
+from backend.mastery import invalidate_mastery
+from backend.models import User, QuizSession, QuizQuestion, GenerationJob
+from backend.quiz_parser import ParsedQuestion
+
+
+def test_split_content_keeps_small_text_whole():
+    assert split_content("  Short notes.  ") == ["Short notes."]
+    assert split_content("   ") == []
+
+
+def test_split_content_breaks_on_slide_boundaries():
+    slides = [f"Slide {i}: " + "cells divide " * 40 for i in range(12)]
+    chunks = split_content('\n\n'.join(slides), max_tokens=300)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 300 for c in chunks)
+    # nothing lost, order kept, no slide split across chunks
+    assert '\n\n'.join(chunks) == '\n\n'.join(s.strip() for s in slides)
+
+
+def test_split_content_cuts_unbroken_text():
+    chunks = split_content("x" * 10000, max_tokens=500)
+    assert ''.join(chunks) == "x" * 10000
+    assert all(estimate_tokens(c) <= 501 for c in chunks)
+
+
+def test_plan_generation_calls_spreads_questions_by_size():
+    chunks = ["a" * 4000, "b" * 2000, "c" * 2000]
+    calls = plan_generation_calls(chunks, 8)
+    assert sum(n for _, n in calls) == 8
+    assert [n for _, n in calls] == [4, 2, 2]
+    assert plan_generation_calls([], 5) == []
+
+
+def test_large_allocations_are_spread_over_distinct_slices():
+    # the default 20-question quiz (22 with overage) from one chunk
+    chunk = '\n\n'.join(f"Slide {i}: " + ' '.join(["enzymes bind substrates"] * 30) for i in range(10))
+    calls = plan_generation_calls([chunk], 22, per_call=15)
+    assert len(calls) > 1 and sum(n for _, n in calls) == 22
+    assert all(n <= 15 for _, n in calls)
+    # every call reads different slides, in document order
+    assert len({c for c, _ in calls}) == len(calls)
+    assert '\n\n'.join(c for c, _ in calls) == chunk
+    # text too short to slice gets one call, never repeated calls on the same text
+    assert plan_generation_calls(["a" * 400], 40, per_call=15) == [("a" * 400, 40)]
+
+
+def test_generate_chunked_quiz_drops_repeats_and_caps_count(monkeypatch):
+    responses = {
+        'one': "Title: Cells\n1. What is a cell?\nAnswer: a unit<|Q|>\n2. What is DNA?\nAnswer: a molecule<|Q|>",
+        'two': "Title: Other\n1. What is a  CELL?\nAnswer: a unit<|Q|>\n2. What is RNA?\nAnswer: a molecule<|Q|>",
+    }
+    monkeypatch.setattr(generation, 'generate_questions',
+                        lambda api_key, model_name, prompt: responses['one' if 'one' in prompt else 'two'])
+    batches = list(generate_chunked_quiz(None, 'stub', [('one', 2), ('two', 2)], 'free_response', 10))
+    prompts = [q.prompt for _, qs in batches for q in qs]
+    assert sorted(prompts) == ['What is DNA?', 'What is RNA?', 'What is a cell?']
+
+    batches = list(generate_chunked_quiz(None, 'stub', [('one', 2), ('two', 2)], 'free_response', 2))
+    assert sum(len(qs) for _, qs in batches) == 2
+
+
+@pytest.fixture
+def client(ctx, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'GENERATION_QUEUE', 'worker')
+    monkeypatch.setitem(app.config, 'JOB_UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(app.config, 'CHUNK_TOKENS', 200)
+    llm.configure(force_provider='stub')
+    yield ctx.test_client()
+    llm.configure(force_provider=app.config['LLM_PROVIDER'])
+
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_large_source_is_generated_chunk_by_chunk(client, monkeypatch, stream):
+    monkeypatch.setitem(app.config, 'STREAM_GENERATION', stream)
+    prompts = []
+    real_generate = generation.generate_questions
+
+    def counting(api_key, model_name, prompt):
+        prompts.append(prompt)
+        return real_generate(api_key, model_name, prompt)
+
+    monkeypatch.setattr(generation, 'generate_questions', counting)
+    user = User(email='chunks@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    topics = ['mitochondria', 'ribosomes', 'chloroplasts', 'lysosomes']
+    content = '\n\n'.join(f"{t} {t}-matrix {t}-membrane " * 12 for t in topics)
+    job = enqueue_generation_job(user.id, 'gemini', 'multiple_choice', 12, content=content)
+
+    assert run_worker(app, burst=True) == 1
+    job = db.session.get(GenerationJob, job.id)
+    assert job.status == 'done'
+    assert len(prompts) > 1
+    assert all(estimate_tokens(p) < 200 + 200 for p in prompts)
+    quiz = db.session.get(QuizSession, job.session_id)
+    questions = QuizQuestion.query.filter_by(session_id=quiz.id).order_by(QuizQuestion.question_index).all()
+    assert quiz.status == 'in_progress' and quiz.num_questions == len(questions) == 12
+    assert [q.question_index for q in questions] == list(range(12))
+    assert len({q.prompt for q in questions}) == 12
+
+
+def weak_algebra_user():
+    """A user who gets Algebra wrong and Poetry right."""
+    user = User(email='ranked@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    past = QuizSession(user_id=user.id, num_questions=6)
+    db.session.add(past)
+    db.session.flush()
+    for i, (topic, ok) in enumerate([('Poetry', True)] * 3 + [('Algebra', False)] * 3):
+        db.session.add(QuizQuestion(session_id=past.id, question_index=i, prompt=f"Old {i}", options={},
+                                    correct_answer='x', user_answer='x', topic=topic, is_correct=ok,
+                                    answered_at=datetime.utcnow()))
+    db.session.commit()
+    invalidate_mastery(user.id)
+    return user
+
+
+def saved_questions(session_id):
+    db.session.expire_all()
+    return QuizQuestion.query.filter_by(session_id=session_id).order_by(QuizQuestion.question_index).all()
+
+
+def test_streamed_batches_are_ranked_once_generation_ends(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'STREAM_GENERATION', True)
+    user = weak_algebra_user()
+
+    def batches(*args, **kwargs):
+        yield 'Ranked', [ParsedQuestion("Scan the sonnet meter", topic='Poetry'),
+                         ParsedQuestion("Factor the quadratic polynomial", topic='Algebra')]
+        # the quiz is open by now: the first question gets answered, the second is on screen
+        job = GenerationJob.query.filter_by(user_id=user.id).one()
+        QuizQuestion.query.filter_by(session_id=job.session_id, question_index=0).update({'user_answer': 'iambic'})
+        db.session.commit()
+        yield None, [ParsedQuestion("Name the haiku syllable pattern", topic='Poetry'),
+                     ParsedQuestion("Solve the linear equation system", topic='Algebra')]
+        yield None, [ParsedQuestion("Define an ode and its origin", topic='Poetry'),
+                     ParsedQuestion("Expand the binomial cube formula", topic='Algebra')]
+
+    monkeypatch.setattr(jobs, 'generate_chunked_quiz', batches)
+    topics = ['mitochondria', 'ribosomes', 'chloroplasts', 'lysosomes']
+    content = '\n\n'.join(f"{t} {t}-matrix {t}-membrane " * 12 for t in topics)
+    job = enqueue_generation_job(user.id, 'gemini', 'free_response', 6, content=content)
+
+    assert run_worker(app, burst=True) == 1
+    job = db.session.get(GenerationJob, job.id)
+    questions = saved_questions(job.session_id)
+    # questions already reached keep their place; the rest are ranked across all batches
+    assert [q.prompt.split()[0] for q in questions] == ['Scan', 'Factor', 'Solve', 'Expand', 'Name', 'Define']
+    assert [q.question_index for q in questions] == list(range(6))
+    # the near-duplicate index follows the renumbered questions
+    for q in questions:
+        assert check_questions(user.id, job.session_id, [ParsedQuestion(q.prompt)]) == []
+
+
+def test_single_streamed_quiz_is_ranked_by_mastery(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'STREAM_GENERATION', True)
+    user = weak_algebra_user()
+    items = [("Scan the sonnet meter", 'Poetry'), ("Name the haiku syllable pattern", 'Poetry'),
+             ("Factor the quadratic polynomial", 'Algebra'), ("Define an ode and its origin", 'Poetry'),
+             ("Solve the linear equation system", 'Algebra')]
+    monkeypatch.setattr(generation, 'generate_questions_stream', lambda *args: iter(
+        ["Title: Mixed\n"] + [f"{prompt}\nTopic: {topic}\nAnswer: x<|Q|>" for prompt, topic in items]))
+    job = enqueue_generation_job(user.id, 'gemini', 'free_response', 5, content="Poems and equations.")
+
+    assert run_worker(app, burst=True) == 1
+    job = db.session.get(GenerationJob, job.id)
+    assert job.status == 'done'
+    # the first question may already be open; the rest follow mastery
+    assert [q.topic for q in saved_questions(job.session_id)] == ['Poetry', 'Algebra', 'Algebra', 'Poetry',
+                                                                   'Poetry']
@@ -0,0 +1,139 @@
+# tests/test_dedup.py
+import hashlib
+import random
+import struct
+import pytest
+from sqlalchemy import event
+from backend import dedup
+from backend.dedup import shingles, jaccard, band_keys, band_keys_batch, forget_session, DUPLICATE_SIMILARITY
+from backend.extensions import db
+from backend.models import User, QuizQuestion, QuestionBucket
+from backend.persistence import create_quiz_session
+from backend.quiz_parser import ParsedQuestion
+
+OPTIONS = {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}
+
+
+@pytest.fixture
+def users(ctx):
+    found = [User(email=f"dedup{i}@example.com", password_hash='x') for i in range(2)]
+    db.session.add_all(found)
+    db.session.commit()
+    return [u.id for u in found]
+
+
+def mc(prompt):
+    return ParsedQuestion(prompt, dict(OPTIONS), 'A')
+
+
+def prompts(session_id):
+    return [q.prompt for q in QuizQuestion.query.filter_by(session_id=session_id)
+            .order_by(QuizQuestion.question_index)]
+
+
+@pytest.mark.parametrize('a, b, same', [
+    ("1. What is the powerhouse of the cell?", "Which organelle is the powerhouse of a cell?", True),
+    ("Explain the role of ATP synthase in respiration.",
+     "Describe the role of ATP synthase in cellular respiration.", True),
+    ("What does DNA polymerase do?", "What does RNA polymerase do?", False),
+    ("What is the capital of France?", "Which river flows through Paris?", False),
+])
+def test_similarity_of_rephrased_prompts(a, b, same):
+    assert (jaccard(shingles(a), shingles(b)) >= DUPLICATE_SIMILARITY) is same
+    if same:
+        assert set(band_keys(shingles(a))) & set(band_keys(shingles(b)))
+
+
+def test_vectorized_band_keys_match_the_stored_scheme():
+    # stored bucket keys must not change: compare with the scalar MinHash / blake2b definition
+    def reference(words):
+        sig = [min((a * h + b) % dedup._PRIME for h in words) for a, b in dedup._PERMS]
+        return [int.from_bytes(hashlib.blake2b(struct.pack(f'<H{dedup.ROWS}Q', band,
+                                                           *sig[band * dedup.ROWS:(band + 1) * dedup.ROWS]),
+                                               digest_size=8).digest(), 'little', signed=True)
+                for band in range(dedup.BANDS)]
+
+    rng = random.Random(7)
+    sets = [shingles("What is the powerhouse of the cell?"), shingles(''), {0, 0xFFFFFFFF}]
+    sets += [{rng.getrandbits(32) for _ in range(rng.randint(1, 40))} for _ in range(50)]
+    assert band_keys_batch(sets) == [reference(w) for w in sets]
+
+
+def test_near_duplicates_within_a_quiz_are_dropped(users):
+    quiz = create_quiz_session(users[0], [
+        mc("What is the powerhouse of the cell?"),
+        mc("What does DNA polymerase do?"),
+        mc("Which organelle is the powerhouse of a cell?"),
+        mc("What does RNA polymerase do?"),
+    ])
+    assert quiz.num_questions == 3
+    assert prompts(quiz.id) == ["What is the powerhouse of the cell?", "What does DNA polymerase do?",
+                                "What does RNA polymerase do?"]
+    assert QuestionBucket.query.filter_by(session_id=quiz.id).count() == 3 * len(band_keys(shingles('x')))
+
+
+def test_repeats_of_answered_questions_are_flagged(users):
+    first = create_quiz_session(users[0], [mc("What is the powerhouse of the cell?"),
+                                           mc("What does DNA polymerase do?")])
+    answered = QuizQuestion.query.filter_by(session_id=first.id, question_index=0).one()
+    answered.user_answer = 'A'
+    db.session.commit()
+
+    again = create_quiz_session(users[0], [mc("Which organelle is the powerhouse of a cell?"),
+                                           mc("Explain what DNA polymerase does.")])
+    flags = {q.prompt: q.repeat_of_id for q in QuizQuestion.query.filter_by(session_id=again.id)}
+    # kept in the new quiz; only the answered question counts as seen before
+    assert flags == {"Which organelle is the powerhouse of a cell?": answered.id,
+                     "Explain what DNA polymerase does.": None}
+    # the index is per user
+    other = create_quiz_session(users[1], [mc("What is the powerhouse of the cell?")])
+    assert QuizQuestion.query.filter_by(session_id=other.id).one().repeat_of_id is None
+
+    forget_session(first.id)
+    QuizQuestion.query.filter_by(session_id=first.id).delete()
+    db.session.commit()
+    assert QuestionBucket.query.filter_by(session_id=first.id).count() == 0
+    assert all(q.repeat_of_id is None for q in QuizQuestion.query.filter_by(session_id=again.id))
+
+
+def test_bucket_lookup_uses_the_user_index(users):
+    for s in range(20):
+        create_quiz_session(users[0], [mc(f"Question {s} about topic {s * 10 + i}") for i in range(10)])
+    db.session.execute(db.text('ANALYZE'))
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'question_lsh_buckets' in statement and statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        create_quiz_session(users[0], [mc("Question 3 about topic 31")])
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert statements
+    cur = db.session.connection().connection.cursor()
+    for statement, parameters in statements:
+        cur.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        plan = [row[-1] for row in cur.fetchall()]
+        assert any('ix_question_lsh_buckets_user_bucket' in line for line in plan), plan
+
+
+def test_copies_are_indexed_without_a_duplicate_check(users):
+    first = create_quiz_session(users[0], [mc("What is the powerhouse of the cell?")])
+    source = QuizQuestion.query.filter_by(session_id=first.id).one()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        again = ParsedQuestion(source.prompt, dict(OPTIONS), 'A', repeat_of=source.id)
+        copy = create_quiz_session(users[0], [again], dedup=False)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert not [s for s in statements if 'question_lsh_buckets' in s]
+    assert QuizQuestion.query.filter_by(session_id=copy.id).one().repeat_of_id == source.id
+    assert QuestionBucket.query.filter_by(session_id=copy.id).count() == dedup.BANDS
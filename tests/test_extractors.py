@@ -0,0 +1,63 @@
+# tests/test_extractors.py
+import io
+from backend import uploads
+from backend.parse_cache import ParseCache
+from backend.parser_pdf_text import iter_pdf_text, pdf_to_text
+from backend.parser_xlsx_text import iter_xlsx_text, xlsx_to_text
+from backend.upload_io import join_text
+from samples import make_pdf, make_xlsx
+
+
+def test_pdf_pages_stream_from_disk_and_memory(tmp_path):
+    path = tmp_path / 'deck.pdf'
+    path.write_bytes(make_pdf(3))
+    expected = [f"Page {i} mitochondria release energy" for i in range(3)]
+    # a real file is memory-mapped, an in-memory upload is read in place
+    with open(path, 'rb') as fh:
+        assert list(iter_pdf_text(fh)) == expected
+    assert list(iter_pdf_text(io.BytesIO(path.read_bytes()))) == expected
+    assert pdf_to_text(str(path)) == '\n\n'.join(expected)
+
+
+def test_xlsx_rows_stream(tmp_path):
+    path = tmp_path / 'sheet.xlsx'
+    make_xlsx(path, rows=3, sheets=2)
+    with open(path, 'rb') as fh:
+        rows = list(iter_xlsx_text(fh))
+    assert len(rows) == 6 and rows[0] == "Row 0 ribosomes build proteins 0"
+    assert xlsx_to_text(str(path)) == '\n\n'.join(rows)
+
+
+def test_max_chars_stops_reading_early():
+    consumed = []
+
+    def pieces():
+        for i in range(100):
+            consumed.append(i)
+            yield 'x' * 10
+
+    assert join_text(pieces(), max_chars=30) == 'xxxxxxxxxx\n\nxxxxxxxxxx\n\nxxxxxx'
+    assert len(consumed) == 3
+    assert len(pdf_to_text(io.BytesIO(make_pdf(50)), max_chars=100)) == 100
+
+
+def test_stream_hash_matches_bytes_hash():
+    data = make_pdf(2)
+    assert ParseCache.key_for_stream(io.BytesIO(data), 'pdf', 1, block_size=64) == ParseCache.key_for(data, 'pdf', 1)
+
+
+def test_truncated_text_is_not_cached(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'))
+    (tmp_path / 'deck.pdf').write_bytes(make_pdf(40))
+    files = [{'path': str(tmp_path / 'deck.pdf'), 'filename': 'deck.pdf'}]
+
+    def parse(**kwargs):
+        return uploads.parse_uploads(files, cache=cache, workers=0, **kwargs)[0]['text']
+
+    short = parse(max_chars=80)
+    assert len(short) == 80 and cache.stats()['memory_entries'] == 0
+    full = parse()
+    assert full.startswith(short) and cache.stats()['memory_entries'] == 1
+    # a complete cached text also serves later truncated reads
+    assert parse(max_chars=80) == short
+    assert cache.stats()['hits'] == 1
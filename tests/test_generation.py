@@ -0,0 +1,64 @@
+# tests/test_generation.py
+import threading
+from backend.app import app
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion
+from backend import generation
+from backend.generation import iter_quiz_items, parse_question_item, split_title
+from backend.quiz_parser import ParsedQuestion
+
+MC_ITEM = "1. What is 2+2?\nA) 3\nB) 4\nC) 5\nD) 6\nHint: Add them\nAnswer: B"
+MC_ITEM_2 = "2. What is 3 squared?\nA) 6\nB) 9\nC) 12\nD) 27\nHint: Multiply\nAnswer: B"
+
+
+def test_iter_quiz_items_handles_delimiters_split_across_chunks():
+    text = f"Title: Math\n{MC_ITEM}<|Q|>\n{MC_ITEM}<|Q|>"
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    items = list(iter_quiz_items(chunks))
+    assert len(items) == 2
+    title, first = split_title(items[0])
+    assert title == 'Math'
+    assert parse_question_item(first, 'multiple_choice').answer == 'B'
+
+
+def test_iter_quiz_items_yields_before_stream_ends():
+    def chunks():
+        yield f"{MC_ITEM}<|Q|>"
+        # the consumer must already have the first item at this point
+        assert seen, "first item should be yielded before the stream finishes"
+        yield MC_ITEM
+
+    seen = []
+    for item in iter_quiz_items(chunks()):
+        seen.append(item)
+    assert len(seen) == 2
+
+
+def test_parse_free_response_item():
+    parsed = parse_question_item("3. Explain gravity\nHint: Newton\nAnswer: Mass attracts mass", 'free_response')
+    assert parsed == ParsedQuestion('Explain gravity', {}, 'Mass attracts mass', 'Newton')
+
+
+def test_stream_quiz_into_session_saves_incrementally(ctx, monkeypatch):
+    monkeypatch.setattr(generation, 'generate_questions_stream',
+                        lambda *args: iter([f"Title: Math\n{MC_ITEM}<|Q|>", f"{MC_ITEM_2}<|Q|>",
+                                            f"{MC_ITEM}<|Q|>"]))
+    user = User(email='gen@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    quiz = QuizSession(user_id=user.id, status='generating', num_questions=5)
+    db.session.add(quiz)
+    db.session.commit()
+    ready = threading.Event()
+    generation.stream_quiz_into_session(app, quiz.id, 'key', 'gemini', 'prompt', 'multiple_choice', ready)
+    assert ready.is_set()
+    db.session.expire_all()
+    quiz = db.session.get(QuizSession, quiz.id)
+    assert quiz.status == 'in_progress'
+    assert quiz.title == 'Math'
+    assert quiz.num_questions == 2
+    qs = QuizQuestion.query.filter_by(session_id=quiz.id).order_by(QuizQuestion.question_index).all()
+    assert [q.question_index for q in qs] == [0, 1]
+    # the repeated third item is dropped as a near-duplicate
+    assert [q.options[q.correct_answer] for q in qs] == ['4', '9']
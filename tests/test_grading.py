@@ -0,0 +1,120 @@
+# tests/test_grading.py
+import threading
+import time
+from datetime import datetime
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion, DailyStats, ReviewCard, TopicPerformance
+from backend import grading
+
+
+def make_questions(n):
+    user = User(email='grade@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    quiz = QuizSession(user_id=user.id, question_type='free_response')
+    db.session.add(quiz)
+    db.session.commit()
+    qs = []
+    for i in range(n):
+        q = QuizQuestion(session_id=quiz.id, question_index=i, prompt=f"Q{i}",
+                         options={}, correct_answer='ref', user_answer='ans')
+        db.session.add(q)
+        qs.append(q)
+    db.session.commit()
+    return qs
+
+
+def test_grading_runs_concurrently_and_persists(ctx, monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_evaluate(api_key, model_name, question_text, user_ans, correct_ans):
+        with lock:
+            calls.append(question_text)
+        time.sleep(0.05)
+        return {'status': 'Correct', 'explanation': f"ok {question_text}"}
+
+    monkeypatch.setattr(grading, 'evaluate_answer', fake_evaluate)
+    qs = make_questions(10)
+    started = time.perf_counter()
+    evaluations = grading.grade_free_response(qs, 'key', max_workers=10, batch_size=1)
+    elapsed = time.perf_counter() - started
+    assert len(calls) == 10
+    # ten 50ms calls in parallel should take well under their 500ms sum
+    assert elapsed < 0.3
+    assert all(ev['status'] == 'Correct' for ev in evaluations)
+    assert all(q.eval_status == 'Correct' and q.is_correct for q in qs)
+
+    # a second view reads the stored verdicts without calling the model
+    calls.clear()
+    again = grading.grade_free_response(qs, 'key', batch_size=1)
+    assert calls == []
+    assert again[0]['explanation'] == 'ok Q0'
+
+
+def test_grading_errors_are_not_persisted(ctx, monkeypatch):
+    monkeypatch.setattr(grading, 'evaluate_answer',
+                        lambda *args: {'status': 'Error', 'explanation': 'boom'})
+    qs = make_questions(2)
+    evaluations = grading.grade_free_response(qs, 'key', batch_size=1)
+    assert evaluations[0]['status'] == 'Error'
+    assert qs[0].eval_status is None
+
+
+
+def test_skipped_questions_are_graded_but_not_counted(ctx, monkeypatch):
+    monkeypatch.setattr(grading, 'evaluate_answer', lambda *args: {'status': 'Incorrect', 'explanation': 'no'})
+    qs = make_questions(3)
+    now = datetime.utcnow()
+    for q, answer in zip(qs, ('ans', '', None)):
+        q.user_answer, q.topic, q.answered_at = answer, 'Biology', now if answer is not None else None
+    db.session.commit()
+    grading.grade_free_response(qs, 'key', batch_size=1)
+    assert all(q.eval_status == 'Incorrect' for q in qs)
+    user_id = qs[0].session.user_id
+    assert [c.question_id for c in ReviewCard.query.all()] == [qs[0].id]
+    assert [(t.attempts, t.correct) for t in TopicPerformance.query.filter_by(user_id=user_id)] == [(1, 0)]
+    assert [(d.graded, d.correct) for d in DailyStats.query.filter_by(user_id=user_id)] == [(1, 0)]
+
+def test_batch_grading_uses_one_call_per_chunk(ctx, monkeypatch):
+    from backend.llm import StubProvider
+    prompts = []
+    real_generate = StubProvider.generate
+
+    def counting_generate(self, prompt, **kwargs):
+        prompts.append(prompt)
+        return real_generate(self, prompt, **kwargs)
+
+    monkeypatch.setattr(StubProvider, 'generate', counting_generate)
+    qs = make_questions(25)
+    qs[3].user_answer = 'ref'
+    evaluations = grading.grade_free_response(qs, None, 'stub', batch_size=10)
+    assert len(prompts) == 3  # 10 + 10 + 5 answers
+    assert evaluations[3]['status'] == 'Correct' and qs[3].is_correct
+    assert all(q.eval_status == 'Incorrect' for i, q in enumerate(qs) if i != 3)
+
+
+def test_unparsed_batch_items_fall_back_to_single_calls(ctx, monkeypatch):
+    qs = make_questions(4)
+    ids = [q.id for q in qs]
+
+    class PartialProvider:
+        def generate(self, prompt, **kwargs):
+            # a truncated response: only the first two items were graded
+            return f"**ID:** {ids[0]}\nStatus: Correct\nExplanation: fine\n\nID: {ids[1]}\nStatus: incorrect.\nExpl"
+
+    single_calls = []
+    monkeypatch.setattr(grading, 'get_provider', lambda *args: PartialProvider())
+    monkeypatch.setattr(grading, 'evaluate_answer', lambda api_key, model_name, question, *args:
+                        single_calls.append(question) or {'status': 'Partially Correct', 'explanation': 'single'})
+    evaluations = grading.grade_free_response(qs, 'key')
+    assert sorted(single_calls) == ['Q2', 'Q3']
+    assert [ev['status'] for ev in evaluations] == ['Correct', 'Incorrect', 'Partially Correct', 'Partially Correct']
+
+
+def test_chunking_respects_token_budget():
+    jobs = [(i, 'x' * 400, 'answer', 'reference') for i in range(10)]
+    chunks = grading.chunk_grading_jobs(jobs, max_items=20, max_tokens=300)
+    assert [len(c) for c in chunks] == [2, 2, 2, 2, 2]
+    assert [job for chunk in chunks for job in chunk] == jobs
@@ -0,0 +1,105 @@
+# tests/test_jobs.py
+import io
+import os
+import pytest
+from backend import llm
+from backend.app import app
+from backend.extensions import db
+from backend.jobs import claim_next_job, enqueue_generation_job, run_worker
+from backend.models import User, QuizSession, QuizQuestion, GenerationJob
+
+
+@pytest.fixture
+def client(ctx, tmp_path, monkeypatch):
+    # jobs are run explicitly by the tests, never by a background thread
+    monkeypatch.setitem(app.config, 'GENERATION_QUEUE', 'worker')
+    monkeypatch.setitem(app.config, 'JOB_UPLOAD_DIR', str(tmp_path / 'uploads'))
+    llm.configure(force_provider='stub')
+    yield ctx.test_client()
+    llm.configure(force_provider=app.config['LLM_PROVIDER'])
+
+
+def login(client, email='jobs@example.com'):
+    user = User(email=email, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+    return user.id
+
+
+CONTENT = "Enzymes lower activation energy. Catalysts speed reactions without being consumed."
+
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_setup_queues_job_and_worker_builds_quiz(client, monkeypatch, stream):
+    monkeypatch.setitem(app.config, 'STREAM_GENERATION', stream)
+    login(client)
+    resp = client.post('/setup', data={
+        'pastedText': CONTENT, 'numQuestions': '5', 'questionType': 'multiple_choice', 'modelSelect': 'deepseek',
+        'contentFiles': (io.BytesIO(b"Uploaded notes about substrate binding sites."), 'notes.txt'),
+    }, content_type='multipart/form-data')
+    assert resp.status_code == 302 and '/setup?job=' in resp.location
+    job_id = int(resp.location.rsplit('=', 1)[1])
+    status = client.get(f'/jobs/{job_id}').get_json()
+    assert status['status'] == 'queued' and status['ready'] is False and status['open_url'] is None
+
+    assert run_worker(app, burst=True) == 1
+    status = client.get(f'/jobs/{job_id}').get_json()
+    assert status['status'] == 'done' and status['ready'] is True
+    quiz = db.session.get(QuizSession, status['session_id'])
+    assert quiz.status == 'in_progress' and quiz.title == 'Practice Quiz'
+    assert quiz.model_name == 'deepseek'
+    assert QuizQuestion.query.filter_by(session_id=quiz.id).count() == 5
+    # the spooled upload is removed once the job has finished
+    assert os.listdir(app.config['JOB_UPLOAD_DIR']) == []
+
+    resp = client.get(status['open_url'])
+    assert resp.location.endswith('/chat')
+    with client.session_transaction() as sess:
+        assert sess['quiz_session_id'] == quiz.id
+
+
+def test_job_without_content_fails_with_message(client):
+    user_id = login(client)
+    job = enqueue_generation_job(user_id, 'gemini', 'multiple_choice', 5, content='   ')
+    run_worker(app, burst=True)
+    status = client.get(f'/jobs/{job.id}').get_json()
+    assert status['status'] == 'failed' and status['error'] == "Please upload a file or paste some text."
+
+
+def test_each_job_is_claimed_once(client):
+    user_id = login(client)
+    first = enqueue_generation_job(user_id, 'gemini', 'multiple_choice', 5, content=CONTENT).id
+    second = enqueue_generation_job(user_id, 'gemini', 'multiple_choice', 5, content=CONTENT).id
+    assert claim_next_job() == first
+    assert claim_next_job() == second
+    assert claim_next_job() is None
+    assert db.session.get(GenerationJob, first).attempts == 1
+
+
+def test_jobs_are_private(client):
+    owner = login(client)
+    job = enqueue_generation_job(owner, 'gemini', 'multiple_choice', 5, content=CONTENT)
+    login(client, email='other@example.com')
+    assert client.get(f'/jobs/{job.id}').status_code == 404
+    assert client.get(f'/jobs/{job.id}/open').status_code == 404
+
+
+def test_deleting_a_generated_session_keeps_its_job(client):
+    user_id = login(client)
+    job = enqueue_generation_job(user_id, 'gemini', 'multiple_choice', 5, content=CONTENT)
+    assert run_worker(app, burst=True) == 1
+    session_id = db.session.get(GenerationJob, job.id).session_id
+    db.session.commit()
+    db.session.execute(db.text('PRAGMA foreign_keys=ON'))
+    try:
+        resp = client.post(f'/sessions/{session_id}/delete')
+    finally:
+        db.session.rollback()
+        db.session.execute(db.text('PRAGMA foreign_keys=OFF'))
+    assert resp.status_code == 302
+    db.session.expire_all()
+    assert db.session.get(QuizSession, session_id) is None
+    job = db.session.get(GenerationJob, job.id)
+    assert job.status == 'done' and job.session_id is None
@@ -0,0 +1,74 @@
+# tests/test_llm.py
+import json
+import httpx
+import pytest
+from backend import llm
+from backend.llm import get_provider, StubProvider, OpenAIProvider, LLMError
+from backend.generation import build_quiz_prompt, iter_quiz_items, split_title, parse_question_item
+from backend.grading import evaluate_answer
+
+
+@pytest.mark.parametrize('question_type', ['multiple_choice', 'free_response'])
+def test_stub_generates_parseable_quiz(question_type):
+    prompt = build_quiz_prompt("Photosynthesis converts light into chemical energy.", question_type, 7)
+    provider = get_provider('stub')
+    raw = provider.generate(prompt)
+    assert raw == provider.generate(prompt)  # deterministic
+    items = list(iter_quiz_items(provider.stream(prompt)))
+    title, items[0] = split_title(items[0])
+    assert title == 'Practice Quiz'
+    parsed = [parse_question_item(item, question_type) for item in items]
+    assert len(parsed) == 7
+    if question_type == 'multiple_choice':
+        assert all(len(q.options) == 4 and q.answer in 'ABCD' for q in parsed)
+    else:
+        assert all(q.answer for q in parsed)
+
+
+def test_stub_grading_through_evaluate_answer():
+    assert evaluate_answer(None, 'stub', 'Q', 'mass attracts', 'mass attracts')['status'] == 'Correct'
+    assert evaluate_answer(None, 'stub', 'Q', 'mass things', 'mass attracts')['status'] == 'Partially Correct'
+    assert evaluate_answer(None, 'stub', 'Q', 'no idea', 'mass attracts')['status'] == 'Incorrect'
+
+
+def test_key_required_for_remote_backends():
+    assert get_provider('gemini', None) is None
+    assert isinstance(get_provider('openai', 'k'), OpenAIProvider)
+    with pytest.raises(ValueError):
+        get_provider('nope', 'k')
+
+
+def test_forced_provider_overrides_selection():
+    llm.configure(force_provider='stub')
+    try:
+        assert isinstance(get_provider('gemini', None), StubProvider)
+    finally:
+        llm.configure(force_provider=None)
+
+
+def test_openai_adapter_generate_and_stream(monkeypatch):
+    def handler(request):
+        body = json.loads(request.content)
+        assert request.url.path.endswith('/chat/completions')
+        assert body['model'] == 'gpt-4o-mini'
+        if body['stream']:
+            events = ''.join(
+                f"data: {json.dumps({'choices': [{'delta': {'content': part}}]})}\n\n"
+                for part in ['Hel', 'lo']
+            ) + "data: [DONE]\n\n"
+            return httpx.Response(200, text=events)
+        return httpx.Response(200, json={'choices': [{'message': {'content': 'Hello'}}]})
+
+    client = httpx.Client(base_url=OpenAIProvider.base_url, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm.http_registry, 'get', lambda api_key, base_url: client)
+    provider = get_provider('openai', 'k')
+    assert provider.generate('hi') == 'Hello'
+    assert ''.join(provider.stream('hi')) == 'Hello'
+
+
+def test_openai_adapter_raises_llm_error(monkeypatch):
+    client = httpx.Client(base_url=OpenAIProvider.base_url,
+                          transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+    monkeypatch.setattr(llm.http_registry, 'get', lambda api_key, base_url: client)
+    with pytest.raises(LLMError):
+        get_provider('openai', 'k').generate('hi')
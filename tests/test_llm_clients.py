@@ -0,0 +1,53 @@
+# tests/test_llm_clients.py
+import threading
+from backend import llm_clients
+from backend.llm_clients import ClientRegistry
+
+
+class FakeClient:
+    def __init__(self, api_key, model):
+        self.key = (api_key, model)
+
+
+def test_clients_are_reused_per_key_and_model():
+    registry = ClientRegistry(factory=FakeClient)
+    a = registry.get('key1', 'gemini')
+    assert registry.get('key1', 'gemini') is a
+    assert registry.get('key2', 'gemini') is not a
+    assert registry.get('key1', 'openai') is not a
+    assert registry.stats()['created'] == 3
+
+
+def test_idle_clients_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_clients.time, 'monotonic', lambda: now[0])
+    registry = ClientRegistry(idle_timeout=60, factory=FakeClient)
+    old = registry.get('key1')
+    now[0] += 61
+    registry.get('key2')
+    assert registry.stats()['evicted'] == 1
+    assert registry.get('key1') is not old
+
+
+def test_registry_is_bounded_and_thread_safe():
+    registry = ClientRegistry(max_clients=4, factory=FakeClient)
+    seen = []
+
+    def worker(i):
+        seen.append(registry.get(f"key{i % 8}"))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(64)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(seen) == 64
+    assert registry.stats()['clients'] <= 4
+
+
+def test_default_factory_builds_pooled_genai_client():
+    registry = ClientRegistry(pool_size=3)
+    client = registry.get('dummy-key')
+    assert registry.get('dummy-key') is client
+    registry.close_all()
+    assert registry.stats()['clients'] == 0
@@ -0,0 +1,69 @@
+# tests/test_mastery.py
+from datetime import datetime, timedelta
+import pytest
+from backend.app import app
+from backend.adaptive import order_questions
+from backend.extensions import db
+from backend.mastery import estimate_mastery, get_mastery, invalidate_mastery, PRIOR_CORRECT, PRIOR_WRONG
+from backend.models import User, QuizSession, QuizQuestion
+from backend.persistence import create_quiz_session
+from backend.quiz_parser import ParsedQuestion
+
+NOW = datetime(2025, 6, 1)
+
+
+def test_posterior_counts_are_recency_weighted_per_topic():
+    topics = ['Math', 'math', 'History', 'History', 'Art']
+    correct = [True, False, True, True, False]
+    when = [NOW, NOW - timedelta(days=30), NOW, NOW - timedelta(days=60), NOW]
+    m = estimate_mastery(topics, correct, when, now=NOW, half_life_days=30)
+    assert m.keys == ['art', 'history', 'math']
+    assert m.alpha.tolist() == pytest.approx([PRIOR_CORRECT, PRIOR_CORRECT + 1.25, PRIOR_CORRECT + 1])
+    assert m.beta.tolist() == pytest.approx([PRIOR_WRONG + 1, PRIOR_WRONG, PRIOR_WRONG + 0.5])
+    # an old mistake weighs less than a fresh success
+    assert m.mastery('Math') > 0.5 and m.mastery('Geology') == 0.5
+    assert m.poor_topics(threshold=0.6) == ['art', 'math']
+
+
+def test_questions_are_ranked_by_expected_gain():
+    m = estimate_mastery(['weak'] * 6 + ['strong'] * 6, [False] * 6 + [True] * 6, [NOW] * 12, now=NOW)
+    questions = [ParsedQuestion(f"Q{i}", topic=t) for i, t in enumerate(['strong', 'new', 'weak', None, 'weak'])]
+    assert [q.prompt for q in order_questions(questions, mastery=m)] == ['Q2', 'Q4', 'Q1', 'Q3', 'Q0']
+    assert estimate_mastery([], [], []).gains(['x']).tolist() == pytest.approx(m.gains(['new']).tolist())
+
+
+@pytest.fixture
+def user_id(ctx):
+    user = User(email="mastery@example.com", password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    invalidate_mastery(user.id)
+    yield user.id
+    invalidate_mastery(user.id)
+
+
+def test_cached_mastery_is_invalidated_by_new_answers(user_id):
+    quiz = create_quiz_session(user_id, [ParsedQuestion("What is 2+2?", {'A': '3', 'B': '4'}, 'B', topic='Math')])
+    assert get_mastery(user_id).keys == []
+    q = QuizQuestion.query.filter_by(session_id=quiz.id).one()
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['quiz_session_id'] = quiz.id
+            sess['current_question_index'] = 0
+        client.post('/chat', data={'answer': 'A'})
+    db.session.expire_all()
+    assert db.session.get(QuizQuestion, q.id).is_correct is False
+    m = get_mastery(user_id)
+    assert m.keys == ['math'] and m.mastery('Math') < 0.5
+    assert get_mastery(user_id) is m
+    # history written elsewhere (another process) is picked up after invalidation
+    other = QuizSession(user_id=user_id, num_questions=1)
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(QuizQuestion(session_id=other.id, question_index=0, prompt="Q", options={}, correct_answer='x',
+                                user_answer='x', topic='Art', is_correct=True, answered_at=datetime.utcnow()))
+    db.session.commit()
+    assert get_mastery(user_id) is m
+    invalidate_mastery(user_id)
+    assert get_mastery(user_id).keys == ['art', 'math']
@@ -0,0 +1,57 @@
+# tests/test_parse_cache.py
+import os
+from backend.parse_cache import ParseCache
+from backend import uploads
+
+
+def spool(tmp_path, data, filename):
+    path = tmp_path / f"upload-{len(list(tmp_path.iterdir()))}"
+    path.write_bytes(data)
+    return [{'path': str(path), 'filename': filename}]
+
+
+def parse(files, cache, **kwargs):
+    # workers=0 parses in this process, so the monkeypatched parser is used
+    return [r['text'] for r in uploads.parse_uploads(files, cache=cache, workers=0, **kwargs)]
+
+
+def test_repeated_upload_skips_parsing(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_pdf(file, max_chars=None):
+        calls.append(1)
+        return f"parsed {len(file.read())} bytes"
+
+    monkeypatch.setitem(uploads.PARSERS, '.pdf', ('pdf', 1, fake_pdf))
+    cache = ParseCache(str(tmp_path / 'cache'))
+    files = tmp_path / 'files'
+    files.mkdir()
+    first = parse(spool(files, b'%PDF deck', 'deck.pdf'), cache)
+    second = parse(spool(files, b'%PDF deck', 'Deck.PDF'), cache)
+    assert first == second == ['parsed 9 bytes']
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    # a fresh process (empty memory tier) is served from disk
+    cold = ParseCache(str(tmp_path / 'cache'))
+    parse(spool(files, b'%PDF deck', 'deck.pdf'), cold)
+    assert len(calls) == 1
+    assert cold.stats()['disk_hits'] == 1
+
+
+def test_parser_version_is_part_of_the_key():
+    assert ParseCache.key_for(b'x', 'pdf', 1) != ParseCache.key_for(b'x', 'pdf', 2)
+    assert ParseCache.key_for(b'x', 'pdf', 1) != ParseCache.key_for(b'x', 'docx', 1)
+
+
+def test_memory_and_disk_eviction(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=250, memory_entries=2)
+    for i in range(5):
+        cache.set(f"k{i}", 'x' * 100)
+        # distinct mtimes so LRU order on disk is deterministic
+        os.utime(tmp_path / f"k{i}.txt", (i, i))
+    assert len(cache._memory) == 2
+    remaining = sorted(p.name for p in tmp_path.iterdir())
+    assert remaining == ['k3.txt', 'k4.txt']
+    assert cache.stats()['evictions'] == 3
+    assert cache.get('k0') is None
@@ -0,0 +1,71 @@
+# tests/test_parse_pool.py
+import os
+import sys
+import pytest
+from backend import uploads
+from backend.parse_cache import ParseCache
+from backend.uploads import parse_uploads, shutdown_parse_pool
+from samples import make_pdf, make_pptx, make_xlsx, slide_xml
+
+
+@pytest.fixture(autouse=True)
+def stop_pool():
+    yield
+    shutdown_parse_pool()
+
+
+def spool(tmp_path):
+    files = []
+    (tmp_path / 'a.pdf').write_bytes(make_pdf(2))
+    files.append({'path': str(tmp_path / 'a.pdf'), 'filename': 'a.pdf'})
+    make_xlsx(tmp_path / 'b.xlsx', rows=2)
+    files.append({'path': str(tmp_path / 'b.xlsx'), 'filename': 'b.xlsx'})
+    (tmp_path / 'c.txt').write_text("pasted notes")
+    files.append({'path': str(tmp_path / 'c.txt'), 'filename': 'c.txt'})
+    make_pptx(tmp_path / 'd.pptx', [slide_xml([["Title"]]), slide_xml([["Ribosomes translate messenger RNA"]])])
+    files.append({'path': str(tmp_path / 'd.pptx'), 'filename': 'd.pptx'})
+    return files
+
+
+def test_pool_results_match_inline_parsing_in_order(tmp_path):
+    files = spool(tmp_path)
+    pooled = parse_uploads(files, workers=2)
+    inline = parse_uploads(files, workers=0)
+    assert pooled == inline
+    assert [r['filename'] for r in pooled] == ['a.pdf', 'b.xlsx', 'c.txt', 'd.pptx']
+    assert pooled[0]['text'].startswith("Page 0 mitochondria")
+    assert pooled[2]['text'] == "pasted notes"
+    assert pooled[3]['text'] == "Ribosomes translate messenger RNA"
+    assert all(r['error'] is None for r in pooled)
+
+
+def test_cache_is_used_before_the_pool(tmp_path, monkeypatch):
+    files = spool(tmp_path)
+    cache = ParseCache(str(tmp_path / 'cache'))
+    first = parse_uploads(files, cache=cache, workers=2)
+
+    def no_pool(workers):
+        raise AssertionError("cached files must not be sent to the pool")
+
+    monkeypatch.setattr(uploads, '_get_pool', no_pool)
+    assert parse_uploads(files, cache=cache, workers=2) == first
+
+
+def test_oversized_file_is_skipped(tmp_path):
+    files = spool(tmp_path)
+    results = parse_uploads(files, workers=0, max_bytes=200)
+    assert results[0]['text'] == '' and 'larger than' in results[0]['error']
+    assert results[2]['text'] == "pasted notes"
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="needs SIGALRM and named pipes")
+def test_stuck_file_times_out_without_blocking_the_others(tmp_path):
+    files = spool(tmp_path)
+    # opening a FIFO with no writer blocks forever, like a parser that hangs
+    os.mkfifo(tmp_path / 'stuck.pdf')
+    files.insert(1, {'path': str(tmp_path / 'stuck.pdf'), 'filename': 'stuck.pdf'})
+    results = parse_uploads(files, workers=2, timeout=1)
+    assert results[1]['text'] == '' and 'took too long' in results[1]['error']
+    assert [r['error'] for i, r in enumerate(results) if i != 1] == [None] * 4
+    # the worker was freed by its alarm, so the pool still serves new files
+    assert parse_uploads(files[:1], workers=2)[0]['text'].startswith("Page 0")
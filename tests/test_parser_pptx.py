@@ -0,0 +1,41 @@
+# tests/test_parser_pptx.py
+import io
+from backend.parser_pptx_json import pptx_to_json, parse_slide, iter_pptx_slides
+from backend.uploads import pptx_to_text
+from samples import make_pptx, slide_xml
+
+
+def test_slides_are_read_in_numeric_order(tmp_path):
+    path = tmp_path / 'deck.pptx'
+    slides = [slide_xml([[f"Slide {n} text"]]) for n in range(1, 13)]
+    # zip order 1, 10, 11, 12, 2, ... as PowerPoint often writes it
+    make_pptx(path, slides, order=sorted(range(1, 13), key=str))
+    texts = [s['text'] for s in pptx_to_json(str(path))['slides']]
+    assert texts == [[f"Slide {n} text"] for n in range(1, 13)]
+
+
+def test_only_drawingml_text_runs_are_collected():
+    xml = slide_xml([["Enzymes ", "lower ", "activation energy"], ["  "], ["Second paragraph"]])
+    # a table, an extension list and a text body attribute must not leak into the text
+    xml = xml.replace('</p:spTree>',
+                      '<a:tbl><a:tblGrid/><a:tr><a:tc><a:txBody><a:p><a:r><a:t>Cell text</a:t></a:r></a:p>'
+                      '</a:txBody></a:tc></a:tr></a:tbl><p:extLst><p:ext uri="x">ext</p:ext></p:extLst></p:spTree>')
+    assert parse_slide(xml.encode())['text'] == ["Enzymes lower activation energy", "Second paragraph", "Cell text"]
+
+
+def test_speaker_notes_are_optional(tmp_path):
+    path = tmp_path / 'deck.pptx'
+    make_pptx(path, [slide_xml([["Intro"]]), slide_xml([["Body"]])], notes={2: "Mention the 1953 paper"})
+    assert 'notes' not in pptx_to_json(str(path))['slides'][1]
+    slides = list(iter_pptx_slides(str(path), include_notes=True))
+    # the slide-number placeholder of the notes page is skipped
+    assert [s['notes'] for s in slides] == [[], ["Mention the 1953 paper"]]
+
+
+def test_pptx_to_text_skips_title_slide_and_short_lines(tmp_path):
+    path = tmp_path / 'deck.pptx'
+    make_pptx(path, [slide_xml([["Course Title Slide With Many Words"]]),
+                     slide_xml([["Mitochondria produce most cellular energy"], ["Short line"]]),
+                     slide_xml([["Founded 1953"]])])
+    with open(path, 'rb') as fh:
+        assert pptx_to_text(io.BytesIO(fh.read())) == "Mitochondria produce most cellular energy\n\nFounded 1953"
@@ -0,0 +1,54 @@
+# tests/test_persistence.py
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion
+from backend.persistence import create_quiz_session
+from backend.quiz_parser import ParsedQuestion
+
+
+@pytest.fixture
+def user_id(ctx):
+    user = User(email="persist@example.com", password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def make_questions(n):
+    return [ParsedQuestion(f"Question {i}", {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'B', f"Hint {i}")
+            for i in range(n)]
+
+
+def test_create_quiz_session_writes_all_rows_in_one_commit(user_id):
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, 'commit', on_commit)
+    try:
+        quiz = create_quiz_session(user_id, make_questions(50), session_type='quiz',
+                                   question_type='multiple_choice', title='Bulk')
+    finally:
+        event.remove(db.engine, 'commit', on_commit)
+
+    assert len(commits) == 1
+    assert quiz.num_questions == 50
+    assert quiz.title == 'Bulk'
+    rows = QuizQuestion.query.filter_by(session_id=quiz.id).order_by(QuizQuestion.question_index).all()
+    assert [q.question_index for q in rows] == list(range(50))
+    assert rows[7].prompt == "Question 7"
+    assert rows[7].correct_answer == 'B'
+    assert rows[7].hint == "Hint 7"
+    assert rows[7].created_at is not None
+
+
+def test_create_quiz_session_rolls_back_on_bad_row(user_id):
+    questions = make_questions(3)
+    questions[2].prompt = None  # violates NOT NULL
+    with pytest.raises(IntegrityError):
+        create_quiz_session(user_id, questions, session_type='quiz')
+    assert QuizSession.query.count() == 0
+    assert QuizQuestion.query.count() == 0
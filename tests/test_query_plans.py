@@ -0,0 +1,85 @@
+# tests/test_query_plans.py
+# Capture the SQL issued by the hot routes against a populated database and
+# check SQLite's query plans: quiz_sessions / quiz_questions must be reached
+# through an index, never a full table scan.
+import re
+import pytest
+from sqlalchemy import event, insert
+from backend.app import app
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion
+
+HOT_TABLES = ('quiz_questions', 'quiz_sessions', 'topic_performance', 'api_key')
+FULL_SCAN = re.compile(r'\bSCAN (%s)\b(?! USING)' % '|'.join(HOT_TABLES))
+
+
+@pytest.fixture
+def populated(ctx):
+    users = [User(email=f"plan{i}@example.com", password_hash='x') for i in range(5)]
+    db.session.add_all(users)
+    db.session.commit()
+    options = {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}
+    for user in users:
+        for s in range(100):
+            quiz = QuizSession(user_id=user.id, num_questions=20)
+            db.session.add(quiz)
+            db.session.flush()
+            db.session.execute(insert(QuizQuestion), [
+                {'session_id': quiz.id, 'question_index': i, 'prompt': f"Q{i}",
+                 'options': options, 'correct_answer': 'A', 'user_answer': 'A'}
+                for i in range(20)
+            ])
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    user_id = users[0].id
+    session_id = QuizSession.query.filter_by(user_id=user_id).first().id
+    return user_id, session_id
+
+
+def capture(client, method, path, **kwargs):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        resp = getattr(client, method)(path, **kwargs)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert resp.status_code in (200, 302)
+    return statements
+
+
+def plans_for(statements):
+    plans = []
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            for statement, parameters in statements:
+                cur.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+                plans.append((statement, [row[-1] for row in cur.fetchall()]))
+        finally:
+            conn.close()
+    return plans
+
+
+@pytest.mark.parametrize('path', ['/setup', '/chat', '/results'])
+def test_hot_routes_use_index_scans(populated, path):
+    user_id, session_id = populated
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['quiz_session_id'] = session_id
+        sess['current_question_index'] = 3
+    statements = capture(client, 'get', path)
+    touched = [s for s in statements if any(t in s[0] for t in HOT_TABLES)]
+    assert touched, f"{path} issued no queries on the hot tables"
+    for statement, plan in plans_for(touched):
+        scans = [line for line in plan if FULL_SCAN.search(line)]
+        assert not scans, f"full table scan for {path}:\n{statement}\n{plan}"
+        assert any('INDEX' in line or 'PRIMARY KEY' in line for line in plan), plan
@@ -0,0 +1,113 @@
+# tests/test_quiz_cache.py
+from datetime import datetime, timedelta
+import pytest
+from backend import generation, jobs, llm
+from backend.app import app
+from backend.extensions import db
+from backend.jobs import enqueue_generation_job, run_worker
+from backend.models import User, QuizQuestion, GenerationJob, CachedQuiz
+from backend.quiz_cache import quiz_cache_key, quiz_cache_stats, get_cached_quiz
+
+CONTENT = "Enzymes lower activation energy. Catalysts speed reactions without being consumed."
+
+
+@pytest.fixture
+def client(ctx, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'GENERATION_QUEUE', 'worker')
+    monkeypatch.setitem(app.config, 'JOB_UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(app.config, 'STREAM_GENERATION', False)
+    llm.configure(force_provider='stub')
+    yield ctx.test_client()
+    llm.configure(force_provider=app.config['LLM_PROVIDER'])
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    calls = []
+    real_generate = generation.generate_questions
+
+    def counting(api_key, model_name, prompt):
+        calls.append(prompt)
+        return real_generate(api_key, model_name, prompt)
+
+    monkeypatch.setattr(generation, 'generate_questions', counting)
+    monkeypatch.setattr(jobs, 'generate_questions', counting)
+    return calls
+
+
+def make_user(email):
+    user = User(email=email, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def run_job(user_id, content=CONTENT, num_questions=5):
+    job = enqueue_generation_job(user_id, 'gemini', 'multiple_choice', num_questions, content=content)
+    run_worker(app, burst=True)
+    return db.session.get(GenerationJob, job.id)
+
+
+def questions(session_id):
+    return QuizQuestion.query.filter_by(session_id=session_id).order_by(QuizQuestion.question_index).all()
+
+
+def test_identical_request_is_served_from_cache(client, model_calls):
+    first = run_job(make_user('a@example.com'))
+    # same deck with different whitespace, another student
+    second = run_job(make_user('b@example.com'), content=CONTENT.replace(' ', '  ') + '\n')
+    assert first.cache_hit is False and second.cache_hit is True
+    assert second.status == 'done' and second.session_id != first.session_id
+    assert len(model_calls) == 1
+    a, b = questions(first.session_id), questions(second.session_id)
+    assert sorted(q.prompt for q in a) == sorted(q.prompt for q in b)
+    # reshuffled options still point at the same correct text
+    by_prompt = {q.prompt: q.options[q.correct_answer] for q in a}
+    assert all(by_prompt[q.prompt] == q.options[q.correct_answer] for q in b)
+    assert quiz_cache_stats() == {'entries': 1, 'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+    run_job(make_user('c@example.com'), num_questions=6)
+    assert len(model_calls) == 2
+
+
+def test_expired_entries_are_regenerated(client, model_calls, monkeypatch):
+    user_id = make_user('ttl@example.com')
+    run_job(user_id)
+    entry = CachedQuiz.query.one()
+    entry.created_at = datetime.utcnow() - timedelta(seconds=app.config['QUIZ_CACHE_TTL'] + 1)
+    db.session.commit()
+    assert run_job(user_id).cache_hit is False
+    assert len(model_calls) == 2 and CachedQuiz.query.count() == 1
+
+
+def test_least_recently_used_entries_are_evicted(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUIZ_CACHE_MAX_ENTRIES', 2)
+    user_id = make_user('lru@example.com')
+    for n in (3, 4):
+        run_job(user_id, num_questions=n)
+    # touch the first entry so the second becomes least recently used
+    assert get_cached_quiz(quiz_cache_key(CONTENT, 'multiple_choice', 3, 'gemini')) is not None
+    run_job(user_id, num_questions=5)
+    kept = {e.cache_key for e in CachedQuiz.query.all()}
+    assert kept == {quiz_cache_key(CONTENT, 'multiple_choice', n, 'gemini') for n in (3, 5)}
+
+
+def test_cache_can_be_disabled(client, model_calls, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUIZ_CACHE_TTL', 0)
+    user_id = make_user('off@example.com')
+    assert run_job(user_id).cache_hit is None
+    run_job(user_id)
+    assert len(model_calls) == 2 and CachedQuiz.query.count() == 0
+
+
+@pytest.mark.parametrize('email, expected', [('student@example.com', 403), ('Admin@example.com', 200)])
+def test_cache_stats_are_admin_only(client, monkeypatch, email, expected):
+    monkeypatch.setitem(app.config, 'ADMIN_EMAILS', {'admin@example.com'})
+    user_id = make_user(email)
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+    resp = client.get('/admin/cache_stats')
+    assert resp.status_code == expected
+    if expected == 200:
+        data = resp.get_json()
+        assert data['quiz_cache']['hit_rate'] == 0.0 and 'hit_rate' in data['parse_cache']
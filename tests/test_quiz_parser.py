@@ -0,0 +1,54 @@
+# tests/test_quiz_parser.py
+import json
+import random
+from pathlib import Path
+import pytest
+from backend.quiz_parser import ParsedQuestion, parse_quiz, parse_question_item, QUESTION_DELIMITER
+
+CORPUS = Path(__file__).parent / 'corpus'
+EXPECTED = json.loads((CORPUS / 'expected.json').read_text())
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_corpus_outputs_parse_as_expected(name):
+    expected = EXPECTED[name]
+    title, questions = parse_quiz((CORPUS / name).read_text(), expected['question_type'])
+    assert title == expected['title']
+    assert [q.answer for q in questions] == expected['answers']
+
+
+def test_loose_mc_formatting_is_accepted():
+    item = "2. Which unit measures force?\nA. Mass\nB: Force\nC) Energy\nD) Power\nHINT - it accelerates\nThe Answer: b"
+    assert parse_question_item(item, 'multiple_choice') == ParsedQuestion(
+        'Which unit measures force?', {'A': 'Mass', 'B': 'Force', 'C': 'Energy', 'D': 'Power'}, 'B', '- it accelerates')
+
+
+def test_free_response_keeps_first_answer_line():
+    item = "1. Why?\nAnswer: Because.\nMore text\nAnswer: ignored"
+    assert parse_question_item(item, 'free_response').answer == 'Because.'
+
+
+def _mutations(text, rng):
+    lines = text.splitlines()
+    yield text[:rng.randrange(len(text) + 1)]  # truncated stream
+    yield '\n'.join(l for l in lines if rng.random() > 0.3)  # dropped lines
+    yield '\n'.join(rng.sample(lines, len(lines)))  # shuffled lines
+    pos = rng.randrange(len(text) + 1)
+    yield text[:pos] + QUESTION_DELIMITER + text[pos:]  # stray delimiter
+    yield text.replace('\n', '\r\n').replace(':', rng.choice([':', ' ', '::', '']))
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_fuzzed_corpus_never_breaks_the_parser(name):
+    rng = random.Random(name)
+    text = (CORPUS / name).read_text()
+    for _ in range(50):
+        for mutated in _mutations(text, rng):
+            for question_type in ('multiple_choice', 'free_response'):
+                _, questions = parse_quiz(mutated, question_type)
+                for q in questions:
+                    assert isinstance(q, ParsedQuestion) and q.prompt
+                    if question_type == 'free_response' or not q.options:
+                        assert q.options == {}
+                    else:
+                        assert sorted(q.options) == ['A', 'B', 'C', 'D'] and q.answer in q.options
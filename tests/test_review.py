@@ -0,0 +1,121 @@
+# tests/test_review.py
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event, insert
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion, ReviewCard
+from backend.persistence import create_quiz_session
+from backend.quiz_parser import ParsedQuestion
+from backend.review import sm2, due_cards, DEFAULT_EASE
+
+OPTIONS = {'A': 'Paris', 'B': 'Rome', 'C': 'Madrid', 'D': 'Berlin'}
+
+
+def test_sm2_intervals_grow_and_lapses_reset():
+    ease, interval, reps = DEFAULT_EASE, 0, 0
+    intervals = []
+    for _ in range(3):
+        ease, interval, reps = sm2(ease, interval, reps, 4)
+        intervals.append(interval)
+    assert intervals == [1, 6, 15] and ease == pytest.approx(DEFAULT_EASE)
+    ease, interval, reps = sm2(ease, interval, reps, 1)
+    assert (interval, reps) == (1, 0) and ease == pytest.approx(DEFAULT_EASE - 0.54)
+    assert sm2(1.3, 10, 3, 0)[0] == 1.3
+
+
+def login(client):
+    user = User(email='review@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+    return user.id
+
+
+def start(client, quiz):
+    with client.session_transaction() as sess:
+        sess['quiz_session_id'] = quiz.id
+        sess['current_question_index'] = 0
+
+
+def test_answers_schedule_cards_and_due_cards_make_a_review_session(client):
+    user_id = login(client)
+    quiz = create_quiz_session(user_id, [ParsedQuestion("What is the capital of France?", dict(OPTIONS), 'A'),
+                                         ParsedQuestion("What is the capital of Italy?", dict(OPTIONS), 'B')])
+    start(client, quiz)
+    client.post('/chat', data={'answer': 'A'})
+    client.post('/chat', data={'answer': 'C'})
+    cards = {c.question_id: c for c in ReviewCard.query.all()}
+    first, second = [q.id for q in QuizQuestion.query.filter_by(session_id=quiz.id)
+                     .order_by(QuizQuestion.question_index)]
+    assert (cards[first].repetitions, cards[first].interval) == (1, 1)
+    assert (cards[second].lapses, cards[second].ease) == (1, pytest.approx(DEFAULT_EASE - 0.54))
+    assert client.post('/review').status_code == 302 and due_cards(user_id) == []
+
+    # both come due; the review session serves them and updates the same cards
+    for card in cards.values():
+        card.due_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+    assert client.post('/review').headers['Location'].endswith('/chat')
+    with client.session_transaction() as sess:
+        review_id = sess['quiz_session_id']
+    review = QuizQuestion.query.filter_by(session_id=review_id).order_by(QuizQuestion.question_index).all()
+    assert sorted(q.repeat_of_id for q in review) == sorted([first, second])
+    for q in review:
+        client.post('/chat', data={'answer': next(k for k, v in q.options.items() if v == OPTIONS[
+            'A' if q.repeat_of_id == first else 'B'])})
+    db.session.expire_all()
+    assert ReviewCard.query.count() == 2
+    assert db.session.get(ReviewCard, cards[first].id).interval == 6
+    assert db.session.get(ReviewCard, cards[second].id).repetitions == 1
+    assert due_cards(user_id) == []
+
+
+def test_due_queue_is_an_index_range_scan(client):
+    user_id = login(client)
+    quiz = QuizSession(user_id=user_id, num_questions=2000)
+    db.session.add(quiz)
+    db.session.flush()
+    db.session.execute(insert(QuizQuestion), [
+        {'session_id': quiz.id, 'question_index': i, 'prompt': f"Q{i}", 'options': OPTIONS,
+         'correct_answer': 'A', 'user_answer': 'A'} for i in range(2000)])
+    ids = [q.id for q in QuizQuestion.query.filter_by(session_id=quiz.id)]
+    now = datetime.utcnow()
+    db.session.execute(insert(ReviewCard), [
+        {'user_id': user_id, 'question_id': qid, 'ease': 2.5, 'interval': 1, 'repetitions': 1, 'lapses': 0,
+         'due_at': now + timedelta(hours=i - 1000)} for i, qid in enumerate(ids)])
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'review_cards' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        cards = due_cards(user_id, limit=50, now=now)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert len(cards) == 50 and cards == sorted(cards, key=lambda c: c.due_at)
+    cur = db.session.connection().connection.cursor()
+    cur.execute('EXPLAIN QUERY PLAN ' + statements[0][0], statements[0][1])
+    plan = [row[-1] for row in cur.fetchall()]
+    assert any('ix_review_cards_user_due' in line for line in plan), plan
+    assert not any('TEMP B-TREE' in line for line in plan), plan
+
+
+def test_review_only_serves_the_users_own_questions(client):
+    user_id = login(client)
+    other = User(email='other@example.com', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    theirs = create_quiz_session(other.id, [ParsedQuestion("Their private question?", dict(OPTIONS), 'A')])
+    qid = QuizQuestion.query.filter_by(session_id=theirs.id).one().id
+    # a card on someone else's question (e.g. written before answers were owner-checked)
+    db.session.add(ReviewCard(user_id=user_id, question_id=qid, ease=2.5, interval=1, repetitions=1, lapses=0,
+                              due_at=datetime.utcnow() - timedelta(days=1)))
+    db.session.commit()
+    assert due_cards(user_id) == []
+    resp = client.post('/review')
+    assert resp.status_code == 302 and resp.headers['Location'].endswith('/setup')
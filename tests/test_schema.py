@@ -0,0 +1,99 @@
+# tests/test_schema.py
+import os
+import subprocess
+import sys
+from sqlalchemy import event, create_engine, inspect
+from backend.app import app
+from backend.extensions import db
+from backend.schema import check_schema
+
+
+def test_startup_check_reports_ready_schema():
+    with app.app_context():
+        db.create_all()  # other tests drop the tables on teardown
+        status = check_schema()
+    assert status['ready']
+    assert status['missing_tables'] == []
+    assert status['revision'] == status['head']
+    assert app.test_client().get('/healthz').status_code == 200
+
+
+def test_requests_do_no_schema_work():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        client = app.test_client()
+        client.get('/login')
+        client.get('/healthz')
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert not [s for s in statements if 'sqlite_master' in s or s.startswith('PRAGMA') or s.startswith('CREATE')]
+
+
+def flask_cli(db_path, *args):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", AUTO_INIT_DB='0')
+    return subprocess.run([sys.executable, '-m', 'flask', '--app', 'backend.app', *args], env=env,
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def model_columns(engine):
+    found = inspect(engine)
+    return {t: sorted(c['name'] for c in found.get_columns(t)) for t in db.metadata.tables
+            if found.has_table(t)}
+
+
+def test_migrations_build_the_model_schema_from_an_empty_database(tmp_path):
+    result = flask_cli(tmp_path / 'empty.db', 'db', 'upgrade')
+    assert result.returncode == 0, result.stderr
+    expected = {name: sorted(c.name for c in table.columns) for name, table in db.metadata.tables.items()}
+    assert model_columns(create_engine(f"sqlite:///{tmp_path / 'empty.db'}")) == expected
+
+
+def test_unversioned_database_from_create_all_is_upgraded(tmp_path):
+    # the tables db.create_all() built before migrations were tracked, without an Alembic version
+    path = tmp_path / 'baseline.db'
+    assert flask_cli(path, 'db', 'upgrade', '2a6f1c8d4e07').returncode == 0
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql('DROP TABLE alembic_version')
+    assert 'eval_status' not in model_columns(engine)['quiz_questions']
+    result = flask_cli(path, 'init-db')
+    assert 'Database ready: True' in result.stdout, result.stdout + result.stderr
+    expected = {name: sorted(c.name for c in table.columns) for name, table in db.metadata.tables.items()}
+    assert model_columns(engine) == expected
+    assert '(head)' in flask_cli(path, 'db', 'current').stdout
+
+
+def test_check_schema_reports_missing_columns():
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.text('ALTER TABLE quiz_questions DROP COLUMN eval_status'))
+        db.session.commit()
+        try:
+            status = check_schema()
+        finally:
+            db.session.remove()
+            db.drop_all()
+    assert not status['ready']
+    assert status['missing_tables'] == [] and status['missing_columns'] == ['quiz_questions.eval_status']
+
+
+def test_index_migration_merges_duplicate_topic_counters(tmp_path):
+    path = tmp_path / 'dupes.db'
+    assert flask_cli(path, 'db', 'upgrade', '3c9d2f1a7b44').returncode == 0
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO users (id, email, password_hash) VALUES (1, 'a@example.com', 'x')")
+        conn.exec_driver_sql("INSERT INTO topic_performance (user_id, topic, attempts, correct) VALUES "
+                             "(1, 'Math', 2, 1), (1, 'Art', 1, 1), (1, 'Math', 3, 2)")
+    result = flask_cli(path, 'db', 'upgrade', '7e41b9a0c2d5')
+    assert result.returncode == 0, result.stderr
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT id, topic, attempts, correct FROM topic_performance ORDER BY id").all()
+    assert [tuple(r) for r in rows] == [(1, 'Math', 5, 3), (2, 'Art', 1, 1)]
@@ -0,0 +1,66 @@
+# tests/test_stats.py
+from sqlalchemy import event
+from backend.extensions import db
+from backend.models import User, QuizSession, QuizQuestion
+from backend.stats import get_session_stats
+
+
+def make_user_with_sessions(n_sessions, n_questions):
+    user = User(email='stats@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    for s_idx in range(n_sessions):
+        quiz = QuizSession(user_id=user.id, title=f"Quiz {s_idx}")
+        db.session.add(quiz)
+        db.session.flush()
+        for q_idx in range(n_questions):
+            db.session.add(QuizQuestion(
+                session_id=quiz.id,
+                question_index=q_idx,
+                prompt=f"Q{q_idx}",
+                options={},
+                correct_answer='A',
+                # first question of each session answered correctly, second wrong
+                user_answer='A' if q_idx == 0 else ('B' if q_idx == 1 else None)
+            ))
+    db.session.commit()
+    return user
+
+
+def test_session_stats_counts_totals_and_correct(ctx):
+    user = make_user_with_sessions(3, 4)
+    page = get_session_stats(user.id)
+    assert len(page['items']) == 3
+    for item in page['items']:
+        assert item['total'] == 4
+        assert item['correct'] == 1
+    assert not page['has_next']
+
+
+def test_session_stats_includes_empty_sessions(ctx):
+    user = make_user_with_sessions(1, 0)
+    page = get_session_stats(user.id)
+    assert page['items'][0]['total'] == 0
+    assert page['items'][0]['correct'] == 0
+
+
+def test_session_stats_paginates_with_one_query(ctx):
+    user_id = make_user_with_sessions(30, 5).id
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        first = get_session_stats(user_id, page=1, per_page=10)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert len(statements) == 1
+    assert len(first['items']) == 10
+    assert first['has_next'] and not first['has_prev']
+    last = get_session_stats(user_id, page=3, per_page=10)
+    assert len(last['items']) == 10
+    assert not last['has_next']
+    assert [i['position'] for i in last['items']] == list(range(21, 31))
@@ -0,0 +1,81 @@
+# tests/test_topics.py
+from collections import Counter
+from datetime import datetime
+import pytest
+from backend import llm
+from backend.app import app
+from backend.dedup import content_words
+from backend.extensions import db
+from backend.jobs import enqueue_generation_job, run_worker
+from backend.models import User, QuizSession, QuizQuestion, TopicPerformance, GenerationJob
+from backend.quiz_parser import parse_question_item, ParsedQuestion
+from backend.topics import clean_label, keyword_topic, tag_questions, canonicalize_topics
+
+
+def test_parser_reads_topic_lines():
+    mc = parse_question_item("1. What is 2+2?\nA) 3\nB) 4\nC) 5\nD) 6\nTopic: Addition\nHint: Add\nAnswer: B",
+                             'multiple_choice')
+    assert (mc.answer, mc.topic, mc.hint) == ('B', 'Addition', 'Add')
+    fr = parse_question_item("2. Define osmosis\nTopic:  Cell transport \nAnswer: Water diffusion", 'free_response')
+    assert (fr.topic, fr.answer) == ('Cell transport', 'Water diffusion')
+    assert parse_question_item("3. Why?\nHint: Topical remedies\nAnswer: x", 'free_response').topic is None
+
+
+def test_untagged_questions_get_a_keyword_topic_from_their_source():
+    source = "Mitochondria produce ATP. Mitochondria have two membranes. The cell uses ATP for energy."
+    assert keyword_topic("What do mitochondria produce for the cell?", Counter(content_words(source))) \
+        == 'Mitochondria'
+    questions = tag_questions([ParsedQuestion("Which organelle has two membranes?"),
+                               ParsedQuestion("What is 2+2?", topic=" addition. ")], source)
+    assert [q.topic for q in questions] == ['Membrane', 'Addition']
+    assert clean_label("  ** ") is None
+
+
+@pytest.fixture
+def user_id(ctx):
+    user = User(email="topics@example.com", password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def test_labels_are_mapped_onto_the_users_vocabulary(user_id):
+    db.session.add(TopicPerformance(user_id=user_id, topic='Cellular respiration', attempts=3, correct=1))
+    db.session.commit()
+    questions = [ParsedQuestion(f"Q{i}", topic=label) for i, label in enumerate(
+        ['cellular respirations.', 'Respiration', 'photosynthesis', 'Photosynthesis', 'DNA replication', None])]
+    canonicalize_topics(user_id, questions)
+    assert [q.topic for q in questions] == ['Cellular respiration', 'Cellular respiration', 'Photosynthesis',
+                                            'Photosynthesis', 'DNA replication', None]
+
+
+def test_generated_questions_are_tagged_and_poor_topics_come_first(user_id, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'GENERATION_QUEUE', 'worker')
+    monkeypatch.setitem(app.config, 'JOB_UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(app.config, 'STREAM_GENERATION', False)
+    monkeypatch.setitem(app.config, 'QUIZ_CACHE_TTL', 0)
+    monkeypatch.setitem(app.config, 'MASTERY_CACHE_TTL', 0)
+    llm.configure(force_provider='stub')
+    try:
+        content = "Enzymes lower activation energy. Catalysts speed reactions without being consumed."
+        db.session.add(TopicPerformance(user_id=user_id, topic='catalysts', attempts=4, correct=0))
+        past = QuizSession(user_id=user_id, num_questions=4)
+        db.session.add(past)
+        db.session.flush()
+        db.session.add_all([QuizQuestion(session_id=past.id, question_index=i, prompt=f"Q{i}", options={},
+                                         correct_answer='y', user_answer='x', topic='catalysts', is_correct=False,
+                                         answered_at=datetime.utcnow()) for i in range(4)])
+        db.session.commit()
+        job = enqueue_generation_job(user_id, 'gemini', 'multiple_choice', 10, content=content)
+        run_worker(app, burst=True)
+        job = db.session.get(GenerationJob, job.id)
+        questions = QuizQuestion.query.filter_by(session_id=job.session_id) \
+            .order_by(QuizQuestion.question_index).all()
+    finally:
+        llm.configure(force_provider=app.config['LLM_PROVIDER'])
+    assert all(q.topic for q in questions)
+    # the stub's 'Catalysts' label took the spelling of the user's existing topic, and the
+    # recently missed topic has the highest expected gain so it was ordered first
+    topics = [q.topic for q in questions]
+    assert 'catalysts' in topics and 'Catalysts' not in topics
+    assert topics[0] == 'catalysts'